@@ -0,0 +1,223 @@
+"""
+Offline benchmark suite for the fetch/evaluate/notify path
+
+Every case runs against LocalProvider, so timings are repeatable and
+need no network. Run with:
+
+    python -m benchmarks --output benchmark_results.json --baseline previous.json
+
+Results are written as JSON. With --baseline, any case whose median is
+more than --tolerance slower than the baseline is reported and the
+command exits with status 1.
+"""
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from backtest import run_backtest
+from comparison import aligned_closes, normalized_performance, performance_table, return_correlation
+from screener import metrics_frame, screen
+from scenarios import grid_moves, monte_carlo_moves, return_covariance, run_scenarios, shock_grid
+from export import export_bytes, iter_frame_chunks
+from history_store import HistoryStore
+from indicators import INDICATORS, compute_indicator
+from mailer import SmtpMailer
+from providers import LocalProvider
+from rules import RuleSet, build_panel
+
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_ROUNDS = 5
+DEFAULT_TOLERANCE = 0.25
+
+
+def bench(fn, rounds: int = DEFAULT_ROUNDS, warmup: int = 1, setup=None) -> dict:
+    """
+    Time fn over several rounds, running setup (untimed) before each one
+    Returns: dict of timing statistics in seconds
+    """
+    for _ in range(warmup):
+        fn(setup() if setup else None)
+
+    timings = []
+    for _ in range(rounds):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        fn(state)
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "rounds": rounds,
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.mean(timings),
+        "median": statistics.median(timings),
+        "stddev": statistics.stdev(timings) if rounds > 1 else 0.0,
+    }
+
+
+class _NullSMTP:
+    """Stand-in SMTP server that accepts every message"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def starttls(self, context=None):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, message):
+        return {}
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _make_rules(symbols: list, count: int, rng) -> list:
+    return [
+        {"id": str(i), "symbol": symbols[i % len(symbols)], "percentage": round(float(rng.uniform(-10, 10)), 1)}
+        for i in range(count)
+    ]
+
+
+def run_benchmarks(rounds: int = DEFAULT_ROUNDS, symbols: int = 500, rules: int = 10_000, recipients: int = 200) -> dict:
+    """
+    Run every benchmark case
+    Returns: dict of case name -> timing statistics
+    """
+    provider = LocalProvider()
+    rng = np.random.default_rng(0)
+    universe = [f"SYM{i:04d}" for i in range(symbols)]
+    rule_list = _make_rules(universe, rules, rng)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def cold_store():
+            return HistoryStore(tempfile.mkdtemp(dir=tmp), fetch=provider.history)
+
+        results["single_symbol_load_cold"] = bench(
+            lambda store: store.get_history("AAPL", "1y"), rounds, setup=cold_store
+        )
+
+        warm_store = HistoryStore(tmp, fetch=provider.history)
+        warm_store.get_history("AAPL", "5y")
+        results["single_symbol_load_warm"] = bench(
+            lambda _: warm_store.get_history("AAPL", "1y"), rounds
+        )
+
+    entries = pd.DataFrame({"symbol": universe, "price": rng.uniform(10, 500, symbols)})
+
+    def simulate(_):
+        closes = provider.recent_closes(universe)
+        market_prices = closes.ffill().iloc[-1]
+        pct = (entries["price"] / entries["symbol"].map(market_prices) - 1) * 100
+        return RuleSet(rule_list).evaluate(entries["symbol"], pct)
+
+    results[f"batch_simulation_{symbols}_symbols"] = bench(simulate, rounds)
+
+    rule_set = RuleSet(rule_list)
+    move_symbols = rng.choice(universe, size=symbols)
+    moves = rng.uniform(-12, 12, size=symbols)
+    results[f"rule_compile_{rules}_rules"] = bench(lambda _: RuleSet(rule_list), rounds)
+    results[f"rule_evaluation_{rules}_rules"] = bench(lambda _: rule_set.evaluate(move_symbols, moves), rounds)
+
+    five_years = provider.history("AAPL", period="5y")
+    panel = build_panel({symbol: provider.history(symbol, period="5y") for symbol in universe})
+    results[f"rule_backtest_{rules}_rules_5y"] = bench(lambda _: run_backtest(rule_list, panel), rounds)
+
+    shocks = shock_grid()
+    results[f"stress_grid_{rules}_rules_{len(shocks)}_shocks"] = bench(
+        lambda _: run_scenarios(rule_list, panel, grid_moves(symbols, shocks)), rounds
+    )
+    covariance = return_covariance(panel)
+    results[f"stress_monte_carlo_{rules}_rules_1000_paths"] = bench(
+        lambda _: run_scenarios(rule_list, panel, monte_carlo_moves(covariance, 1000, seed=0)), rounds
+    )
+
+    histories = {symbol: provider.history(symbol, period="5y") for symbol in universe[:150]}
+    results["comparison_align_150_symbols_5y"] = bench(lambda _: aligned_closes(histories), rounds)
+    closes = aligned_closes(histories)
+    results["comparison_stats_150_symbols_5y"] = bench(
+        lambda _: (normalized_performance(closes), return_correlation(closes), performance_table(closes, universe[0])), rounds
+    )
+
+    infos = {symbol: provider.info(symbol) for symbol in universe}
+    results[f"screener_{symbols}_symbols"] = bench(
+        lambda _: screen(metrics_frame(infos), pe_ratio=(None, 20), dividend_yield=(2, None)), rounds
+    )
+
+    results["all_indicators_5y"] = bench(
+        lambda _: [compute_indicator(five_years, name) for name in INDICATORS], rounds
+    )
+    results["csv_export_5y"] = bench(lambda _: export_bytes(iter_frame_chunks(five_years), "csv"), rounds)
+
+    settings = {"server": "localhost", "port": 587, "sender": "bench@example.com", "password": "x"}
+    email_list = [f"user{i}@example.com" for i in range(recipients)]
+    triggered = [{"symbol": "AAPL", "price_change_pct": 6.0, "threshold": 5.0}]
+
+    def notify(_):
+        with mock.patch("smtplib.SMTP", _NullSMTP), SmtpMailer(settings) as mailer:
+            mailer.send_alerts(email_list, triggered)
+
+    results[f"notify_{recipients}_recipients"] = bench(notify, rounds)
+    return results
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Compare medians against a baseline run
+    Returns: list of (case, baseline_median, current_median) for slower cases
+    """
+    regressions = []
+    for name, stats in results.items():
+        previous = baseline.get(name)
+        if previous and stats["median"] > previous["median"] * (1 + tolerance):
+            regressions.append((name, previous["median"], stats["median"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Timed rounds per case")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown before flagging a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.rounds)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, stats in results.items():
+        print(f"{name:<36} median {stats['median'] * 1000:9.2f} ms  (min {stats['min'] * 1000:.2f} ms)")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print(f"Regression: {name} {before * 1000:.2f} ms -> {after * 1000:.2f} ms")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
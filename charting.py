@@ -0,0 +1,221 @@
+import math
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from indicators import INDICATORS
+from tracing import traced
+
+# Charts fill the container, whose width the server never sees, so the candle budget
+# assumes a typical wide-layout chart
+DEFAULT_CHART_WIDTH_PX = 1200
+MIN_PX_PER_CANDLE = 4
+DEFAULT_MAX_POINTS = DEFAULT_CHART_WIDTH_PX // MIN_PX_PER_CANDLE
+
+TRADING_SESSION = pd.Timedelta(hours=6, minutes=30)
+
+OHLC_AGGREGATION = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+# Candidate bucket sizes from finest to coarsest: (offset, approximate length, label)
+RESAMPLE_LADDER = [
+    ("5min", pd.Timedelta(minutes=5), "5-minute"),
+    ("15min", pd.Timedelta(minutes=15), "15-minute"),
+    ("30min", pd.Timedelta(minutes=30), "30-minute"),
+    ("1h", pd.Timedelta(hours=1), "hourly"),
+    ("1D", pd.Timedelta(days=1), "daily"),
+    (pd.offsets.Week(weekday=4), pd.Timedelta(weeks=1), "weekly"),
+    (pd.offsets.MonthEnd(), pd.Timedelta(days=30), "monthly"),
+    (pd.offsets.QuarterEnd(), pd.Timedelta(days=91), "quarterly"),
+]
+
+
+def resample_ohlc(hist: pd.DataFrame, rule) -> pd.DataFrame:
+    """
+    Aggregate bars into coarser OHLCV buckets, dropping empty buckets
+    """
+    aggregation = {column: how for column, how in OHLC_AGGREGATION.items() if column in hist.columns}
+    return hist.resample(rule).agg(aggregation).dropna(subset=["Close"])
+
+
+def choose_resample_rule(span: pd.Timedelta, max_points: int = DEFAULT_MAX_POINTS, bar_length: pd.Timedelta = None, sessions: int = None) -> tuple:
+    """
+    Pick the finest bucket that covers a time span in at most max_points buckets
+    Intraday buckets are counted per trading session when the session count is known
+    Returns: (rule, str) - (resample rule, bucket label)
+    """
+    for rule, approx_length, label in RESAMPLE_LADDER:
+        if bar_length is not None and approx_length <= bar_length:
+            continue
+        if sessions is not None and approx_length <= pd.Timedelta(days=1):
+            buckets = sessions * math.ceil(TRADING_SESSION / approx_length)
+        else:
+            buckets = span / approx_length
+        if buckets <= max_points:
+            return rule, label
+
+    rule, _, label = RESAMPLE_LADDER[-1]
+    return rule, label
+
+
+def downsample_ohlc(hist: pd.DataFrame, max_points: int = DEFAULT_MAX_POINTS) -> tuple:
+    """
+    Reduce bars to at most roughly max_points candles using the finest bucket that fits
+    Returns: (DataFrame, str) - (bars to plot, bucket label or None if unchanged)
+    """
+    bars, _, label = _downsample(hist, max_points)
+    return bars, label
+
+
+def _downsample(hist: pd.DataFrame, max_points: int) -> tuple:
+    if len(hist) <= max_points:
+        return hist, None, None
+
+    rule, label = choose_resample_rule(hist.index[-1] - hist.index[0], max_points)
+    return resample_ohlc(hist, rule), rule, label
+
+
+def align_indicator(values: pd.DataFrame, bars: pd.DataFrame, rule=None) -> pd.DataFrame:
+    """
+    Sample a full-resolution indicator at the plotted candles
+
+    Each bucket takes the indicator's value at the bucket's last bar, the
+    same point its candle closes on.
+    """
+    if rule is not None:
+        values = values.resample(rule).last()
+    return values.reindex(bars.index)
+
+
+@traced("build_candlestick_figure")
+def build_candlestick_figure(hist: pd.DataFrame, symbol: str, max_points: int = DEFAULT_MAX_POINTS, bucket_label: str = None, indicators: dict = None) -> go.Figure:
+    """
+    Build the price chart from downsampled bars so the payload stays bounded
+    Pass bucket_label when the bars were already bucketed upstream
+    indicators: dict of name -> (label, DataFrame computed on hist); price
+    overlays share the candle axis, the rest get a panel below it
+    """
+    bars, rule, downsampled_label = _downsample(hist, max_points)
+    bucket_label = downsampled_label or bucket_label
+    indicators = indicators or {}
+    panels = [name for name in indicators if not INDICATORS[name]["overlay"]]
+
+    if panels:
+        fig = make_subplots(
+            rows=1 + len(panels), cols=1, shared_xaxes=True, vertical_spacing=0.03,
+            row_heights=[0.6] + [0.4 / len(panels)] * len(panels)
+        )
+    else:
+        fig = go.Figure()
+    fig.add_trace(go.Candlestick(
+        x=bars.index,
+        open=bars['Open'],
+        high=bars['High'],
+        low=bars['Low'],
+        close=bars['Close'],
+        name='OHLC'
+    ), **({"row": 1, "col": 1} if panels else {}))
+
+    for name, (label, values) in indicators.items():
+        aligned = align_indicator(values, bars, rule)
+        position = {"row": 2 + panels.index(name), "col": 1} if name in panels else ({"row": 1, "col": 1} if panels else {})
+        for column in aligned.columns:
+            fig.add_trace(go.Scatter(
+                x=aligned.index, y=aligned[column], mode="lines", line={"width": 1},
+                name=label if len(aligned.columns) == 1 else f"{label} {column}"
+            ), **position)
+        if name in panels:
+            fig.update_yaxes(title_text=label, row=position["row"], col=1)
+    if panels:
+        fig.update_xaxes(rangeslider_visible=False)
+
+    title = f"{symbol} Stock Price"
+    if bucket_label:
+        title += f" ({bucket_label} candles)"
+
+    fig.update_layout(
+        title=title,
+        yaxis_title="Price (USD)",
+        xaxis_title="Date",
+        template="plotly_white",
+        height=600
+    )
+    return fig
+
+
+def build_scenario_heatmap(values, rule_labels: list, scenario_values, scenario_title: str, value_title: str = "Fired") -> go.Figure:
+    """
+    Heatmap of rules (rows) against scenarios (columns)
+    values: (rules x scenarios) array, 0/1 for a shock grid or fire rates for Monte Carlo buckets
+    """
+    fig = go.Figure(go.Heatmap(
+        z=values,
+        x=scenario_values,
+        y=rule_labels,
+        zmin=0,
+        zmax=1,
+        colorscale="Reds",
+        colorbar={"title": value_title},
+        hovertemplate=f"%{{y}}<br>{scenario_title}: %{{x:+.2f}}%<br>{value_title}: %{{z:.2f}}<extra></extra>",
+    ))
+    fig.update_layout(
+        xaxis_title=scenario_title,
+        yaxis={"autorange": "reversed", "type": "category"},
+        template="plotly_white",
+        height=max(300, min(1200, 120 + 18 * len(rule_labels)))
+    )
+    return fig
+
+
+@traced("build_comparison_figure")
+def build_comparison_figure(frame: pd.DataFrame, y_title: str, max_points: int = DEFAULT_MAX_POINTS) -> go.Figure:
+    """
+    One line per column of a dates x symbols frame, thinned to about max_points dates
+    Many symbols are drawn with WebGL lines, which stay responsive where SVG would not
+    """
+    step = max(1, math.ceil(len(frame) / max_points))
+    if step > 1:
+        # Keep the latest date so every line ends at its current value
+        frame = frame.iloc[list(range(0, len(frame) - 1, step)) + [len(frame) - 1]]
+    line = go.Scattergl if len(frame.columns) > 10 else go.Scatter
+    fig = go.Figure([
+        line(x=frame.index, y=frame[column], name=str(column), mode="lines", connectgaps=True)
+        for column in frame.columns
+    ])
+    fig.update_layout(
+        yaxis_title=y_title,
+        hovermode="x",
+        template="plotly_white",
+        height=500
+    )
+    return fig
+
+
+def build_correlation_heatmap(corr: pd.DataFrame) -> go.Figure:
+    """
+    Heatmap of a symbols x symbols correlation matrix on a fixed -1..1 scale
+    """
+    fig = go.Figure(go.Heatmap(
+        z=corr.to_numpy(),
+        x=list(corr.columns),
+        y=list(corr.index),
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        reversescale=True,
+        colorbar={"title": "Correlation"},
+        hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>",
+    ))
+    fig.update_layout(
+        yaxis={"autorange": "reversed", "type": "category"},
+        xaxis={"type": "category"},
+        template="plotly_white",
+        height=max(400, min(1200, 120 + 12 * len(corr)))
+    )
+    return fig
@@ -0,0 +1,88 @@
+"""
+Multi-symbol comparison
+
+Closes for many symbols are aligned into one wide float32 frame (dates x
+symbols) on their shared trading dates, and every statistic is computed on
+the whole frame at once, so comparing 100+ symbols over years stays fast.
+"""
+import numpy as np
+import pandas as pd
+
+from rules import session_dates
+
+COMPARISON_DTYPE = np.float32
+TRADING_DAYS_PER_YEAR = 252
+# Trailing returns shown in the performance table, in trading days
+RETURN_WINDOWS = {"1M": 21, "3M": 63, "6M": 126, "1Y": 252}
+# Window whose return ranks relative strength
+RELATIVE_STRENGTH_WINDOW = "3M"
+MIN_CORRELATION_PERIODS = 20
+
+
+def aligned_closes(histories: dict, dtype=COMPARISON_DTYPE) -> pd.DataFrame:
+    """
+    Close prices for many symbols on one date index
+    histories: dict of symbol -> OHLCV DataFrame
+    Returns: DataFrame (dates x symbols), NaN before a symbol's first bar and on days it did not trade
+    """
+    closes = {
+        symbol: hist["Close"].set_axis(session_dates(hist.index)).astype(dtype)
+        for symbol, hist in histories.items()
+        if hist is not None and not hist.empty
+    }
+    if not closes:
+        return pd.DataFrame(dtype=dtype)
+    # Exchanges can report the same session twice around holidays; keep the latest bar
+    closes = {symbol: series[~series.index.duplicated(keep="last")] for symbol, series in closes.items()}
+    return pd.concat(closes, axis=1).sort_index()
+
+
+def normalized_performance(closes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Each symbol rebased to 100 at its first close in the frame
+    """
+    return closes / closes.bfill().iloc[0] * 100
+
+
+def daily_returns(closes: pd.DataFrame) -> pd.DataFrame:
+    # Carry prices over non-trading days so a holiday does not count as a missing return
+    filled = closes.ffill()
+    return np.log(filled / filled.shift(1)).iloc[1:]
+
+
+def return_correlation(closes: pd.DataFrame, min_periods: int = MIN_CORRELATION_PERIODS) -> pd.DataFrame:
+    """
+    Pairwise correlation of daily log returns
+    """
+    return daily_returns(closes).astype(np.float64).corr(min_periods=min_periods)
+
+
+def relative_strength(closes: pd.DataFrame, benchmark: str) -> pd.DataFrame:
+    """
+    Each symbol's price relative to the benchmark, rebased to 100; a rising line is outperforming
+    """
+    return normalized_performance(closes.ffill().div(closes[benchmark].ffill(), axis=0))
+
+
+def performance_table(closes: pd.DataFrame, benchmark: str = None) -> pd.DataFrame:
+    """
+    Trailing returns, volatility, drawdown and relative strength per symbol
+    Returns: DataFrame indexed by symbol, strongest relative strength first
+    """
+    filled = closes.ffill().astype(np.float64)
+    last = filled.iloc[-1]
+    table = pd.DataFrame({"last_close": last})
+    for label, bars in RETURN_WINDOWS.items():
+        # Windows longer than the loaded history have no return
+        table[f"return_{label}"] = (last / filled.iloc[-1 - bars] - 1) * 100 if bars < len(filled) else np.nan
+
+    returns = daily_returns(closes)
+    table["volatility"] = returns.std() * np.sqrt(TRADING_DAYS_PER_YEAR) * 100
+    table["max_drawdown"] = (filled / filled.cummax() - 1).min() * 100
+
+    window_return = table[f"return_{RELATIVE_STRENGTH_WINDOW}"]
+    if benchmark is not None and benchmark in table.index:
+        table[f"vs_{benchmark}"] = window_return - window_return[benchmark]
+    # Percentile of each symbol's return among all compared symbols, 100 being the strongest
+    table["rs_rank"] = window_return.rank(pct=True) * 100
+    return table.sort_values("rs_rank", ascending=False, na_position="last")
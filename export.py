@@ -0,0 +1,132 @@
+"""
+Chunked data export
+
+Frames are written chunk by chunk, so a long multi-symbol intraday export
+never has to exist as one DataFrame or one string. Exports can also be
+written straight to disk from the command line:
+
+    python -m export AAPL MSFT --period 1mo --interval 5m --format parquet --output bars.parquet
+"""
+import argparse
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# Format key -> (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": ("CSV", "csv", "text/csv"),
+    "csv.gz": ("Compressed CSV", "csv.gz", "application/gzip"),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow IPC", "arrow", "application/vnd.apache.arrow.file"),
+}
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def iter_frame_chunks(frame: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """
+    Split an in-memory frame into row chunks for the chunked writers
+    """
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def with_symbol(chunks, symbol: str):
+    """
+    Tag each chunk with its symbol so several symbols can share one export
+    """
+    for chunk in chunks:
+        yield chunk.assign(Symbol=symbol)
+
+
+def _normalize(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Compact volume can be uint32 in one chunk and int64 in the next; columnar files need one type
+    if "Volume" in chunk.columns and chunk["Volume"].dtype != np.int64:
+        chunk = chunk.assign(Volume=chunk["Volume"].astype(np.int64))
+    return chunk
+
+
+def _write_csv(chunks, text_sink):
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(text_sink, header=header)
+        header = False
+
+
+def _write_columnar(chunks, sink, fmt: str):
+    writer = None
+    schema = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(_normalize(chunk).reset_index(), preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(sink, schema) if fmt == "parquet" else ipc.new_file(sink, schema)
+            writer.write_table(table.cast(schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_export(chunks, fmt: str, sink):
+    """
+    Write chunks to a binary file-like sink in the given format
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    if fmt == "csv":
+        text_sink = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+        _write_csv(chunks, text_sink)
+        text_sink.flush()
+        text_sink.detach()
+    elif fmt == "csv.gz":
+        with gzip.GzipFile(fileobj=sink, mode="wb") as gz_sink:
+            text_sink = io.TextIOWrapper(gz_sink, encoding="utf-8", newline="")
+            _write_csv(chunks, text_sink)
+            text_sink.flush()
+            text_sink.detach()
+    else:
+        _write_columnar(chunks, sink, fmt)
+
+
+def export_bytes(chunks, fmt: str) -> bytes:
+    """
+    Serialize chunks into an in-memory export, e.g. for a download button
+    """
+    sink = io.BytesIO()
+    write_export(chunks, fmt, sink)
+    return sink.getvalue()
+
+
+def export_file_name(symbol: str, fmt: str, timestamp: str) -> str:
+    return f"{symbol}_stock_data_{timestamp}.{EXPORT_FORMATS[fmt][1]}"
+
+
+def main():
+    from utils import stream_price_history
+
+    parser = argparse.ArgumentParser(description="Export price history for one or more symbols")
+    parser.add_argument("symbols", nargs="+", help="Symbols to export")
+    parser.add_argument("--period", default="1y", help="History period, e.g. 5d, 1mo, 1y")
+    parser.add_argument("--interval", default="1d", help="Bar interval, e.g. 1m, 5m, 1h, 1d")
+    parser.add_argument("--format", default="csv", choices=list(EXPORT_FORMATS), help="Output format")
+    parser.add_argument("--output", required=True, help="File to write")
+    args = parser.parse_args()
+
+    def all_chunks():
+        for symbol in args.symbols:
+            yield from with_symbol(stream_price_history(symbol, args.period, args.interval), symbol.upper())
+
+    with open(args.output, "wb") as sink:
+        write_export(all_chunks(), args.format, sink)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple, Optional
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_HOST = "finance.yahoo.com"
+
+
+class FetchResult(NamedTuple):
+    symbol: str
+    value: Any
+    error: Optional[str]
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every worker calling the same host.
+
+    Callers reserve a token up front and sleep off any deficit outside the
+    lock, so waiting workers do not block each other's bookkeeping.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FetchEngine:
+    """
+    Bounded thread pool for network fetches.
+
+    Each host gets its own rate limiter. Jobs take a token through
+    throttle() right before they hit the network, so jobs served from
+    local storage never wait on it. Identical calls made while one is
+    already running (same function and arguments) share that call's
+    future instead of issuing a second request.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND):
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._limiters = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, host: str) -> RateLimiter:
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(self.requests_per_second)
+            return self._limiters[host]
+
+    def throttle(self, host: str = DEFAULT_HOST):
+        """
+        Wait for a request token for host, just before making the request
+        """
+        self._limiter(host).acquire()
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def submit(self, fn, *args):
+        """
+        Schedule fn(*args), joining an identical call that is still in flight
+        Returns: concurrent.futures.Future
+        """
+        key = (fn, args)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(fn, *args)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def fetch_many(self, fn, symbols, *args) -> list:
+        """
+        Call fn(symbol, *args) for every symbol concurrently
+        Returns: list of FetchResult in the order the symbols were given
+        """
+        futures = [(symbol, self.submit(fn, symbol, *args)) for symbol in symbols]
+        results = []
+        for symbol, future in futures:
+            try:
+                value = future.result()
+                error = None if value is not None else "No data returned"
+            except Exception as e:
+                value, error = None, f"{type(e).__name__}: {str(e)}"
+            results.append(FetchResult(symbol, value, error))
+        return results
@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from history_store import DEFAULT_STORE_DIR
+
+# Fields of the Yahoo `info` blob that the app actually reads
+KEY_METRIC_FIELDS = (
+    "longName",
+    "marketCap",
+    "trailingPE",
+    "fiftyTwoWeekHigh",
+    "fiftyTwoWeekLow",
+    "volume",
+    "averageVolume",
+    "dividendYield",
+)
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+class FundamentalsCache:
+    """
+    On-disk cache of company fundamentals, one small JSON file per symbol.
+
+    Only the requested fields are kept, so a cached entry stays a few
+    hundred bytes instead of the full `info` blob. Entries are refreshed
+    once they are older than the TTL; a stale entry is still returned if
+    the refresh fails.
+    """
+
+    def __init__(self, root=os.path.join(DEFAULT_STORE_DIR, "fundamentals"), fetch=None, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.root = Path(root)
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.upper()}.json"
+
+    def _read(self, symbol: str):
+        try:
+            with open(self._path(symbol)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, symbol: str, data: dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path(symbol).with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"fetched_at": time.time(), "data": data}, f)
+        os.replace(tmp_path, self._path(symbol))
+
+    def get(self, symbol: str, fields=KEY_METRIC_FIELDS):
+        """
+        Return the requested fundamentals for a symbol
+        Returns: dict of field -> value, or None if nothing could be loaded
+        Raises: the fetch error when nothing is cached and the download fails
+        """
+        symbol = symbol.upper()
+        with self._symbol_lock(symbol):
+            cached = self._read(symbol)
+            if cached is not None:
+                is_fresh = time.time() - cached["fetched_at"] < self.ttl_seconds
+                if is_fresh and all(field in cached["data"] for field in fields):
+                    return {field: cached["data"][field] for field in fields}
+
+            info = self._fetch(symbol, cached)
+            if not info:
+                if cached is None:
+                    return None
+                return {field: cached["data"].get(field) for field in fields}
+
+            # Keep fields cached for other callers alongside the ones asked for now
+            wanted = set(fields) | set(cached["data"] if cached else ())
+            data = {field: info.get(field) for field in wanted}
+            self._write(symbol, data)
+            return {field: data[field] for field in fields}
+
+    def peek(self, symbol: str, fields=KEY_METRIC_FIELDS):
+        """
+        Return the requested fundamentals only if a fresh entry holds them all, without fetching
+        Returns: dict of field -> value, or None
+        """
+        cached = self._read(symbol.upper())
+        if cached is None or time.time() - cached["fetched_at"] >= self.ttl_seconds:
+            return None
+        if not all(field in cached["data"] for field in fields):
+            return None
+        return {field: cached["data"][field] for field in fields}
+
+    def _fetch(self, symbol: str, cached):
+        if self.fetch is None:
+            return None
+        try:
+            return self.fetch(symbol)
+        except Exception as e:
+            # A stale entry is better than nothing; without one the caller sees the error
+            if cached is None:
+                raise
+            print(f"Error: Failed to refresh fundamentals for {symbol} - {str(e)}")
+            return None
@@ -0,0 +1,189 @@
+import json
+import math
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+# Calendar span covered by each period string accepted by yfinance
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+    "max": pd.DateOffset(years=100),
+}
+
+DEFAULT_STORE_DIR = os.getenv("STOCK_DATA_DIR", ".stock_data")
+DEFAULT_REFRESH_SECONDS = 3600
+# Extra calendar days allowed for market holidays when sizing a period in sessions
+HOLIDAY_MARGIN_DAYS = 4
+
+
+def period_for_bars(bars: int) -> str:
+    """
+    Shortest period expected to hold at least the given number of daily bars
+    """
+    needed_days = math.ceil(bars * 7 / 5) + HOLIDAY_MARGIN_DAYS
+    now = pd.Timestamp.now(tz="UTC")
+    for period, offset in PERIOD_OFFSETS.items():
+        if (now - (now - offset)).days >= needed_days:
+            return period
+    return "max"
+
+
+class HistoryStore:
+    """
+    On-disk OHLCV history, one Parquet file per symbol.
+
+    Each file holds the union of every bar fetched so far. Requests for a
+    period already covered are served as a slice of the stored frame; only
+    the tail after the last stored bar (or an older range that was never
+    fetched) goes to the network.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, fetch=None, refresh_seconds: int = DEFAULT_REFRESH_SECONDS):
+        self.root = Path(root)
+        self.fetch = fetch
+        self.refresh_seconds = refresh_seconds
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._manifest_lock = threading.Lock()
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.upper()}.parquet"
+
+    def _manifest_path(self) -> Path:
+        return self.root / "manifest.json"
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self, manifest: dict):
+        tmp_path = self._manifest_path().with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+    def load(self, symbol: str):
+        """
+        Return every stored bar for a symbol, or None if nothing is stored
+        """
+        path = self._path(symbol)
+        if not path.exists():
+            return None
+        return pd.read_parquet(path)
+
+    def save(self, symbol: str, hist: pd.DataFrame, covered_from: pd.Timestamp, refreshed: bool = True):
+        """
+        Persist the full history for a symbol and record the range it covers
+        refreshed=False keeps the previous refresh time, so the next call still fetches the latest bars
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path(symbol).with_suffix(".tmp")
+        hist.to_parquet(tmp_path)
+        os.replace(tmp_path, self._path(symbol))
+
+        with self._manifest_lock:
+            manifest = self._read_manifest()
+            previous = manifest.get(symbol.upper(), {})
+            entry = {"covered_from": covered_from.isoformat()}
+            if refreshed:
+                entry["refreshed_at"] = pd.Timestamp.now(tz="UTC").isoformat()
+            elif "refreshed_at" in previous:
+                entry["refreshed_at"] = previous["refreshed_at"]
+            manifest[symbol.upper()] = entry
+            self._write_manifest(manifest)
+
+    def get_history(self, symbol: str, period: str = "1y"):
+        """
+        Return the bars for a period, fetching only what is missing on disk
+        Returns: DataFrame, or None if no data could be loaded
+        Raises: the fetch error when nothing is stored and the download fails
+        """
+        symbol = symbol.upper()
+        offset = PERIOD_OFFSETS.get(period)
+        if offset is None:
+            raise ValueError(f"Unsupported period: {period}")
+
+        with self._symbol_lock(symbol):
+            stored = self.load(symbol)
+            entry = self._read_manifest().get(symbol, {})
+            now = pd.Timestamp.now(tz="UTC")
+            needed_from = now - offset
+
+            if stored is None or stored.empty:
+                if self.fetch is None:
+                    return None
+                hist = self.fetch(symbol, period=period, start=None)
+                if hist is None or hist.empty:
+                    return None
+                self.save(symbol, hist, needed_from)
+                return hist
+
+            updated = stored
+            covered_from = pd.Timestamp(entry.get("covered_from", stored.index[0]))
+            if covered_from.tzinfo is None:
+                covered_from = covered_from.tz_localize("UTC")
+
+            # Backfill when this period reaches further back than anything fetched so far
+            if needed_from < covered_from:
+                older = self._fetch(symbol, period=period)
+                if older is not None and not older.empty:
+                    updated = _merge(older, updated)
+                    covered_from = needed_from
+
+            # Fetch only the bars after the last stored one once the store is stale
+            refreshed_at = pd.Timestamp(entry.get("refreshed_at", "1970-01-01T00:00:00+00:00"))
+            if (now - refreshed_at).total_seconds() >= self.refresh_seconds:
+                last_bar = updated.index[-1]
+                tail = self._fetch(symbol, start=last_bar.strftime("%Y-%m-%d"))
+                if tail is not None:
+                    if not tail.empty:
+                        updated = _merge(updated, tail)
+                    self.save(symbol, updated, covered_from)
+                elif updated is not stored:
+                    # The tail fetch failed: keep any backfill, but leave the store due for a refresh
+                    self.save(symbol, updated, covered_from, refreshed=False)
+            elif updated is not stored:
+                self.save(symbol, updated, covered_from)
+
+        start = needed_from.tz_convert(updated.index.tz) if updated.index.tz else needed_from.tz_localize(None)
+        sliced = updated[updated.index >= start]
+        # Short periods can fall entirely on a weekend or holiday, so keep the last session
+        return sliced if not sliced.empty else updated.iloc[-1:]
+
+    def _fetch(self, symbol: str, period: str = None, start: str = None):
+        # Top-up fetches fall back to the stored bars when the network fails
+        if self.fetch is None:
+            return None
+        try:
+            return self.fetch(symbol, period=period, start=start)
+        except Exception as e:
+            print(f"Error: Failed to fetch history for {symbol} - {str(e)}")
+            return None
+
+
+def _merge(older: pd.DataFrame, newer: pd.DataFrame) -> pd.DataFrame:
+    """
+    Union two frames of bars, preferring the newer copy of any duplicate bar
+    """
+    if newer.index.tz is not None and older.index.tz is not None:
+        newer = newer.tz_convert(older.index.tz)
+    merged = pd.concat([older, newer])
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def sma(hist: pd.DataFrame, window: int = 20) -> pd.DataFrame:
+    return pd.DataFrame({"sma": hist["Close"].rolling(window).mean()})
+
+
+def ema(hist: pd.DataFrame, span: int = 20) -> pd.DataFrame:
+    return pd.DataFrame({"ema": hist["Close"].ewm(span=span, adjust=False, min_periods=span).mean()})
+
+
+def bollinger(hist: pd.DataFrame, window: int = 20, num_std: float = 2.0) -> pd.DataFrame:
+    rolling = hist["Close"].rolling(window)
+    mid = rolling.mean()
+    width = rolling.std() * num_std
+    return pd.DataFrame({"bb_mid": mid, "bb_upper": mid + width, "bb_lower": mid - width})
+
+
+def rsi(hist: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+    delta = hist["Close"].diff()
+    # Wilder smoothing is an EMA with alpha = 1 / period
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    return pd.DataFrame({"rsi": 100 - 100 / (1 + avg_gain / avg_loss)})
+
+
+def atr(hist: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+    previous_close = hist["Close"].shift()
+    true_range = np.maximum.reduce([
+        (hist["High"] - hist["Low"]).to_numpy(),
+        (hist["High"] - previous_close).abs().to_numpy(),
+        (hist["Low"] - previous_close).abs().to_numpy(),
+    ])
+    true_range = pd.Series(true_range, index=hist.index)
+    return pd.DataFrame({"atr": true_range.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()})
+
+
+def volatility(hist: pd.DataFrame, window: int = 20) -> pd.DataFrame:
+    log_returns = np.log(hist["Close"]).diff()
+    return pd.DataFrame({"volatility": log_returns.rolling(window).std() * np.sqrt(TRADING_DAYS_PER_YEAR) * 100})
+
+
+def drawdown(hist: pd.DataFrame) -> pd.DataFrame:
+    close = hist["Close"]
+    return pd.DataFrame({"drawdown": (close / close.cummax() - 1) * 100})
+
+
+# name -> label, function, default params, whether it overlays the price axis, and
+# how many trailing bars a tail update needs (None means recompute from the start).
+# EMA-based indicators use twenty spans, after which the seed's weight is below 1e-8.
+INDICATORS = {
+    "sma": {"label": "SMA", "fn": sma, "params": {"window": 20}, "overlay": True,
+            "warmup": lambda p: p["window"]},
+    "ema": {"label": "EMA", "fn": ema, "params": {"span": 20}, "overlay": True,
+            "warmup": lambda p: 20 * p["span"]},
+    "bollinger": {"label": "Bollinger Bands", "fn": bollinger, "params": {"window": 20, "num_std": 2.0}, "overlay": True,
+                  "warmup": lambda p: p["window"]},
+    "rsi": {"label": "RSI", "fn": rsi, "params": {"period": 14}, "overlay": False,
+            "warmup": lambda p: 20 * p["period"]},
+    "atr": {"label": "ATR", "fn": atr, "params": {"period": 14}, "overlay": False,
+            "warmup": lambda p: 20 * p["period"]},
+    "volatility": {"label": "Volatility (ann. %)", "fn": volatility, "params": {"window": 20}, "overlay": False,
+                   "warmup": lambda p: p["window"] + 1},
+    "drawdown": {"label": "Drawdown (%)", "fn": drawdown, "params": {}, "overlay": False,
+                 "warmup": lambda p: None},
+}
+
+
+def resolve_params(name: str, params: dict = None) -> dict:
+    """
+    Merge caller params over an indicator's defaults
+    """
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name}")
+    return {**INDICATORS[name]["params"], **(params or {})}
+
+
+def indicator_label(name: str, params: dict = None) -> str:
+    params = resolve_params(name, params)
+    values = ", ".join(str(value) for value in params.values())
+    return f"{INDICATORS[name]['label']}({values})" if values else INDICATORS[name]["label"]
+
+
+def compute_indicator(hist: pd.DataFrame, name: str, params: dict = None) -> pd.DataFrame:
+    """
+    Compute one indicator over a whole OHLCV frame
+    """
+    return INDICATORS[name]["fn"](hist, **resolve_params(name, params))
+
+
+def _last_row(hist: pd.DataFrame) -> tuple:
+    # Values of the newest bar, to notice when it is revised without a new timestamp
+    return tuple(hist.iloc[-1].tolist())
+
+
+class IndicatorCache:
+    """
+    Memoized indicator results keyed on (symbol, period, indicator, params).
+
+    When the same history comes back with new bars appended (or the last
+    bar revised), only the tail is recomputed, over enough trailing bars
+    to warm the indicator up. Least recently used entries are evicted
+    past ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, period: str, hist: pd.DataFrame, name: str, params: dict = None) -> pd.DataFrame:
+        params = resolve_params(name, params)
+        key = (symbol, period, name, tuple(sorted(params.items())))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        result = self._updated(entry, hist, name, params) if entry is not None else None
+        if result is None:
+            result = compute_indicator(hist, name, params)
+
+        with self._lock:
+            self._entries[key] = (result, hist.index[-1], _last_row(hist))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def _updated(self, entry, hist: pd.DataFrame, name: str, params: dict):
+        """
+        Extend a cached result to cover new bars, or None if it must be recomputed
+        """
+        result, last_bar, last_row = entry
+        # Unchanged only if the last bar kept its values too; a live bar is revised in place
+        if hist.index[-1] == last_bar and _last_row(hist) == last_row and result.index[0] <= hist.index[0]:
+            return result.loc[hist.index[0]:]
+
+        position = hist.index.get_indexer([last_bar])[0]
+        warmup = INDICATORS[name]["warmup"](params)
+        if position < 0 or warmup is None or result.index[0] > hist.index[0]:
+            return None
+
+        # Recompute from the previously last bar, which may have been revised since
+        tail_source = hist.iloc[max(0, position - warmup + 1):]
+        tail = compute_indicator(tail_source, name, params).loc[last_bar:]
+        kept = result[(result.index >= hist.index[0]) & (result.index < last_bar)]
+        return pd.concat([kept, tail])
+
@@ -0,0 +1,169 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from history_store import DEFAULT_STORE_DIR
+
+DEFAULT_LEDGER_PATH = os.path.join(DEFAULT_STORE_DIR, "notification_ledger.json")
+DEFAULT_COOLDOWN_SECONDS = int(os.getenv("ALERT_COOLDOWN_SECONDS", "3600"))
+
+
+def alert_key(alert: dict) -> str:
+    """
+    Identify an alert's rule across checks, falling back to its symbol and condition for rules without an id
+    """
+    if alert.get('rule_id') is not None:
+        return str(alert['rule_id'])
+    if 'description' in alert:
+        return f"{alert['symbol']}:{alert['description']}"
+    if 'indicator' in alert:
+        return f"{alert['symbol']}:{alert['label']}:{alert['operator']}:{alert['threshold']}"
+    return f"{alert['symbol']}:{alert['threshold']}"
+
+
+def group_by_alerts(batches: dict) -> list:
+    """
+    Regroup per-recipient alert lists so recipients due the same alerts share one send
+    Returns: list of (recipients, alerts)
+    """
+    groups = {}
+    for recipient, alerts in batches.items():
+        key = tuple(alert_key(alert) for alert in alerts)
+        groups.setdefault(key, ([], alerts))[0].append(recipient)
+    return list(groups.values())
+
+
+class NotificationLedger:
+    """
+    Remembers which rules were firing at the last check and when each
+    alert last went to each recipient.
+
+    rising() keeps only alerts whose rule was not already firing, so a rule
+    that stays true alerts once rather than on every check. due() then
+    holds back any (rule, recipient) pair still inside its cooldown, and
+    release() undoes that for a send that failed. Both firing state and
+    cooldowns are kept per scope, so a simulation email never holds back
+    the monitor's real alert for the same rule. The ledger is saved as
+    JSON, so both survive restarts; pass path=None to keep it in memory
+    only. The app and the monitor share the file: every change re-reads it
+    under an exclusive file lock, so neither overwrites the other's state.
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH, cooldown_seconds: float = DEFAULT_COOLDOWN_SECONDS):
+        self.path = Path(path) if path is not None else None
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._state = self._read()
+
+    def _read(self) -> dict:
+        state = {"active": {}, "sent": {}}
+        if self.path is None:
+            return state
+        try:
+            with open(self.path) as f:
+                state.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        sent = state["sent"]
+        if any(not isinstance(at, dict) for recipients in sent.values() for at in recipients.values()):
+            # Cooldowns saved before they were scoped carry over to the default scope
+            state["sent"] = {"default": sent}
+        return state
+
+    def _write(self):
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def _transaction(self):
+        # Yields the latest state from disk and saves it afterwards if it changed
+        with self._lock:
+            if self.path is None:
+                yield self._state
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path.with_suffix(".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._state = self._read()
+                    before = json.dumps(self._state, sort_keys=True)
+                    yield self._state
+                    if json.dumps(self._state, sort_keys=True) != before:
+                        self._write()
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def rising(self, alerts: list, checked_symbols, scope: str = "default") -> list:
+        """
+        Keep the alerts whose rule has just started firing
+        Rules on symbols outside checked_symbols keep their previous state
+        Returns: list of alerts
+        """
+        checked_symbols = set(checked_symbols)
+        with self._transaction() as state:
+            active = state["active"].get(scope, {})
+            keys = [alert_key(alert) for alert in alerts]
+            rising = [alert for alert, key in zip(alerts, keys) if key not in active]
+
+            next_active = {key: symbol for key, symbol in active.items() if symbol not in checked_symbols}
+            next_active.update((key, alert['symbol']) for key, alert in zip(keys, alerts))
+            state["active"][scope] = next_active
+        return rising
+
+    def due(self, email_list: list, alerts: list, now: float = None, scope: str = "default") -> dict:
+        """
+        Alerts each recipient should get now, starting their cooldowns in scope
+        Call release() for any that then fail to send
+        Returns: dict of recipient -> list of alerts, leaving out recipients with nothing due
+        """
+        now = time.time() if now is None else now
+        batches = {}
+        with self._transaction() as state:
+            sent = state["sent"].setdefault(scope, {})
+            for recipient in email_list:
+                for alert in alerts:
+                    key = alert_key(alert)
+                    last_sent = sent.get(key, {}).get(recipient)
+                    if last_sent is not None and now - last_sent < self.cooldown_seconds:
+                        continue
+                    batches.setdefault(recipient, []).append(alert)
+                    sent.setdefault(key, {})[recipient] = now
+
+            if batches:
+                self._prune(state, now)
+        return batches
+
+    def release(self, recipient: str, alerts: list, scope: str = "default"):
+        """
+        Forget that alerts went to a recipient under scope after their send failed
+        The rules count as not firing again, so the next check retries them; recipients
+        who did get them are still held back by their cooldowns
+        """
+        keys = {alert_key(alert) for alert in alerts}
+        with self._transaction() as state:
+            sent = state["sent"].get(scope, {})
+            for key in keys:
+                recipients = sent.get(key)
+                if recipients is not None:
+                    recipients.pop(recipient, None)
+                    if not recipients:
+                        del sent[key]
+            for scope, active in state["active"].items():
+                state["active"][scope] = {key: symbol for key, symbol in active.items() if key not in keys}
+
+    def _prune(self, state: dict, now: float):
+        # Entries past their cooldown no longer hold anything back
+        for scope in list(state["sent"]):
+            sent = state["sent"][scope]
+            for key in list(sent):
+                sent[key] = {recipient: at for recipient, at in sent[key].items() if now - at < self.cooldown_seconds}
+                if not sent[key]:
+                    del sent[key]
+            if not sent:
+                del state["sent"][scope]
@@ -0,0 +1,295 @@
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from ledger import alert_key, group_by_alerts
+from tracing import span
+
+DEFAULT_SMTP_PORT = 587
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+
+# Errors after which a fresh connection is worth another attempt
+RETRYABLE_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+def load_smtp_settings():
+    """
+    Read the SMTP configuration from environment variables
+    Returns: dict of settings, or None if required settings are missing
+    """
+    smtp_server = os.getenv('SMTP_SERVER')
+    smtp_port_str = os.getenv('SMTP_PORT')
+    sender_email = os.getenv('EMAIL_USERNAME')
+    password = os.getenv('EMAIL_PASSWORD')
+
+    smtp_port = DEFAULT_SMTP_PORT
+    if smtp_port_str:
+        try:
+            smtp_port = int(smtp_port_str)
+        except ValueError:
+            print(f"Warning: Invalid SMTP port value: {smtp_port_str}, using default port {DEFAULT_SMTP_PORT}")
+
+    if not all([smtp_server, sender_email, password]):
+        print("Error: Email configuration is incomplete. Missing required settings:")
+        if not smtp_server: print("- SMTP_SERVER not set")
+        if not sender_email: print("- EMAIL_USERNAME not set")
+        if not password: print("- EMAIL_PASSWORD not set")
+        return None
+
+    return {
+        "server": smtp_server,
+        "port": smtp_port,
+        "sender": sender_email,
+        "password": password,
+    }
+
+
+def build_alert_message(sender: str, recipient: str, triggered_stocks: list) -> MIMEMultipart:
+    """
+    Build the alert email for one recipient
+    """
+    symbols = ", ".join([stock['symbol'] for stock in triggered_stocks])
+    body = "The following stock rules were triggered due to price movements:\n\n"
+    for stock in triggered_stocks:
+        if 'description' in stock:
+            body += f"- {stock['symbol']}: {stock['description']} (now {stock['value']:.2f})\n"
+        elif 'indicator' in stock:
+            body += f"- {stock['symbol']}: {stock['label']} at {stock['value']:.2f} (Threshold: {stock['operator']} {stock['threshold']:.2f})\n"
+        else:
+            body += f"- {stock['symbol']}: {stock['price_change_pct']:+.2f}% (Threshold: {stock['threshold']:+.2f}%)\n"
+
+    message = MIMEMultipart()
+    message["From"] = sender
+    message["To"] = recipient
+    message["Subject"] = f"Stock Price Alert: {symbols}"
+    message.attach(MIMEText(body, "plain"))
+    return message
+
+
+class SmtpMailer:
+    """
+    Sends messages over a single authenticated SMTP connection.
+
+    The connection is opened on first use and reused for every message
+    until close(). If the server drops it, the mailer reconnects and
+    retries with exponential backoff.
+    """
+
+    def __init__(self, settings: dict, max_retries: int = DEFAULT_MAX_RETRIES, backoff_seconds: float = DEFAULT_BACKOFF_SECONDS):
+        self.settings = settings
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.connections_opened = 0
+        self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.settings["server"], self.settings["port"])
+        try:
+            server.starttls(context=ssl.create_default_context())
+            server.login(self.settings["sender"], self.settings["password"])
+        except Exception:
+            # The socket is already open, so close it before the caller retries or gives up
+            server.close()
+            raise
+        self.connections_opened += 1
+        self._server = server
+
+    def _discard_connection(self):
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def send(self, message) -> bool:
+        """
+        Send one message, reconnecting on dropped connections
+        Returns: True if the message was accepted by the server
+        """
+        with span("email.send") as current:
+            current.bytes = len(message.as_bytes())
+            return self._send_with_retries(message)
+
+    def _send_with_retries(self, message) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._server is None:
+                    self._connect()
+                self._server.send_message(message)
+                return True
+            except smtplib.SMTPAuthenticationError as e:
+                print(f"Error: SMTP Authentication failed. Please check your credentials - {str(e)}")
+                self._discard_connection()
+                return False
+            except RETRYABLE_ERRORS as e:
+                self._discard_connection()
+                if attempt == self.max_retries:
+                    print(f"Error: Giving up on {message['To']} after {attempt + 1} attempts - {str(e)}")
+                    return False
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+            except Exception as e:
+                print(f"Error: Failed to send email to {message['To']} - {type(e).__name__}: {str(e)}")
+                return False
+        return False
+
+    def send_alerts(self, email_list: list, triggered_stocks: list, on_failure=None) -> int:
+        """
+        Send the alert for triggered stocks to every recipient
+        on_failure(recipient, triggered_stocks) is called for each message that could not be sent
+        Returns: number of messages sent
+        """
+        sent = 0
+        for recipient in email_list:
+            message = build_alert_message(self.settings["sender"], recipient, triggered_stocks)
+            if self.send(message):
+                sent += 1
+            elif on_failure is not None:
+                on_failure(recipient, triggered_stocks)
+        return sent
+
+    def close(self):
+        """
+        Close the connection if one is open
+        """
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+
+class MailQueue:
+    """
+    Background worker that sends queued alerts off the caller's thread.
+
+    Jobs that arrive while the worker is busy share its open connection;
+    the connection is closed once the queue drains. With digest_seconds
+    set, alerts are held for that long after the first one arrives and
+    then coalesced into one message per recipient, with repeats of the
+    same rule collapsed to the latest. on_failure(recipient, alerts) is
+    called for every recipient whose alerts were not delivered, e.g.
+    NotificationLedger.release so they are retried.
+    """
+
+    def __init__(self, settings_loader=load_smtp_settings, digest_seconds: float = 0, on_failure=None):
+        self.settings_loader = settings_loader
+        self.digest_seconds = digest_seconds
+        self.on_failure = on_failure
+        self.messages_sent = 0
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_jobs = 0
+        self._digest_due = None
+
+    def submit(self, email_list: list, triggered_stocks: list):
+        """
+        Queue an alert for delivery and return immediately
+        """
+        self.submit_batches({recipient: list(triggered_stocks) for recipient in email_list})
+
+    def submit_batches(self, batches: dict):
+        """
+        Queue per-recipient alerts, e.g. from NotificationLedger.due, and return immediately
+        """
+        self._jobs.put({recipient: list(alerts) for recipient, alerts in batches.items()})
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="mail-queue", daemon=True)
+                self._thread.start()
+
+    def join(self):
+        """
+        Block until every queued alert has been processed, including any pending digest
+        """
+        self._jobs.join()
+
+    def _failed(self, recipient: str, alerts: list):
+        if self.on_failure is None:
+            return
+        try:
+            self.on_failure(recipient, alerts)
+        except Exception as e:
+            print(f"Error: Failed to record undelivered alerts for {recipient} - {str(e)}")
+
+    def _send(self, mailer, batches: dict):
+        undelivered = dict(batches)
+        try:
+            if mailer is None:
+                settings = self.settings_loader()
+                if settings is not None:
+                    mailer = SmtpMailer(settings)
+            if mailer is not None:
+                for recipients, alerts in group_by_alerts(batches):
+                    self.messages_sent += mailer.send_alerts(recipients, alerts, on_failure=self._failed)
+                    for recipient in recipients:
+                        undelivered.pop(recipient, None)
+        except Exception as e:
+            print(f"Error: Mail worker failed - {str(e)}")
+        # Never attempted: no SMTP settings, or the worker failed part way
+        for recipient, alerts in undelivered.items():
+            self._failed(recipient, alerts)
+        return mailer
+
+    def _flush_digest(self, mailer):
+        batches = {recipient: list(alerts.values()) for recipient, alerts in self._pending.items()}
+        jobs = self._pending_jobs
+        self._pending, self._pending_jobs, self._digest_due = {}, 0, None
+        mailer = self._send(mailer, batches)
+        for _ in range(jobs):
+            self._jobs.task_done()
+        return mailer
+
+    def _worker(self):
+        mailer = None
+        while True:
+            if self._digest_due is None:
+                timeout = 1.0
+            else:
+                timeout = max(0.0, self._digest_due - time.monotonic())
+            try:
+                batches = self._jobs.get(timeout=timeout)
+            except queue.Empty:
+                if self._pending_jobs:
+                    mailer = self._flush_digest(mailer)
+                # Exit only if nothing was queued while we waited, otherwise keep going
+                elif self._jobs.empty():
+                    with self._lock:
+                        if self._jobs.empty():
+                            if mailer is not None:
+                                mailer.close()
+                            self._thread = None
+                            return
+                continue
+
+            if self.digest_seconds > 0:
+                for recipient, alerts in batches.items():
+                    pending = self._pending.setdefault(recipient, {})
+                    pending.update((alert_key(alert), alert) for alert in alerts)
+                self._pending_jobs += 1
+                if self._digest_due is None:
+                    self._digest_due = time.monotonic() + self.digest_seconds
+                if time.monotonic() >= self._digest_due:
+                    mailer = self._flush_digest(mailer)
+            else:
+                mailer = self._send(mailer, batches)
+                self._jobs.task_done()
+
+            if self._jobs.empty() and not self._pending_jobs and mailer is not None:
+                mailer.close()
+                mailer = None
@@ -1,15 +1,63 @@
 import streamlit as st
 from pathlib import Path
-import plotly.graph_objects as go
 from utils import (
-    get_stock_data,
-    get_key_metrics,
-    check_stock_rule,
-    send_email_notification
+    get_price_history,
+    get_fundamentals,
+    prefetch_fundamentals,
+    get_intraday_overview,
+    get_intraday_window,
+    build_export,
+    get_latest_prices,
+    get_latest_indicator_values,
+    get_history_panel,
+    get_metrics_table,
+    get_price_chart,
+    history_version,
+    get_comparison_closes,
+    get_screener_frame,
+    load_screener_universe,
+    get_repository,
+    shared_cache,
+    start_prewarm,
+    queue_email_notification
 )
+from rules import HISTORY_TRIGGER_COLUMNS, HistoryRuleSet, IndicatorRuleSet, RuleSet, describe_rule, is_snapshot_rule, rule_kind
+from scenarios import (
+    DEFAULT_HORIZON_DAYS,
+    DEFAULT_PATHS,
+    DEFAULT_SHOCK_HIGH,
+    DEFAULT_SHOCK_LOW,
+    DEFAULT_SHOCK_STEP,
+    SCENARIO_KINDS,
+    bucket_paths,
+    grid_moves,
+    monte_carlo_moves,
+    return_covariance,
+    run_scenarios,
+    shock_grid,
+    summarize,
+)
+from charting import build_comparison_figure, build_correlation_heatmap, build_scenario_heatmap
+from comparison import (
+    RELATIVE_STRENGTH_WINDOW,
+    RETURN_WINDOWS,
+    normalized_performance,
+    performance_table,
+    relative_strength,
+    return_correlation,
+)
+from backtest import run_backtest
+from indicators import INDICATORS
+from streaming import periods_for_interval
+from history_store import period_for_bars
+from export import EXPORT_FORMATS, export_file_name
+from screener import parse_universe, screen
+from repository import DEFAULT_PAGE_SIZE, is_valid_email
+from tracing import DEFAULT_METRICS_PATH, span, tracer
 import pandas as pd
-import base64
 from datetime import datetime
+import io
+import math
 import uuid
 
 # Page config
@@ -19,106 +67,210 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
-if 'stock_rules' not in st.session_state:
-    st.session_state.stock_rules = []
-if 'email_list' not in st.session_state:
-    st.session_state.email_list = []
-if 'simulation_entries' not in st.session_state:
-    st.session_state.simulation_entries = []
+# Rules, recipients and simulation entries are shared by every session and survive refreshes
+repository = get_repository()
+# Popular tickers are loaded at startup and again before each market open
+start_prewarm()
 
-# Load custom CSS
-with open("styles.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+# Rows drawn in the stress-test heatmap
+MAX_HEATMAP_RULES = 100
 
-# Header
-st.title("📈 Stock Data Viz Tool")
+# Each section reruns on its own when one of its widgets changes, instead of the whole page
+fragment = st.fragment
 
-# Email Management Section
-st.header("Email Management")
-col1, col2 = st.columns([3, 1])
-with col1:
-    new_email = st.text_input("Enter Email Address", placeholder="example@email.com")
-with col2:
-    if st.button("Add Email"):
-        if new_email:
-            if '@' in new_email and '.' in new_email:  # Basic email validation
-                if new_email in st.session_state.email_list:
-                    st.error("This email is already in the list!")
-                else:
-                    st.session_state.email_list.append(new_email)
-                    st.success("Email added successfully!")
-            else:
-                st.error("Please enter a valid email address")
 
-if st.session_state.email_list:
-    st.subheader("Current Email List")
-    for idx, email in enumerate(st.session_state.email_list):
-        col1, col2 = st.columns([4, 1])
-        with col1:
-            st.write(email)
-        with col2:
-            if st.button("Remove", key=f"remove_email_{idx}"):
-                st.session_state.email_list.pop(idx)
-                st.rerun()
+def page_slice(total: int, key: str) -> tuple:
+    """
+    Page picker for a long list
+    Returns: (int, int) - (limit, offset) of the page to show
+    """
+    pages = max(1, math.ceil(total / DEFAULT_PAGE_SIZE))
+    page = 1
+    if pages > 1:
+        # Deletes and searches can shrink the list below the page being shown
+        if st.session_state.get(key, 1) > pages:
+            st.session_state[key] = pages
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    return DEFAULT_PAGE_SIZE, (int(page) - 1) * DEFAULT_PAGE_SIZE
 
-st.markdown("---")
 
-# Stock Rules Section
-st.header("Stock Rules")
-with st.form("stock_rule_form"):
-    col1, col2 = st.columns([2, 1])
+def selected_rows(grid_key: str, row_count: int, select_all: bool) -> list:
+    """
+    Positions of the rows ticked in a list grid; rows left untouched follow "Select all"
+    """
+    edited_rows = st.session_state.get(grid_key, {}).get("edited_rows", {})
+    return [row for row in range(row_count) if edited_rows.get(row, {}).get("Select", select_all)]
+
+
+def delete_selected(name: str, grid_key: str, ids: list, select_all: bool, delete):
+    delete([ids[row] for row in selected_rows(grid_key, len(ids), select_all)])
+    # A new grid key drops the ticks, which would otherwise land on the rows that move up
+    st.session_state[f"{name}_grid_version"] = st.session_state.get(f"{name}_grid_version", 0) + 1
+
+
+def save_edits(grid_key: str, ids: list, save):
+    changes = [
+        {"id": ids[row], **{column: value for column, value in edits.items() if column != "Select"}}
+        for row, edits in st.session_state[grid_key]["edited_rows"].items()
+    ]
+    save([change for change in changes if len(change) > 1])
+
+
+def list_grid(name: str, rows: pd.DataFrame, ids: list, delete, column_config: dict = None, save=None):
+    """
+    Show one page of a list as a single editable grid with a Select column and one bulk delete
+    Only the columns named in column_config can be edited, and only when save is given
+    ids: identifier of each row, passed to delete and save
+    """
+    version = st.session_state.get(f"{name}_grid_version", 0)
+    select_all = st.checkbox("Select all on this page", key=f"{name}_select_all_{version}")
+    # Keyed on the rows shown, so ticks never carry over to another page or search
+    grid_key = f"{name}_grid_{version}_{hash(tuple(ids))}_{select_all}"
+    grid = rows.copy()
+    grid.insert(0, "Select", select_all)
+    editable = set(column_config or {}) if save is not None else set()
+    st.data_editor(
+        grid,
+        key=grid_key,
+        hide_index=True,
+        use_container_width=True,
+        column_config=column_config,
+        disabled=[column for column in rows.columns if column not in editable],
+        on_change=save_edits if save is not None else None,
+        args=(grid_key, ids, save),
+    )
+    st.button("Delete Selected", key=f"{name}_delete", on_click=delete_selected,
+              args=(name, grid_key, ids, select_all, delete))
+
+
+@fragment
+def email_management():
+    st.header("Email Management")
+    col1, col2 = st.columns([3, 1])
     with col1:
-        rule_symbol = st.text_input("Stock Symbol", placeholder="e.g., AAPL").upper()
+        new_email = st.text_input("Enter Email Address", placeholder="example@email.com")
     with col2:
-        percentage_change = st.number_input("Percentage Change (%)", min_value=-100.0, max_value=100.0, value=0.0, step=0.1)
+        if st.button("Add Email"):
+            if new_email:
+                if is_valid_email(new_email):
+                    if repository.add_emails([new_email]) == 0:
+                        st.error("This email is already in the list!")
+                    else:
+                        st.success("Email added successfully!")
+                else:
+                    st.error("Please enter a valid email address")
+
+    if repository.count_emails():
+        email_search = st.text_input("Search Emails", key="email_search")
+        email_count = repository.count_emails(email_search)
+        st.subheader(f"Current Email List ({email_count})")
+        limit, offset = page_slice(email_count, "email_page")
+        emails = repository.list_emails(email_search, limit=limit, offset=offset)
+        list_grid("email", pd.DataFrame({"Email": emails}), emails, repository.delete_emails)
+
+
+@fragment
+def stock_rules():
+    st.header("Stock Rules")
+    rule_types = {"Percentage Change": "percentage", "Price Level": "price", "Volume Spike": "volume"}
+    # Indicators that make sense as a threshold on their latest value
+    rule_types.update({INDICATORS[name]["label"]: name for name in ["rsi", "sma", "ema", "atr", "volatility", "drawdown"]})
+    rule_type = st.selectbox("Rule Type", options=list(rule_types))
+    rule_kind = rule_types[rule_type]
+    with st.form("stock_rule_form"):
+        if rule_kind == "percentage":
+            col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+            with col1:
+                rule_symbol = st.text_input("Stock Symbol", placeholder="e.g., AAPL").upper()
+            with col2:
+                percentage_change = st.number_input("Percentage Change (%)", min_value=-100.0, max_value=100.0, value=0.0, step=0.1)
+            with col3:
+                directions = {"From sign": None, "Up": "up", "Down": "down", "Both": "both"}
+                rule_direction = directions[st.selectbox("Direction", options=list(directions))]
+            with col4:
+                windows = {"1 day": "1d", "5 days": "5d", "20 days": "20d", "Since open": "open", "Intraday": "intraday"}
+                rule_window = windows[st.selectbox("Window", options=list(windows))]
+        elif rule_kind == "price":
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                rule_symbol = st.text_input("Stock Symbol", placeholder="e.g., AAPL").upper()
+            with col2:
+                price_level = st.number_input("Price Level ($)", min_value=0.01, value=100.00, step=0.01)
+            with col3:
+                directions = {"Crosses": "both", "At or above": "up", "At or below": "down"}
+                rule_direction = directions[st.selectbox("Condition", options=list(directions))]
+        elif rule_kind == "volume":
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                rule_symbol = st.text_input("Stock Symbol", placeholder="e.g., AAPL").upper()
+            with col2:
+                volume_multiple = st.number_input("Volume Multiple (x average)", min_value=1.0, value=3.0, step=0.5)
+            with col3:
+                volume_days = st.number_input("Average Over (days)", min_value=2, max_value=250, value=20, step=1)
+        else:
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                rule_symbol = st.text_input("Stock Symbol", placeholder="e.g., AAPL").upper()
+            with col2:
+                rule_operator = st.selectbox("Condition", options=[">=", "<="])
+            with col3:
+                rule_value = st.number_input(f"{rule_type} Value", value=0.0, step=0.1)
     
-    submitted = st.form_submit_button("Add Rule")
-    if submitted and rule_symbol:
-        new_rule = {
-            "id": str(uuid.uuid4()),
-            "symbol": rule_symbol,
-            "percentage": percentage_change
-        }
-        st.session_state.stock_rules.append(new_rule)
-        st.success(f"Rule added for {rule_symbol}")
-
-# Display rules table
-if st.session_state.stock_rules:
-    st.subheader("Current Rules")
-    rules_df = pd.DataFrame(st.session_state.stock_rules)
-    rules_df = rules_df[["symbol", "percentage"]]
-    rules_df.columns = ["Symbol", "Percentage Change (%)"]
+        submitted = st.form_submit_button("Add Rule")
+        if submitted and rule_symbol:
+            new_rule = {"id": str(uuid.uuid4()), "symbol": rule_symbol}
+            if rule_kind == "percentage":
+                new_rule.update({"percentage": percentage_change, "window": rule_window})
+                if rule_direction is not None:
+                    new_rule["direction"] = rule_direction
+            elif rule_kind == "price":
+                new_rule.update({"price": price_level, "direction": rule_direction})
+            elif rule_kind == "volume":
+                new_rule.update({"volume_multiple": volume_multiple, "window": f"{int(volume_days)}d"})
+            else:
+                new_rule.update({
+                    "indicator": rule_kind,
+                    "params": dict(INDICATORS[rule_kind]["params"]),
+                    "operator": rule_operator,
+                    "value": rule_value
+                })
+            repository.add_rules([new_rule])
+            st.success(f"Rule added for {rule_symbol}")
+
+    # Display rules table
+    if repository.count_rules():
+        rule_search = st.text_input("Search Rules by Symbol", key="rule_search")
+        rule_count = repository.count_rules(search=rule_search)
+        st.subheader(f"Current Rules ({rule_count})")
     
-    # Display each rule with a delete button
-    for idx, rule in enumerate(st.session_state.stock_rules):
-        col1, col2, col3 = st.columns([2, 2, 1])
-        with col1:
-            st.write(f"Symbol: {rule['symbol']}")
-        with col2:
-            st.write(f"Percentage: {rule['percentage']}%")
-        with col3:
-            if st.button("Delete", key=f"delete_{rule['id']}"):
-                st.session_state.stock_rules.pop(idx)
-                st.rerun()
+        # Only one page of rules is loaded and drawn, however many there are
+        limit, offset = page_slice(rule_count, "rule_page")
+        page_rules = repository.list_rules(limit=limit, offset=offset, search=rule_search)
+        list_grid(
+            "rule",
+            pd.DataFrame({"Symbol": [rule['symbol'] for rule in page_rules], "Rule": [describe_rule(rule) for rule in page_rules]}),
+            [rule['id'] for rule in page_rules],
+            repository.delete_rules
+        )
     
-st.markdown("---")
-
-# Input section
-market_tab, simulation_tab = st.tabs(["Market Data", "Stock Price Simulation"])
+        # Backtest: replay the rules over stored daily history in one vectorized pass
+        with st.expander("Backtest Rules"):
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                backtest_period = st.selectbox("Backtest Period", options=["1y", "2y", "5y", "10y", "max"], index=2)
+            with col2:
+                st.write("")
+                run_rule_backtest = st.button("Run Backtest")
+            if run_rule_backtest:
+                backtest_results = run_backtest(repository.list_rules(), get_history_panel(repository.rule_symbols(), backtest_period))
+                if backtest_results.empty:
+                    st.info("ℹ️ No rules could be backtested over stored history.")
+                else:
+                    st.dataframe(backtest_results.drop(columns=["rule_id"]), hide_index=True, use_container_width=True)
 
-with market_tab:
-    col1, col2 = st.columns([2, 1])
-    with col1:
-        symbol = st.text_input("Enter Stock Symbol (e.g., AAPL, GOOGL)", value="AAPL").upper()
-    with col2:
-        period = st.selectbox(
-            "Select Time Period",
-            options=["1mo", "3mo", "6mo", "1y", "2y", "5y"],
-            index=3
-        )
 
-with simulation_tab:
+@fragment
+def simulation():
     # Add new entry form
     st.subheader("Add Simulation Entry")
     with st.form("add_simulation_entry"):
@@ -127,137 +279,509 @@ with simulation_tab:
             sim_symbol = st.text_input("Stock Symbol", value="AAPL").upper()
         with col2:
             sim_price = st.number_input("Simulated Price ($)", min_value=0.01, value=100.00, step=0.01)
-        
+
         if st.form_submit_button("Add Entry"):
             if sim_symbol:
-                new_entry = {"symbol": sim_symbol, "price": sim_price}
-                st.session_state.simulation_entries.append(new_entry)
+                repository.add_simulation_entries([{"symbol": sim_symbol, "price": sim_price}])
                 st.success(f"Added simulation entry for {sim_symbol}")
-    
+
     # Display current entries
-    if st.session_state.simulation_entries:
-        st.subheader("Current Simulation Entries")
-        for idx, entry in enumerate(st.session_state.simulation_entries):
-            col1, col2, col3 = st.columns([2, 2, 1])
-            with col1:
-                st.write(f"Symbol: {entry['symbol']}")
-            with col2:
-                st.write(f"Price: ${entry['price']:.2f}")
-            with col3:
-                if st.button("Remove", key=f"remove_sim_{idx}"):
-                    st.session_state.simulation_entries.pop(idx)
-                    st.rerun()
-        
+    if repository.count_simulation_entries():
+        entry_search = st.text_input("Search Entries by Symbol", key="simulation_search")
+        entry_count = repository.count_simulation_entries(entry_search)
+        st.subheader(f"Current Simulation Entries ({entry_count})")
+        limit, offset = page_slice(entry_count, "simulation_page")
+        page_entries = pd.DataFrame(
+            repository.list_simulation_entries(limit=limit, offset=offset, search=entry_search),
+            columns=["id", "symbol", "price"]
+        )
+        # Symbols and prices can be corrected in place
+        list_grid(
+            "simulation",
+            page_entries[["symbol", "price"]],
+            page_entries["id"].tolist(),
+            repository.delete_simulation_entries,
+            column_config={
+                "symbol": st.column_config.TextColumn("Symbol", required=True),
+                "price": st.column_config.NumberColumn("Price", min_value=0.01, format="$%.2f", required=True),
+            },
+            save=repository.update_simulation_entries
+        )
+
+        alert_on_change_only = st.checkbox(
+            "Only email when a rule starts firing",
+            value=True,
+            help="Rules that were already firing at the previous run are not emailed again"
+        )
         if st.button("Run Simulation"):
             st.subheader("Simulation Results")
-            triggered_stocks = []
-            
-            for entry in st.session_state.simulation_entries:
-                sim_hist, sim_info = get_stock_data(entry['symbol'])
-                if sim_hist is not None and sim_info is not None:
-                    market_price = sim_hist['Close'].iloc[-1]
-                    price_diff = entry['price'] - market_price
-                    price_change_pct = (price_diff / market_price) * 100
-                    
-                    st.write(f"### {entry['symbol']}")
-                    col1, col2, col3 = st.columns(3)
-                    col1.metric("Market Price", f"${market_price:.2f}")
-                    col2.metric("Simulated Price", f"${entry['price']:.2f}")
-                    col3.metric("Difference", 
-                            f"${price_diff:+.2f}",
-                            f"{price_change_pct:+.2f}%")
-                    
-                    # Check if any rules are triggered
-                    rule_triggered, threshold = check_stock_rule(
-                        entry['symbol'], 
-                        price_change_pct, 
-                        st.session_state.stock_rules
-                    )
-                    
-                    if rule_triggered:
-                        st.warning("⚠️ This result triggered a rule!")
-                        triggered_stocks.append({
-                            'symbol': entry['symbol'],
-                            'price_change_pct': price_change_pct,
-                            'threshold': threshold
-                        })
-                    else:
-                        st.info("ℹ️ There are no rules triggered for this stock.")
-                else:
-                    st.error(f"Error: Could not fetch data for symbol {entry['symbol']}")
-            
+
+            # Fetch every distinct symbol in one request, then price all entries at once
+            results = pd.DataFrame(repository.list_simulation_entries())
+            stock_rules = repository.list_rules()
+            email_list = repository.list_emails()
+            market_prices = get_latest_prices(results['symbol'])
+            results['market_price'] = results['symbol'].map(market_prices)
+            results['price_diff'] = results['price'] - results['market_price']
+            results['price_change_pct'] = (results['price_diff'] / results['market_price']) * 100
+
+            # Evaluate every entry against every rule in one batched call
+            triggered = RuleSet(stock_rules).evaluate(
+                results['symbol'],
+                results['price_change_pct']
+            )
+            simulated_symbols = set(results['symbol'])
+
+            # Price-level and windowed rules take each entry's price as its symbol's next close
+            history_rules = HistoryRuleSet([
+                rule for rule in stock_rules
+                if rule['symbol'] in simulated_symbols and rule_kind(rule) in SCENARIO_KINDS and not is_snapshot_rule(rule)
+            ])
+            history_triggered = pd.DataFrame(columns=["position"] + HISTORY_TRIGGER_COLUMNS)
+            if len(history_rules):
+                panel = get_history_panel(
+                    sorted({rule['symbol'] for rule in history_rules.rules}), period_for_bars(history_rules.lookback_bars())
+                )
+                history_triggered = history_rules.evaluate_entries(panel, results['symbol'], results['price'])
+            triggered_positions = set(triggered['position']) | set(history_triggered['position'])
+
+            # Indicator rules fire on the latest market indicators of the simulated symbols
+            indicator_rules = IndicatorRuleSet(
+                [rule for rule in stock_rules if rule['symbol'] in simulated_symbols]
+            )
+            indicator_triggered = indicator_rules.evaluate(
+                get_latest_indicator_values(indicator_rules.requirements())
+            )
+            indicator_triggered_symbols = set(indicator_triggered['symbol'])
+
+            # One table for every entry rather than a block of widgets each
+            results['rule_triggered'] = results.index.isin(triggered_positions)
+            results['indicator_rule_firing'] = results['symbol'].isin(indicator_triggered_symbols)
+            st.dataframe(
+                results[['symbol', 'market_price', 'price', 'price_diff', 'price_change_pct', 'rule_triggered', 'indicator_rule_firing']],
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "symbol": "Symbol",
+                    "market_price": st.column_config.NumberColumn("Market Price", format="$%.2f"),
+                    "price": st.column_config.NumberColumn("Simulated Price", format="$%.2f"),
+                    "price_diff": st.column_config.NumberColumn("Difference", format="$%+.2f"),
+                    "price_change_pct": st.column_config.NumberColumn("Change", format="%+.2f%%"),
+                    "rule_triggered": "Rule Triggered",
+                    "indicator_rule_firing": "Indicator Rule Firing",
+                }
+            )
+            unpriced = sorted(set(results.loc[results['market_price'].isna(), 'symbol']))
+            if unpriced:
+                st.error(f"Error: Could not fetch data for symbol(s) {', '.join(unpriced)}")
+            if triggered.empty and history_triggered.empty and indicator_triggered.empty:
+                st.info("ℹ️ There are no rules triggered by these entries.")
+            if any(rule['symbol'] in simulated_symbols and rule_kind(rule) == "volume" for rule in stock_rules):
+                st.caption("Volume rules are not checked: a simulated price has no volume.")
+
             # Send email notifications if any rules were triggered
-            if triggered_stocks:
-                send_email_notification(st.session_state.email_list, triggered_stocks)
+            # Repeats and alerts still inside a recipient's cooldown are dropped by the notification ledger
+            triggered_stocks = triggered[['symbol', 'price_change_pct', 'threshold', 'rule_id']].to_dict('records')
+            triggered_stocks += history_triggered[['symbol', 'description', 'value', 'threshold', 'rule_id']].to_dict('records')
+            triggered_stocks += indicator_triggered[['symbol', 'indicator', 'label', 'value', 'operator', 'threshold', 'rule_id']].to_dict('records')
+            if email_list:
+                recipients_queued = queue_email_notification(
+                    email_list,
+                    triggered_stocks,
+                    checked_symbols=simulated_symbols,
+                    edge_triggered=alert_on_change_only
+                )
+                if recipients_queued:
+                    st.caption(f"Alert emails queued for {recipients_queued} recipient(s).")
+                elif triggered_stocks:
+                    st.caption("No new alert emails: these rules were already notified recently.")
+
+    stress_test()
+
 
+def stress_test():
+    """
+    Apply a grid of shocks or Monte Carlo paths to every rule symbol and show which rules fire where
+    """
+    st.subheader("Rule Stress Test")
+    mode = st.radio("Scenarios", options=["Shock Grid", "Monte Carlo"], horizontal=True)
+    if mode == "Shock Grid":
+        col1, col2, col3 = st.columns(3)
+        shock_low = col1.number_input("Lowest Shock (%)", min_value=-90.0, max_value=0.0, value=DEFAULT_SHOCK_LOW, step=1.0)
+        shock_high = col2.number_input("Highest Shock (%)", min_value=0.0, max_value=200.0, value=DEFAULT_SHOCK_HIGH, step=1.0)
+        shock_step = col3.number_input("Step (%)", min_value=0.1, max_value=10.0, value=DEFAULT_SHOCK_STEP, step=0.1)
+    else:
+        col1, col2, col3 = st.columns(3)
+        paths = col1.number_input("Paths", min_value=100, max_value=20000, value=DEFAULT_PATHS, step=100)
+        horizon_days = col2.number_input("Horizon (trading days)", min_value=1, max_value=60, value=DEFAULT_HORIZON_DAYS, step=1)
+        seed = col3.number_input("Random Seed", min_value=0, value=0, step=1)
 
+    if not st.button("Run Stress Test"):
+        return
+    # Price and percentage rules can be moved by a price scenario
+    stress_rules = [rule for rule in repository.list_rules() if rule_kind(rule) in SCENARIO_KINDS]
+    panel = get_history_panel(sorted({rule['symbol'] for rule in stress_rules}), "1y")
+    if not stress_rules or panel["Close"].empty:
+        st.info("ℹ️ There are no percentage or price rules with price history to stress test.")
+        return
+
+    symbol_count = panel["Close"].shape[1]
+    if mode == "Shock Grid":
+        shocks = shock_grid(shock_low, shock_high, shock_step)
+        moves = grid_moves(symbol_count, shocks)
+        applied_rules, fires = run_scenarios(stress_rules, panel, moves)
+        summary = summarize(applied_rules, fires, shocks)
+        heat, columns, scenario_title, value_title = fires.astype(float), shocks, "Shock", "Fired"
+    else:
+        moves = monte_carlo_moves(return_covariance(panel), int(paths), int(horizon_days), int(seed))
+        applied_rules, fires = run_scenarios(stress_rules, panel, moves)
+        summary = summarize(applied_rules, fires).drop(columns=["trigger_down", "trigger_up"])
+        heat, columns = bucket_paths(fires, moves)
+        scenario_title, value_title = "Average move across symbols", "Fire rate"
 
+    st.caption(
+        f"{len(applied_rules)} rules over {symbol_count} symbols and {moves.shape[1]} scenarios, "
+        f"{int((summary['fired'] > 0).sum())} fire in at least one."
+    )
+    # The heatmap keeps the rules that fire most often, so it stays readable with thousands of rules
+    shown = summary.head(MAX_HEATMAP_RULES).index.to_numpy()
+    labels = pd.Series([f"{applied_rules[i]['symbol']} · {describe_rule(applied_rules[i])}" for i in shown])
+    # Identical rules would otherwise share one heatmap row
+    labels += labels.groupby(labels).cumcount().map(lambda n: f" ({n + 1})" if n else "")
+    st.plotly_chart(
+        build_scenario_heatmap(heat[shown], labels.tolist(), columns, scenario_title, value_title),
+        use_container_width=True
+    )
+    st.dataframe(summary.drop(columns=["rule_id"]), hide_index=True, use_container_width=True)
 
 
-if symbol:
-    # Fetch data
-    historical_data, info = get_stock_data(symbol, period)
+@fragment
+def market_data():
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        symbol = st.text_input("Enter Stock Symbol (e.g., AAPL, GOOGL)", value="AAPL").upper()
+    with col2:
+        interval = st.selectbox(
+            "Select Interval",
+            options=["1d", "1h", "30m", "15m", "5m", "1m"],
+            index=0
+        )
+    with col3:
+        # Intraday intervals are only served for a limited lookback
+        period_options = [p for p in ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y"] if p in periods_for_interval(interval)]
+        if interval == "1d":
+            period_options = period_options[2:]
+        period = st.selectbox(
+            "Select Time Period",
+            options=period_options,
+            index=min(3, len(period_options) - 1)
+        )
+    indicator_names_by_label = {spec["label"]: name for name, spec in INDICATORS.items()}
+    selected_indicators = [
+        indicator_names_by_label[label]
+        for label in st.multiselect("Indicators", options=list(indicator_names_by_label))
+    ]
+
+    if symbol:
+        # Fundamentals load in the background while price data is fetched and charted
+        prefetch_fundamentals(symbol)
+        bucket_label = None
+        if interval == "1d":
+            historical_data = get_price_history(symbol, period)
+            if historical_data is not None:
+                current_price = historical_data['Close'].iloc[-1]
+                reference_price = historical_data['Close'].iloc[-2]
+                volume = int(historical_data['Volume'].iloc[-1])
+        else:
+            # Intraday bars are streamed window by window and reduced to chart buckets as they arrive
+            historical_data, summary, bucket_label = get_intraday_overview(symbol, period, interval)
+            if historical_data is not None:
+                current_price = summary['last_close']
+                reference_price = summary['first_open']
+                volume = summary['volume']
     
-    if historical_data is not None and info is not None:
-        # Current price and company name
-        current_price = historical_data['Close'].iloc[-1]
-        company_name = info.get('longName', symbol)
-        
-        st.header(f"{company_name} ({symbol})")
+        if historical_data is not None:
+            # Current price, company name is filled in once fundamentals arrive
+            header_placeholder = st.empty()
+            header_placeholder.header(symbol)
         
-        # Price metrics
-        price_change = current_price - historical_data['Close'].iloc[-2]
-        price_change_pct = (price_change / historical_data['Close'].iloc[-2]) * 100
+            # Price metrics: daily change for daily bars, change over the period for intraday
+            price_change = current_price - reference_price
+            price_change_pct = (price_change / reference_price) * 100
         
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Current Price", f"${current_price:.2f}", 
-                   f"{price_change:+.2f} ({price_change_pct:+.2f}%)")
-        col2.metric("Volume", format(info.get('volume', 0), ','))
-        col3.metric("Market Cap", f"${info.get('marketCap', 0)/1e9:.2f}B")
-        
-        # Interactive price chart
-        fig = go.Figure()
-        fig.add_trace(go.Candlestick(
-            x=historical_data.index,
-            open=historical_data['Open'],
-            high=historical_data['High'],
-            low=historical_data['Low'],
-            close=historical_data['Close'],
-            name='OHLC'
-        ))
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Current Price", f"${current_price:.2f}", 
+                       f"{price_change:+.2f} ({price_change_pct:+.2f}%)")
+            col2.metric("Volume", format(volume, ','))
+            market_cap_placeholder = col3.empty()
         
-        fig.update_layout(
-            title=f"{symbol} Stock Price",
-            yaxis_title="Price (USD)",
-            xaxis_title="Date",
-            template="plotly_white",
-            height=600
-        )
+            # Interactive price chart: intraday ranges narrower than the period are refetched at finer candles
+            first_day = historical_data.index[0].date()
+            last_day = historical_data.index[-1].date()
+            if first_day < last_day:
+                range_start, range_end = st.slider(
+                    "Chart Range",
+                    min_value=first_day,
+                    max_value=last_day,
+                    value=(first_day, last_day),
+                    format="YYYY-MM-DD"
+                )
+            else:
+                range_start, range_end = first_day, last_day
+            data_version = history_version(historical_data)
+            chart_data, chart_label = historical_data, bucket_label
+            if interval != "1d" and (range_start, range_end) != (first_day, last_day):
+                # The period's bars are coarse buckets, so stream just the selected days at native resolution
+                tz = historical_data.index.tz
+                window_data, window_label = get_intraday_window(
+                    symbol, interval, pd.Timestamp(range_start, tz=tz), pd.Timestamp(range_end, tz=tz) + pd.Timedelta(days=1)
+                )
+                if window_data is not None:
+                    chart_data, chart_label = window_data, window_label
+            # Rebuilt only when the data, range or indicators change
+            fig = get_price_chart(symbol, period, interval, range_start, range_end, tuple(selected_indicators),
+                                  chart_label, history_version(chart_data), chart_data)
         
-        st.plotly_chart(fig, use_container_width=True)
+            # Plotly serializes the figure to JSON here
+            with span("plotly_chart"):
+                st.plotly_chart(fig, use_container_width=True)
         
-        # Key metrics table
-        st.subheader("Key Metrics")
-        metrics = get_key_metrics(info)
-        metrics_df = pd.DataFrame.from_dict(metrics, orient='index', columns=['Value'])
-        st.table(metrics_df)
+            # Fundamentals: fetched lazily, after the chart is on screen
+            info = get_fundamentals(symbol)
+            st.subheader("Key Metrics")
+            if info is not None:
+                company_name = info.get('longName') or symbol
+                header_placeholder.header(f"{company_name} ({symbol})")
+                market_cap_placeholder.metric("Market Cap", f"${(info.get('marketCap') or 0)/1e9:.2f}B")
+            
+                # Key metrics table
+                st.table(get_metrics_table(symbol))
+            else:
+                market_cap_placeholder.metric("Market Cap", "N/A")
+                st.info("ℹ️ Fundamentals are currently unavailable for this symbol.")
         
-        # Download button for CSV
-        csv = historical_data.to_csv()
-        b64 = base64.b64encode(csv.encode()).decode()
-        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{symbol}_stock_data_{current_time}.csv"
+            # Export: serialized only when requested, then cached per symbol, period and data version
+            st.subheader("Export Data")
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                export_formats_by_label = {label: fmt for fmt, (label, _, _) in EXPORT_FORMATS.items()}
+                export_label = st.selectbox("Export Format", options=list(export_formats_by_label))
+                export_format = export_formats_by_label[export_label]
+            export_key = (symbol, period, interval, export_format, data_version)
+            with col2:
+                st.write("")
+                if st.button("Prepare Download"):
+                    st.session_state.export_key = export_key
         
-        st.download_button(
-            label="Download Data as CSV",
-            data=csv,
-            file_name=filename,
-            mime="text/csv",
-            key="download-csv",
-        )
+            if st.session_state.get('export_key') == export_key:
+                _, _, export_mime = EXPORT_FORMATS[export_format]
+                current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+                st.download_button(
+                    label=f"Download Data as {export_label}",
+                    data=build_export(*export_key),
+                    file_name=export_file_name(symbol, export_format, current_time),
+                    mime=export_mime,
+                    key="download-export",
+                )
         
+        else:
+            st.error(f"Error: Could not fetch data for symbol {symbol}. Please check if the symbol is correct.")
+
+
+@fragment
+def comparison():
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        symbols_text = st.text_input("Symbols to Compare (comma or space separated)", value="AAPL, MSFT, GOOGL, AMZN, SPY")
+    with col2:
+        period = st.selectbox("Comparison Period", options=["3mo", "6mo", "1y", "2y", "5y"], index=2)
+    symbols = tuple(dict.fromkeys(s for s in symbols_text.upper().replace(",", " ").split()))
+    if len(symbols) < 2:
+        st.info("Enter at least two symbols to compare.")
+        return
+
+    # One batch fetch for every uncached symbol, then one float32 frame shared across sessions
+    closes = get_comparison_closes(symbols, period)
+    if closes is None:
+        st.error("Error: Could not fetch data for any of these symbols.")
+        return
+    missing = [symbol for symbol in symbols if symbol not in closes.columns]
+    if missing:
+        st.warning(f"Warning: No data for {', '.join(missing)}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        benchmark = st.selectbox("Benchmark", options=list(closes.columns),
+                                 index=list(closes.columns).index("SPY") if "SPY" in closes.columns else 0)
+    with col2:
+        view = st.radio("Show", options=["Normalized Performance", "Relative Strength"], horizontal=True)
+    if view == "Normalized Performance":
+        fig = build_comparison_figure(normalized_performance(closes), "Growth of 100")
+    else:
+        fig = build_comparison_figure(relative_strength(closes, benchmark), f"Relative to {benchmark} (100 = even)")
+    with span("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("Performance")
+    st.dataframe(performance_table(closes, benchmark), use_container_width=True, column_config={
+        "last_close": st.column_config.NumberColumn("Last Close", format="%.2f"),
+        **{f"return_{label}": st.column_config.NumberColumn(f"{label} %", format="%.2f") for label in RETURN_WINDOWS},
+        "volatility": st.column_config.NumberColumn("Volatility %", format="%.1f"),
+        "max_drawdown": st.column_config.NumberColumn("Max Drawdown %", format="%.1f"),
+        f"vs_{benchmark}": st.column_config.NumberColumn(f"{RELATIVE_STRENGTH_WINDOW} vs {benchmark} %", format="%+.2f"),
+        "rs_rank": st.column_config.ProgressColumn("RS Rank", min_value=0, max_value=100, format="%.0f"),
+    })
+
+    st.subheader("Correlation of Daily Returns")
+    st.plotly_chart(build_correlation_heatmap(return_correlation(closes)), use_container_width=True)
+
+
+@fragment
+def screener():
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        universe_text = st.text_area("Universe (comma, space or line separated)",
+                                     value=" ".join(load_screener_universe()) or "AAPL MSFT GOOGL AMZN META NVDA JPM XOM KO SPY")
+    with col2:
+        universe_file = st.file_uploader("Or upload a symbol list", type=["csv", "txt"], key="screener_universe")
+    universe = parse_universe(universe_file.getvalue().decode("utf-8") if universe_file is not None else universe_text)
+    # Fundamentals are only loaded on request; reruns after that are served from the caches
+    if st.button(f"Load Fundamentals for {len(universe)} Symbols"):
+        st.session_state.screener_universe_symbols = tuple(universe)
+    symbols = st.session_state.get("screener_universe_symbols")
+    if not symbols:
+        return
+
+    with st.spinner("Loading fundamentals..."):
+        metrics = get_screener_frame(symbols)
+    missing = len(symbols) - len(metrics)
+    if missing:
+        st.warning(f"Warning: No fundamentals for {missing} of {len(symbols)} symbols")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        pe_low, pe_high = st.slider("PE Ratio", min_value=0.0, max_value=100.0, value=(0.0, 100.0), step=1.0)
+    with col2:
+        min_cap = st.number_input("Min Market Cap ($B)", min_value=0.0, value=0.0, step=1.0)
+    with col3:
+        min_yield = st.number_input("Min Dividend Yield (%)", min_value=0.0, value=0.0, step=0.25)
+    with col4:
+        range_low, range_high = st.slider("Position in 52-Week Range (%)", min_value=0, max_value=100, value=(0, 100))
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        sort_labels = {"Market Cap": "market_cap", "PE Ratio": "pe_ratio", "Dividend Yield": "dividend_yield",
+                       "52-Week Range Position": "range_position", "Below 52-Week High": "below_high_pct"}
+        sort_label = st.selectbox("Sort By", options=list(sort_labels))
+    with col2:
+        ascending = st.radio("Order", options=["Descending", "Ascending"], horizontal=True) == "Ascending"
+
+    # Untouched filters are left unbounded, so symbols missing that metric stay in
+    results = screen(
+        metrics,
+        pe_ratio=(pe_low, None if pe_high == 100 else pe_high) if (pe_low, pe_high) != (0.0, 100.0) else None,
+        market_cap=(min_cap * 1e9, None) if min_cap else None,
+        dividend_yield=(min_yield, None) if min_yield else None,
+        range_position=(range_low, range_high) if (range_low, range_high) != (0, 100) else None,
+        sort_by=sort_labels[sort_label],
+        ascending=ascending,
+    )
+    st.caption(f"{len(results)} of {len(metrics)} symbols match")
+    # Formatting happens here only; the table itself stays numeric so it still sorts correctly
+    display = results.assign(market_cap=results["market_cap"] / 1e9)
+    st.dataframe(display, use_container_width=True, column_config={
+        "name": st.column_config.TextColumn("Name"),
+        "price": st.column_config.NumberColumn("Price", format="$%.2f"),
+        "market_cap": st.column_config.NumberColumn("Market Cap ($B)", format="%.2f"),
+        "pe_ratio": st.column_config.NumberColumn("PE Ratio", format="%.2f"),
+        "dividend_yield": st.column_config.NumberColumn("Dividend Yield %", format="%.2f"),
+        "low_52w": st.column_config.NumberColumn("52 Week Low", format="%.2f"),
+        "high_52w": st.column_config.NumberColumn("52 Week High", format="%.2f"),
+        "volume": st.column_config.NumberColumn("Volume", format="%d"),
+        "avg_volume": st.column_config.NumberColumn("Avg Volume", format="%d"),
+        "range_position": st.column_config.ProgressColumn("52-Week Range", min_value=0, max_value=100, format="%.0f%%"),
+        "below_high_pct": st.column_config.NumberColumn("Below High %", format="%.1f"),
+    })
+
+
+# Load custom CSS
+with open("styles.css") as f:
+    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+
+# Header
+st.title("📈 Stock Data Viz Tool")
+
+# Email Management Section
+email_management()
+st.markdown("---")
+
+# Stock Rules Section
+stock_rules()
+
+# Bulk import/export of rules and recipients as CSV
+with st.expander("Import / Export"):
+    col1, col2 = st.columns(2)
+    with col1:
+        rules_csv = st.file_uploader("Rules CSV", type="csv", key="rules_csv")
+        if rules_csv is not None and st.button("Import Rules"):
+            imported = repository.import_rules_csv(io.TextIOWrapper(rules_csv, encoding="utf-8"))
+            st.success(f"Imported {imported} rules")
+        if st.button("Export Rules"):
+            rules_out = io.StringIO()
+            repository.export_rules_csv(rules_out)
+            st.download_button("Download Rules CSV", rules_out.getvalue(), file_name="rules.csv", mime="text/csv")
+    with col2:
+        emails_csv = st.file_uploader("Email CSV", type="csv", key="emails_csv")
+        if emails_csv is not None and st.button("Import Emails"):
+            imported = repository.import_emails_csv(io.TextIOWrapper(emails_csv, encoding="utf-8"))
+            st.success(f"Imported {imported} email addresses")
+        if st.button("Export Emails"):
+            emails_out = io.StringIO()
+            repository.export_emails_csv(emails_out)
+            st.download_button("Download Email CSV", emails_out.getvalue(), file_name="emails.csv", mime="text/csv")
+    
+st.markdown("---")
+
+market_tab, compare_tab, screener_tab, simulation_tab = st.tabs(["Market Data", "Compare", "Screener", "Stock Price Simulation"])
+with market_tab:
+    market_data()
+with compare_tab:
+    comparison()
+with screener_tab:
+    screener()
+with simulation_tab:
+    simulation()
+
+# Timings for this process: where the last reruns spent their time
+with st.expander("Performance"):
+    cache_stats = shared_cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Shared Cache Hits", cache_stats["hits"] + cache_stats["stale_hits"])
+    col2.metric("Served Stale", cache_stats["stale_hits"])
+    col3.metric("Misses", cache_stats["misses"])
+    col4.metric("Cache Memory", f"{cache_stats['bytes'] / 2**20:.1f} / {cache_stats['max_bytes'] / 2**20:.0f} MB")
+    span_stats = pd.DataFrame(tracer.stats())
+    if span_stats.empty:
+        st.info("ℹ️ No timings recorded yet.")
     else:
-        st.error(f"Error: Could not fetch data for symbol {symbol}. Please check if the symbol is correct.")
+        st.dataframe(
+            span_stats[["span", "calls", "mean_seconds", "max_seconds", "last_seconds", "total_seconds",
+                        "cache_hits", "cache_misses", "bytes", "errors"]],
+            hide_index=True,
+            use_container_width=True
+        )
+        st.subheader("Recent Calls")
+        recent_spans = pd.DataFrame(tracer.recent()[:50])
+        recent_spans["time"] = pd.to_datetime(recent_spans["time"], unit="s")
+        st.dataframe(recent_spans, hide_index=True, use_container_width=True)
+        st.subheader("Prometheus Metrics")
+        st.code(tracer.prometheus_text(), language="text")
+
+# Exported for the node exporter textfile collector when STOCK_METRICS_FILE is set
+if DEFAULT_METRICS_PATH:
+    try:
+        tracer.write_prometheus(DEFAULT_METRICS_PATH)
+    except OSError as e:
+        print(f"Warning: Could not write metrics to {DEFAULT_METRICS_PATH} - {str(e)}")
 
 # Footer
 st.markdown("---")
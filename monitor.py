@@ -0,0 +1,232 @@
+"""
+Headless alert monitor
+
+Polls the latest prices for every symbol that has a rule, evaluates the
+rules against the move since the previous close (windowed, price-level
+and volume rules against stored daily history, and indicator rules
+against the latest indicator values) and emails recipients when a rule
+starts firing. Run with:
+
+    python -m monitor --config monitor_config.json --interval 60
+
+Rules and recipients come from the app's database with --db, or from a
+JSON config file holding:
+
+    {"rules": [{"id": "...", "symbol": "AAPL", "percentage": 5.0},
+               {"id": "...", "symbol": "AAPL", "percentage": -8.0, "window": "5d"},
+               {"id": "...", "symbol": "MSFT", "price": 400.0, "direction": "down"},
+               {"id": "...", "symbol": "TSLA", "volume_multiple": 3.0, "window": "20d"}],
+     "email_list": ["someone@example.com"]}
+
+Percentage rules fire in the direction of their sign unless "direction"
+("up", "down" or "both") is given.
+"""
+import argparse
+import functools
+import json
+import os
+import time
+
+import pandas as pd
+
+from history_store import period_for_bars
+from ledger import DEFAULT_COOLDOWN_SECONDS, NotificationLedger, group_by_alerts
+from mailer import MailQueue
+from repository import Repository
+from rules import (
+    HISTORY_TRIGGER_COLUMNS,
+    INDICATOR_TRIGGER_COLUMNS,
+    HistoryRuleSet,
+    IndicatorRuleSet,
+    RuleSet,
+    build_panel,
+    is_snapshot_rule,
+)
+from tracing import traced, tracer
+from utils import fetch_engine, get_daily_moves, get_history_panel, get_latest_indicator_values, send_email_notification
+
+DEFAULT_CONFIG_PATH = os.getenv("MONITOR_CONFIG", "monitor_config.json")
+DEFAULT_INTERVAL_SECONDS = 60
+DEFAULT_BATCH_SIZE = 100
+# Ledger scope of the monitor's cooldowns, kept apart from the app's simulation alerts
+ALERT_SCOPE = "monitor"
+
+
+def load_config(path: str) -> tuple:
+    """
+    Load rules and recipients from the monitor config file
+    Returns: (list, list) - (rules, email_list)
+    """
+    try:
+        with open(path) as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: Monitor config not found at {path}, nothing to monitor")
+        return [], []
+    return config.get("rules", []), config.get("email_list", [])
+
+
+class AlertMonitor:
+    """
+    Evaluates rules against live price moves on a fixed schedule.
+
+    Symbols are downloaded in batches of ``batch_size``, and the batches
+    run concurrently on the shared fetch engine under its rate limit.
+    Rules are edge-triggered
+    through the notification ledger: a notification goes out only when a
+    rule was not already firing in the previous cycle, and not again to a
+    recipient still inside the ledger's cooldown for that rule.
+    """
+
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH, batch_size: int = DEFAULT_BATCH_SIZE,
+                 fetch_moves=get_daily_moves, notify=None,
+                 fetch_indicators=get_latest_indicator_values, fetch_panel=None, ledger=None, load=None):
+        self.config_path = config_path
+        self.load = load or (lambda: load_config(self.config_path))
+        self.batch_size = batch_size
+        self.fetch_moves = fetch_moves
+        self.fetch_indicators = fetch_indicators
+        self.fetch_panel = fetch_panel or get_history_panel
+        self.ledger = ledger if ledger is not None else NotificationLedger(path=None)
+        # Recipients that could not be reached are released from the ledger and retried next cycle
+        release = functools.partial(self.ledger.release, scope=ALERT_SCOPE)
+        self.notify = notify or (lambda recipients, alerts: send_email_notification(recipients, alerts, on_failure=release))
+
+    def _fetch_all_moves(self, symbols: list) -> pd.DataFrame:
+        batches = [tuple(symbols[i:i + self.batch_size]) for i in range(0, len(symbols), self.batch_size)]
+        frames = []
+        for result in fetch_engine.fetch_many(self.fetch_moves, batches):
+            if result.error is not None:
+                print(f"Error: Failed to fetch prices for batch starting {result.symbol[0]} - {result.error}")
+                continue
+            frames.append(result.value)
+        if not frames:
+            return pd.DataFrame(columns=["price", "previous_close", "price_change_pct"])
+        return pd.concat(frames)
+
+    @traced("monitor.cycle")
+    def run_cycle(self) -> dict:
+        """
+        Run one poll/evaluate/notify cycle
+        Returns: dict of cycle statistics
+        """
+        started = time.perf_counter()
+        rules, email_list = self.load()
+        rule_set = RuleSet(rules)
+        history_rules = HistoryRuleSet([rule for rule in rules if not is_snapshot_rule(rule)])
+        indicator_rules = IndicatorRuleSet(rules)
+        symbols = sorted({rule['symbol'] for rule in rule_set.rules})
+
+        moves = self._fetch_all_moves(symbols) if symbols else pd.DataFrame(columns=["price_change_pct"])
+        fetched = moves["price_change_pct"].notna().sum()
+        triggered = rule_set.evaluate(moves.index.to_numpy(), moves["price_change_pct"].to_numpy())
+        priced = set(moves.index[moves["price_change_pct"].notna()])
+        records = self.ledger.rising(
+            triggered[['symbol', 'price_change_pct', 'threshold', 'rule_id']].to_dict('records'), priced, scope="moves"
+        )
+
+        history_triggered = pd.DataFrame(columns=HISTORY_TRIGGER_COLUMNS)
+        if len(history_rules):
+            try:
+                # Load only as many daily bars as the longest rule window looks back
+                period = period_for_bars(history_rules.lookback_bars())
+                panel = self.fetch_panel(sorted({rule['symbol'] for rule in history_rules.rules}), period)
+            except Exception as e:
+                print(f"Error: Failed to load price history - {str(e)}")
+                panel = build_panel({})
+            history_triggered = history_rules.evaluate_latest(panel)
+            records += self.ledger.rising(
+                history_triggered[['symbol', 'description', 'value', 'threshold', 'rule_id']].to_dict('records'),
+                panel["Close"].columns, scope="history"
+            )
+
+        indicator_triggered = pd.DataFrame(columns=INDICATOR_TRIGGER_COLUMNS)
+        if len(indicator_rules):
+            try:
+                latest = self.fetch_indicators(indicator_rules.requirements())
+            except Exception as e:
+                print(f"Error: Failed to compute indicators - {str(e)}")
+                latest = {}
+            indicator_triggered = indicator_rules.evaluate(latest)
+            records += self.ledger.rising(
+                indicator_triggered[['symbol', 'indicator', 'label', 'value', 'operator', 'threshold', 'rule_id']].to_dict('records'),
+                latest, scope="indicators"
+            )
+
+        batches = self.ledger.due(email_list, records, scope=ALERT_SCOPE)
+        for recipients, alerts in group_by_alerts(batches):
+            self.notify(recipients, alerts)
+
+        return {
+            "symbols": len(symbols),
+            "symbols_priced": int(fetched),
+            "rules": len(rule_set) + len(history_rules) + len(indicator_rules),
+            "triggered": len(triggered) + len(history_triggered) + len(indicator_triggered),
+            "new_triggers": len(records),
+            "emails_due": len(batches),
+            "latency_seconds": time.perf_counter() - started,
+        }
+
+    def run_forever(self, interval: float = DEFAULT_INTERVAL_SECONDS, metrics_path: str = None):
+        """
+        Run cycles until interrupted, starting each one on a fixed interval
+        With metrics_path, span timings are rewritten there as Prometheus text after every cycle
+        """
+        while True:
+            cycle_start = time.monotonic()
+            try:
+                stats = self.run_cycle()
+                print(
+                    f"Cycle: {stats['symbols_priced']}/{stats['symbols']} symbols, "
+                    f"{stats['rules']} rules, {stats['triggered']} triggered "
+                    f"({stats['new_triggers']} new) in {stats['latency_seconds']:.2f}s"
+                )
+            except Exception as e:
+                print(f"Error: Monitor cycle failed - {str(e)}")
+            if metrics_path:
+                try:
+                    tracer.write_prometheus(metrics_path)
+                except OSError as e:
+                    print(f"Warning: Could not write metrics to {metrics_path} - {str(e)}")
+            time.sleep(max(0.0, interval - (time.monotonic() - cycle_start)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor stock rules and send email alerts")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="Path to the rules/recipients JSON file")
+    parser.add_argument("--db", help="Read rules and recipients from the app's SQLite database instead of --config")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_SECONDS, help="Seconds between cycles")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Symbols per price request")
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+    parser.add_argument("--cooldown", type=float, default=DEFAULT_COOLDOWN_SECONDS,
+                        help="Seconds before the same rule alerts the same recipient again")
+    parser.add_argument("--digest-seconds", type=float, default=0,
+                        help="Coalesce alerts into one email per recipient over this many seconds")
+    parser.add_argument("--metrics-file",
+                        help="Write span timings here as Prometheus text after every cycle")
+    args = parser.parse_args()
+
+    # The ledger is persisted, so restarts neither repeat alerts nor forget cooldowns
+    ledger = NotificationLedger(cooldown_seconds=args.cooldown)
+    notify = None
+    mail_queue = None
+    if args.digest_seconds > 0:
+        mail_queue = MailQueue(digest_seconds=args.digest_seconds, on_failure=functools.partial(ledger.release, scope=ALERT_SCOPE))
+        notify = mail_queue.submit
+
+    load = None
+    if args.db:
+        repository = Repository(args.db)
+        load = lambda: (repository.list_rules(), repository.list_emails())
+
+    monitor = AlertMonitor(args.config, batch_size=args.batch_size, notify=notify, ledger=ledger, load=load)
+    if args.once:
+        print(json.dumps(monitor.run_cycle(), indent=2))
+        if mail_queue is not None:
+            mail_queue.join()
+    else:
+        monitor.run_forever(args.interval, metrics_path=args.metrics_file)
+
+
+if __name__ == "__main__":
+    main()
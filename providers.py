@@ -0,0 +1,238 @@
+import json
+import os
+import zlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from history_store import DEFAULT_STORE_DIR, PERIOD_OFFSETS
+
+MARKET_TIMEZONE = "America/New_York"
+SYNTHETIC_START = "2000-01-03"
+INTERVAL_MINUTES = {"1m": 1, "5m": 5, "15m": 15, "30m": 30, "1h": 60}
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of price history, quotes and fundamentals behind utils.
+
+    Implementations return frames shaped like yfinance output: a
+    tz-aware DatetimeIndex with Open/High/Low/Close/Volume columns.
+    ``name`` keeps each provider's stored data apart on disk.
+    """
+    name = None
+
+    @abstractmethod
+    def history(self, symbol: str, period: str = None, start=None, end=None, interval: str = "1d") -> pd.DataFrame:
+        """
+        Return bars for a period, or from start up to an exclusive end
+        """
+
+    @abstractmethod
+    def info(self, symbol: str) -> dict:
+        """
+        Return the fundamentals blob for a symbol
+        """
+
+    def recent_closes(self, symbols: list, lookback: str = "5d") -> pd.DataFrame:
+        """
+        Return daily closes for several symbols, one column per symbol
+        """
+        closes = {}
+        for symbol in symbols:
+            hist = self.history(symbol, period=lookback)
+            if hist is not None and not hist.empty:
+                closes[symbol] = hist["Close"]
+        return pd.DataFrame(closes, columns=list(symbols))
+
+
+class YahooProvider(MarketDataProvider):
+    """
+    Live data from Yahoo Finance
+    """
+    name = "yahoo"
+
+    def history(self, symbol: str, period: str = None, start=None, end=None, interval: str = "1d") -> pd.DataFrame:
+        stock = yf.Ticker(symbol)
+        if start is not None:
+            return stock.history(start=start, end=end, interval=interval)
+        return stock.history(period=period, interval=interval)
+
+    def info(self, symbol: str) -> dict:
+        return yf.Ticker(symbol).info
+
+    def recent_closes(self, symbols: list, lookback: str = "5d") -> pd.DataFrame:
+        symbols = list(symbols)
+        data = yf.download(
+            symbols,
+            period=lookback,
+            auto_adjust=True,
+            progress=False,
+            threads=True
+        )
+        if data is None or data.empty:
+            return pd.DataFrame(columns=symbols, dtype=float)
+
+        close = data["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(symbols[0])
+        return close
+
+
+class LocalProvider(MarketDataProvider):
+    """
+    Deterministic offline data for tests and benchmarks.
+
+    If ``root`` contains a recorded ``<SYMBOL>.parquet`` or ``<SYMBOL>.csv``
+    (and optionally ``<SYMBOL>.json`` fundamentals), that recording is
+    replayed. Otherwise a synthetic daily random walk is generated from
+    a seed derived from the symbol, so the same symbol always produces the
+    same bars for the same dates.
+    """
+    name = "local"
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else None
+
+    def _recorded(self, symbol: str):
+        if self.root is None:
+            return None
+        parquet_path = self.root / f"{symbol}.parquet"
+        if parquet_path.exists():
+            return pd.read_parquet(parquet_path)
+        csv_path = self.root / f"{symbol}.csv"
+        if csv_path.exists():
+            hist = pd.read_csv(csv_path, index_col=0)
+            hist.index = pd.to_datetime(hist.index, utc=True).tz_convert(MARKET_TIMEZONE)
+            return hist
+        return None
+
+    def _bars(self, symbol: str) -> pd.DataFrame:
+        recorded = self._recorded(symbol)
+        if recorded is not None:
+            return recorded
+        return synthetic_history(symbol, pd.Timestamp.now(tz=MARKET_TIMEZONE).normalize())
+
+    def history(self, symbol: str, period: str = None, start=None, end=None, interval: str = "1d") -> pd.DataFrame:
+        symbol = symbol.upper()
+        bars = self._bars(symbol)
+        cutoff = pd.Timestamp(start) if start is not None else pd.Timestamp.now(tz="UTC") - PERIOD_OFFSETS[period]
+        cutoff = cutoff.tz_localize(bars.index.tz) if cutoff.tzinfo is None else cutoff.tz_convert(bars.index.tz)
+        in_range = bars.index >= cutoff.normalize() if interval != "1d" else bars.index >= cutoff
+        if end is not None:
+            end = pd.Timestamp(end)
+            end = end.tz_localize(bars.index.tz) if end.tzinfo is None else end.tz_convert(bars.index.tz)
+            in_range &= bars.index < end
+        daily = bars[in_range]
+        if interval == "1d":
+            return daily
+
+        sessions = [synthetic_session(symbol, interval, day, row.Open) for day, row in zip(daily.index, daily.itertuples())]
+        if not sessions:
+            return pd.DataFrame(columns=list(daily.columns))
+        intraday = pd.concat(sessions)
+        keep = intraday.index >= cutoff
+        if end is not None:
+            keep &= intraday.index < end
+        return intraday[keep]
+
+    def info(self, symbol: str) -> dict:
+        symbol = symbol.upper()
+        if self.root is not None and (self.root / f"{symbol}.json").exists():
+            with open(self.root / f"{symbol}.json") as f:
+                return json.load(f)
+
+        bars = self._bars(symbol)
+        rng = np.random.default_rng(_seed(symbol) + 1)
+        last_year = bars["Close"].iloc[-252:]
+        return {
+            "longName": f"{symbol} (synthetic)",
+            "marketCap": float(rng.uniform(1e9, 2e12)),
+            "trailingPE": float(rng.uniform(5, 60)),
+            "fiftyTwoWeekHigh": float(last_year.max()),
+            "fiftyTwoWeekLow": float(last_year.min()),
+            "volume": int(bars["Volume"].iloc[-1]),
+            "averageVolume": int(bars["Volume"].iloc[-63:].mean()),
+            "dividendYield": float(rng.uniform(0, 0.05)),
+            "currentPrice": float(bars["Close"].iloc[-1]),
+        }
+
+
+def _seed(symbol: str) -> int:
+    return zlib.crc32(symbol.encode())
+
+
+@lru_cache(maxsize=8)
+def _business_days(end: pd.Timestamp) -> pd.DatetimeIndex:
+    # Building a business-day range is slow, so every symbol shares one index
+    return pd.bdate_range(SYNTHETIC_START, end.tz_localize(None), tz=MARKET_TIMEZONE, name="Date")
+
+
+@lru_cache(maxsize=512)
+def synthetic_history(symbol: str, end: pd.Timestamp) -> pd.DataFrame:
+    """
+    Generate a reproducible business-day OHLCV random walk up to ``end``
+    """
+    index = _business_days(end)
+    n = len(index)
+    # One stream per column so each series is a stable prefix as ``end`` moves forward
+    seed = _seed(symbol)
+    base_rng, return_rng, open_rng, high_rng, low_rng, volume_rng = (
+        np.random.default_rng([seed, stream]) for stream in range(6)
+    )
+
+    close = base_rng.uniform(20, 400) * np.exp(np.cumsum(return_rng.normal(0.0003, 0.015, n)))
+    open_ = close * np.exp(open_rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * np.exp(np.abs(high_rng.normal(0, 0.006, n)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(low_rng.normal(0, 0.006, n)))
+    volume = volume_rng.lognormal(15, 0.5, n).astype(np.int64)
+
+    return pd.DataFrame({
+        "Open": open_,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Volume": volume,
+    }, index=index)
+
+
+def synthetic_session(symbol: str, interval: str, day: pd.Timestamp, open_price: float) -> pd.DataFrame:
+    """
+    Generate one regular trading session of intraday bars starting from a daily open
+    """
+    minutes = INTERVAL_MINUTES[interval]
+    n = -(-390 // minutes)
+    index = day + pd.Timedelta(hours=9, minutes=30) + pd.to_timedelta(np.arange(n) * minutes, unit="min")
+    rng = np.random.default_rng([_seed(symbol), day.toordinal(), minutes])
+
+    close = open_price * np.exp(np.cumsum(rng.normal(0, 0.001 * np.sqrt(minutes), n)))
+    open_ = np.concatenate([[open_price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005 * np.sqrt(minutes), n))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + spread),
+        "Low": np.minimum(open_, close) * (1 - spread),
+        "Close": close,
+        "Volume": rng.lognormal(10, 0.5, n).astype(np.int64) * minutes,
+    }, index=index.rename("Datetime"))
+
+
+def provider_store_dir(provider: MarketDataProvider, root=DEFAULT_STORE_DIR) -> str:
+    """
+    Directory for a provider's stored history and fundamentals, so data from one never mixes into another's
+    """
+    return os.path.join(root, provider.name)
+
+
+def provider_from_env() -> MarketDataProvider:
+    """
+    Pick the provider named by STOCK_DATA_PROVIDER ("yahoo" or "local")
+    """
+    name = os.getenv("STOCK_DATA_PROVIDER", "yahoo").lower()
+    if name == "local":
+        return LocalProvider(os.getenv("STOCK_DATA_FIXTURES"))
+    return YahooProvider()
@@ -0,0 +1,333 @@
+"""
+SQLite storage for rules, email recipients and simulation entries
+
+Shared by every browser session and by the monitor, so lists survive
+refreshes and restarts. Writes are batched into one transaction, and
+rules and recipients can be bulk imported from and exported to CSV:
+
+    python -m repository import-rules rules.csv
+    python -m repository export-emails emails.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from history_store import DEFAULT_STORE_DIR
+from rules import rule_direction, rule_kind, rule_window
+
+DEFAULT_DB_PATH = os.getenv("STOCK_DB_PATH", os.path.join(DEFAULT_STORE_DIR, "stock_app.db"))
+DEFAULT_BATCH_ROWS = 1000
+DEFAULT_PAGE_SIZE = 20
+
+# CSV columns for rules; params holds indicator parameters as JSON
+RULE_CSV_COLUMNS = ["id", "symbol", "percentage", "direction", "window", "price", "volume_multiple",
+                    "indicator", "params", "operator", "value"]
+_NUMERIC_RULE_FIELDS = ("percentage", "price", "volume_multiple", "value")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rules (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    symbol TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rules_symbol ON rules (symbol);
+
+CREATE TABLE IF NOT EXISTS emails (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    address TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS simulation_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    price REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS simulation_entries_symbol ON simulation_entries (symbol);
+"""
+
+
+def is_valid_email(address: str) -> bool:
+    return '@' in address and '.' in address  # Basic email validation
+
+
+def normalize_rule(rule: dict) -> dict:
+    """
+    Validate a rule and fill in its id and upper-cased symbol
+    Raises ValueError for rules that cannot be evaluated
+    """
+    rule = {key: value for key, value in rule.items() if value is not None and value != ""}
+    if not rule.get('symbol'):
+        raise ValueError("Rule has no symbol")
+    rule['symbol'] = str(rule['symbol']).strip().upper()
+    rule['id'] = str(rule.get('id') or uuid.uuid4())
+    kind = rule_kind(rule)
+    if kind == "percentage" and 'percentage' not in rule:
+        raise ValueError(f"Rule {rule['id']} has no condition")
+    if kind == "indicator" and not {'operator', 'value'} <= set(rule):
+        raise ValueError(f"Indicator rule {rule['id']} needs an operator and a value")
+    if kind != "indicator":
+        rule_direction(rule)
+        rule_window(rule)
+    return rule
+
+
+def _rule_from_csv_row(row: dict) -> dict:
+    rule = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items() if key in RULE_CSV_COLUMNS}
+    for field in _NUMERIC_RULE_FIELDS:
+        if rule.get(field):
+            rule[field] = float(rule[field])
+    if rule.get('params'):
+        rule['params'] = json.loads(rule['params'])
+    return normalize_rule(rule)
+
+
+def _like_escape(text: str) -> str:
+    # Match %, _ and \ literally in a LIKE pattern that ends with ESCAPE '\'
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Repository:
+    """
+    Rules, email recipients and simulation entries in one SQLite file.
+
+    List order is insertion order, so rules keep the order they were
+    added in. A single connection is shared behind a lock; WAL mode lets
+    other processes such as the monitor read while the app writes.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.path = str(path)
+        self.batch_rows = batch_rows
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write_many(self, sql: str, rows) -> int:
+        """
+        Run a statement for every row, one transaction per batch
+        Returns: number of rows changed
+        """
+        changed = 0
+        for batch in _batches(rows, self.batch_rows):
+            with self._lock, self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany(sql, batch)
+                changed += self._conn.total_changes - before
+        return changed
+
+    @staticmethod
+    def _page(limit, offset) -> str:
+        return f" LIMIT {int(limit)} OFFSET {int(offset)}" if limit is not None else ""
+
+    # Rules
+
+    def add_rules(self, rules) -> int:
+        """
+        Insert rules, replacing any with the same id
+        Returns: number of rules written
+        """
+        now = time.time()
+        rows = (
+            (rule['id'], rule['symbol'], rule_kind(rule), json.dumps(rule), now)
+            for rule in map(normalize_rule, rules)
+        )
+        return self._write_many(
+            "INSERT INTO rules (id, symbol, kind, spec, created_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET symbol = excluded.symbol, kind = excluded.kind, spec = excluded.spec",
+            rows
+        )
+
+    @staticmethod
+    def _symbol_filter(symbol: str = None, search: str = None) -> tuple:
+        # An exact symbol, or symbols starting with the search text
+        if symbol:
+            return "WHERE symbol = ?", (symbol.strip().upper(),)
+        if search:
+            return "WHERE symbol LIKE ? ESCAPE '\\'", (f"{_like_escape(search.strip().upper())}%",)
+        return "", ()
+
+    def list_rules(self, symbol: str = None, limit: int = None, offset: int = 0, search: str = None) -> list:
+        """
+        Rules in the order they were added, optionally for one symbol, a symbol prefix or one page
+        """
+        where, params = self._symbol_filter(symbol, search)
+        rows = self._query(f"SELECT spec FROM rules {where} ORDER BY seq{self._page(limit, offset)}", params)
+        return [json.loads(row['spec']) for row in rows]
+
+    def count_rules(self, symbol: str = None, search: str = None) -> int:
+        where, params = self._symbol_filter(symbol, search)
+        return self._query(f"SELECT COUNT(*) FROM rules {where}", params)[0][0]
+
+    def rule_symbols(self) -> list:
+        return [row[0] for row in self._query("SELECT DISTINCT symbol FROM rules ORDER BY symbol")]
+
+    def delete_rules(self, rule_ids) -> int:
+        return self._write_many("DELETE FROM rules WHERE id = ?", ((str(rule_id),) for rule_id in rule_ids))
+
+    def import_rules_csv(self, text_file) -> int:
+        """
+        Bulk load rules from CSV with RULE_CSV_COLUMNS headers, streaming row batches
+        Rows that do not make a valid rule are skipped with a warning
+        Returns: number of rules written
+        """
+        def valid_rules():
+            reader = csv.DictReader(text_file)
+            for row in reader:
+                try:
+                    yield _rule_from_csv_row(row)
+                except (ValueError, json.JSONDecodeError) as e:
+                    print(f"Warning: Skipping rule on CSV line {reader.line_num} - {str(e)}")
+        return self.add_rules(valid_rules())
+
+    def export_rules_csv(self, text_file):
+        writer = csv.DictWriter(text_file, fieldnames=RULE_CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        offset = 0
+        while True:
+            page = self.list_rules(limit=self.batch_rows, offset=offset)
+            if not page:
+                break
+            for rule in page:
+                row = dict(rule)
+                if 'params' in row:
+                    row['params'] = json.dumps(row['params'])
+                writer.writerow(row)
+            offset += len(page)
+
+    # Email recipients
+
+    def add_emails(self, addresses) -> int:
+        """
+        Insert recipients, skipping invalid addresses and ones already listed
+        Returns: number of recipients added
+        """
+        now = time.time()
+        rows = ((address.strip(), now) for address in addresses if is_valid_email(address.strip()))
+        return self._write_many("INSERT OR IGNORE INTO emails (address, created_at) VALUES (?, ?)", rows)
+
+    @staticmethod
+    def _email_filter(search: str = None) -> tuple:
+        # Addresses containing the search text
+        if search:
+            return "WHERE address LIKE ? ESCAPE '\\'", (f"%{_like_escape(search)}%",)
+        return "", ()
+
+    def list_emails(self, search: str = None, limit: int = None, offset: int = 0) -> list:
+        where, params = self._email_filter(search)
+        rows = self._query(f"SELECT address FROM emails {where} ORDER BY seq{self._page(limit, offset)}", params)
+        return [row['address'] for row in rows]
+
+    def count_emails(self, search: str = None) -> int:
+        where, params = self._email_filter(search)
+        return self._query(f"SELECT COUNT(*) FROM emails {where}", params)[0][0]
+
+    def delete_emails(self, addresses) -> int:
+        return self._write_many("DELETE FROM emails WHERE address = ?", ((address,) for address in addresses))
+
+    def import_emails_csv(self, text_file) -> int:
+        """
+        Bulk load recipients from CSV, one address in the first column (an "email" header is skipped)
+        Returns: number of recipients added
+        """
+        rows = (row[0] for row in csv.reader(text_file) if row and row[0].strip().lower() != "email")
+        return self.add_emails(rows)
+
+    def export_emails_csv(self, text_file):
+        writer = csv.writer(text_file)
+        writer.writerow(["email"])
+        for address in self.list_emails():
+            writer.writerow([address])
+
+    # Simulation entries
+
+    def add_simulation_entries(self, entries) -> int:
+        now = time.time()
+        rows = ((str(entry['symbol']).strip().upper(), float(entry['price']), now) for entry in entries)
+        return self._write_many("INSERT INTO simulation_entries (symbol, price, created_at) VALUES (?, ?, ?)", rows)
+
+    def list_simulation_entries(self, limit: int = None, offset: int = 0, search: str = None) -> list:
+        where, params = self._symbol_filter(search=search)
+        rows = self._query(
+            f"SELECT id, symbol, price FROM simulation_entries {where} ORDER BY id{self._page(limit, offset)}", params
+        )
+        return [dict(row) for row in rows]
+
+    def count_simulation_entries(self, search: str = None) -> int:
+        where, params = self._symbol_filter(search=search)
+        return self._query(f"SELECT COUNT(*) FROM simulation_entries {where}", params)[0][0]
+
+    def update_simulation_entries(self, entries) -> int:
+        """
+        Change the symbol and/or price of existing entries, matched on id
+        Returns: number of entries changed
+        """
+        rows = (
+            ((entry.get('symbol') or '').strip().upper() or None, entry.get('price'), int(entry['id']))
+            for entry in entries
+        )
+        return self._write_many(
+            "UPDATE simulation_entries SET symbol = COALESCE(?, symbol), price = COALESCE(?, price) WHERE id = ?",
+            rows
+        )
+
+    def delete_simulation_entries(self, entry_ids) -> int:
+        return self._write_many("DELETE FROM simulation_entries WHERE id = ?", ((int(entry_id),) for entry_id in entry_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import or export rules and recipients")
+    parser.add_argument("action", choices=["import-rules", "export-rules", "import-emails", "export-emails"])
+    parser.add_argument("path", help="CSV file to read or write")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path")
+    args = parser.parse_args()
+
+    repository = Repository(args.db)
+    if args.action.startswith("import"):
+        with open(args.path, newline="") as f:
+            count = repository.import_rules_csv(f) if args.action == "import-rules" else repository.import_emails_csv(f)
+        print(f"Imported {count} rows from {args.path}")
+    else:
+        with open(args.path, "w", newline="") as f:
+            if args.action == "export-rules":
+                repository.export_rules_csv(f)
+            else:
+                repository.export_emails_csv(f)
+        print(f"Wrote {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from indicators import indicator_label, resolve_params
+
+TRIGGER_COLUMNS = ["position", "symbol", "price_change_pct", "threshold", "rule_id", "rule_order"]
+INDICATOR_TRIGGER_COLUMNS = ["symbol", "indicator", "label", "column", "operator", "value", "threshold", "rule_id", "rule_order"]
+HISTORY_TRIGGER_COLUMNS = ["symbol", "description", "value", "threshold", "rule_id", "rule_order"]
+
+INDICATOR_OPERATORS = {
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+}
+
+DIRECTIONS = ("up", "down", "both")
+DEFAULT_WINDOW = "1d"
+DEFAULT_VOLUME_WINDOW = "20d"
+PANEL_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+_BAR_WINDOW = re.compile(r"^(\d+)d$")
+
+
+def is_indicator_rule(rule: dict) -> bool:
+    return rule.get('indicator') is not None
+
+
+def rule_kind(rule: dict) -> str:
+    """
+    Returns: str - "indicator", "price", "volume" or "percentage"
+    """
+    if is_indicator_rule(rule):
+        return "indicator"
+    if rule.get('price') is not None:
+        return "price"
+    if rule.get('volume_multiple') is not None:
+        return "volume"
+    return "percentage"
+
+
+def rule_direction(rule: dict) -> str:
+    """
+    Explicit direction, or one inferred from the rule: a percentage rule
+    follows its threshold's sign and a price level fires on a cross
+    """
+    direction = rule.get('direction')
+    if direction is not None:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown rule direction: {direction}")
+        return direction
+    if rule_kind(rule) == "percentage":
+        percentage = float(rule['percentage'])
+        return "up" if percentage > 0 else "down" if percentage < 0 else "both"
+    return "both" if rule_kind(rule) == "price" else "up"
+
+
+def rule_window(rule: dict) -> str:
+    """
+    Lookback window: "<N>d" for N bars back, "open" for since the session
+    open, or "intraday" for the session's extreme move from the open
+    """
+    window = rule.get('window') or (DEFAULT_VOLUME_WINDOW if rule_kind(rule) == "volume" else DEFAULT_WINDOW)
+    if window not in ("open", "intraday") and not _BAR_WINDOW.match(window):
+        raise ValueError(f"Unknown rule window: {window}")
+    return window
+
+
+def window_bars(window: str) -> int:
+    """
+    Number of bars a "<N>d" window looks back, or 0 for session windows
+    """
+    match = _BAR_WINDOW.match(window)
+    return int(match.group(1)) if match else 0
+
+
+def is_snapshot_rule(rule: dict) -> bool:
+    """
+    Whether a rule can be checked against a single move from the previous close
+    """
+    return rule_kind(rule) == "percentage" and rule_window(rule) == DEFAULT_WINDOW
+
+
+def describe_window(window: str) -> str:
+    if window == "open":
+        return "since open"
+    if window == "intraday":
+        return "intraday"
+    bars = window_bars(window)
+    return "1 day" if bars == 1 else f"{bars} days"
+
+
+def describe_rule(rule: dict) -> str:
+    """
+    One-line description of a rule for display
+    """
+    kind = rule_kind(rule)
+    if kind == "indicator":
+        return f"{indicator_label(rule['indicator'], rule.get('params'))} {rule['operator']} {rule['value']}"
+    direction = rule_direction(rule)
+    if kind == "price":
+        condition = {"up": "at or above", "down": "at or below", "both": "crosses"}[direction]
+        return f"Price {condition} ${float(rule['price']):.2f}"
+    if kind == "volume":
+        return f"Volume >= {rule['volume_multiple']}x {window_bars(rule_window(rule))}-day average"
+    return f"Percentage: {rule['percentage']}% ({direction}, {describe_window(rule_window(rule))})"
+
+
+def _squash(values):
+    """
+    Map non-negative values monotonically into [0, 1) so they can sit
+    after an integer symbol code in a single sorted key
+    """
+    return values / (1.0 + values)
+
+
+class _ThresholdIndex:
+    """
+    Rules of one direction, keyed as ``symbol_code + squash(|threshold|)``
+    in one sorted array
+    """
+
+    def __init__(self, codes, thresholds, rule_order, rule_ids, symbol_count: int):
+        keys = codes + _squash(np.abs(thresholds))
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self.thresholds = thresholds[order]
+        self.rule_order = rule_order[order]
+        self.rule_ids = rule_ids[order]
+        # First position of each symbol's segment in the sorted arrays
+        self._segment_starts = np.searchsorted(self._keys, np.arange(symbol_count, dtype=np.float64), side="left")
+
+    def match(self, codes, magnitudes, valid) -> tuple:
+        """
+        Every rule in a symbol's segment whose threshold is at or below the move
+        Returns: (ndarray, ndarray) - (input positions, positions in the sorted arrays)
+        """
+        safe_codes = np.where(valid, codes, 0)
+        queries = safe_codes + _squash(np.where(valid, magnitudes, 0.0))
+        starts = self._segment_starts[safe_codes]
+        ends = np.searchsorted(self._keys, queries, side="right")
+        counts = np.where(valid, ends - starts, 0)
+
+        # Expand each input into one row per triggered rule without a Python loop
+        positions = np.repeat(np.arange(len(codes)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return positions, np.repeat(starts, counts) + offsets
+
+
+class RuleSet:
+    """
+    Percentage rules compiled for batched evaluation against single moves
+    from the previous close.
+
+    Rules are split by direction and grouped by symbol, with their absolute
+    thresholds kept in one sorted array per direction. A batch of
+    (symbol, pct_change) pairs is then matched with one ``np.searchsorted``
+    per direction: an "up" rule fires on a rise of at least its threshold,
+    a "down" rule on a fall of at least its threshold, and a "both" rule on
+    either. Rules with other windows or kinds are left to HistoryRuleSet
+    and IndicatorRuleSet.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = [rule for rule in rules if is_snapshot_rule(rule)]
+        symbols = pd.Index(sorted({rule['symbol'] for rule in self.rules}))
+        self.symbols = symbols
+
+        codes = symbols.get_indexer([rule['symbol'] for rule in self.rules]).astype(np.float64)
+        thresholds = np.array([float(rule['percentage']) for rule in self.rules], dtype=np.float64)
+        directions = np.array([rule_direction(rule) for rule in self.rules], dtype=object)
+        rule_ids = np.array([rule.get('id') for rule in self.rules], dtype=object)
+        rule_order = np.arange(len(self.rules))
+
+        self._indexes = {}
+        for direction in DIRECTIONS:
+            mask = directions == direction
+            if mask.any():
+                self._indexes[direction] = _ThresholdIndex(
+                    codes[mask], thresholds[mask], rule_order[mask], rule_ids[mask], len(symbols)
+                )
+
+    def __len__(self):
+        return len(self.rules)
+
+    def evaluate(self, symbols, pct_changes) -> pd.DataFrame:
+        """
+        Evaluate a batch of price moves against every rule
+        Returns: DataFrame with one row per triggered rule, ordered by input position
+        """
+        symbols = np.asarray(symbols, dtype=object)
+        pct_changes = np.asarray(pct_changes, dtype=np.float64)
+        if len(self.rules) == 0 or len(symbols) == 0:
+            return pd.DataFrame(columns=TRIGGER_COLUMNS)
+
+        codes = self.symbols.get_indexer(symbols)
+        valid = (codes >= 0) & np.isfinite(pct_changes)
+        magnitudes = {"up": pct_changes, "down": -pct_changes, "both": np.abs(pct_changes)}
+
+        positions, thresholds, rule_ids, rule_order = [], [], [], []
+        for direction, index in self._indexes.items():
+            moved = valid & (magnitudes[direction] >= 0)
+            matched, rule_positions = index.match(codes, magnitudes[direction], moved)
+            positions.append(matched)
+            thresholds.append(index.thresholds[rule_positions])
+            rule_ids.append(index.rule_ids[rule_positions])
+            rule_order.append(index.rule_order[rule_positions])
+
+        positions, thresholds = np.concatenate(positions), np.concatenate(thresholds)
+        rule_ids, rule_order = np.concatenate(rule_ids), np.concatenate(rule_order)
+        order = np.lexsort((rule_order, np.abs(thresholds), positions))
+
+        return pd.DataFrame({
+            "position": positions[order],
+            "symbol": symbols[positions[order]],
+            "price_change_pct": pct_changes[positions[order]],
+            "threshold": thresholds[order],
+            "rule_id": rule_ids[order],
+            "rule_order": rule_order[order],
+        }, columns=TRIGGER_COLUMNS)
+
+
+def compare_metric(kind: str, direction: str, values, thresholds, previous=None):
+    """
+    Whether rules of one kind and direction fire on their metric values
+    previous holds the prior values a "both" price rule needs to detect a cross
+    Returns: boolean ndarray shaped like values
+    """
+    with np.errstate(invalid="ignore"):
+        if kind == "price" and direction == "both":
+            above, was_above = values >= thresholds, previous >= thresholds
+            return np.isfinite(previous) & np.isfinite(values) & (above != was_above)
+        if kind == "price":
+            return values >= thresholds if direction == "up" else values <= thresholds
+        if kind == "volume":
+            return values >= thresholds
+        if direction == "up":
+            return values >= np.abs(thresholds)
+        if direction == "down":
+            return values <= -np.abs(thresholds)
+        return np.abs(values) >= np.abs(thresholds)
+
+
+def session_dates(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    # Daily bars from different exchanges line up on their local trading date
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def build_panel(histories: dict) -> dict:
+    """
+    Align daily histories for many symbols on one date index
+    histories: dict of symbol -> OHLCV DataFrame
+    Returns: dict of field -> DataFrame (dates x symbols)
+    """
+    frames = {
+        symbol: hist.set_axis(session_dates(hist.index))
+        for symbol, hist in sorted(histories.items())
+        if hist is not None and not hist.empty
+    }
+    panel = {}
+    for field in PANEL_FIELDS:
+        panel[field] = pd.DataFrame(
+            {symbol: hist[field].astype(np.float64) for symbol, hist in frames.items()},
+            columns=list(frames)
+        ).sort_index()
+    return panel
+
+
+class HistoryRuleSet:
+    """
+    Percentage, price-level and volume-spike rules evaluated over aligned
+    price history for many symbols at once.
+
+    Rules that share a kind, window and direction form one group. Each
+    group's metric (a windowed move, the close, or volume over its
+    trailing average) is computed once as a (dates x symbols) matrix, and
+    the group's rules are checked together by gathering their symbols'
+    columns and comparing against their thresholds in one broadcast.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = [rule for rule in rules if not is_indicator_rule(rule)]
+        self.kinds = [rule_kind(rule) for rule in self.rules]
+        self.windows = [rule_window(rule) for rule in self.rules]
+        self.directions = [rule_direction(rule) for rule in self.rules]
+        self.thresholds = np.array([
+            float(rule['price'] if kind == "price" else rule['volume_multiple'] if kind == "volume" else rule['percentage'])
+            for rule, kind in zip(self.rules, self.kinds)
+        ], dtype=np.float64)
+
+        groups = {}
+        for position, key in enumerate(zip(self.kinds, self.windows, self.directions)):
+            groups.setdefault(key, []).append(position)
+        self._groups = {key: np.array(positions) for key, positions in groups.items()}
+
+    def __len__(self):
+        return len(self.rules)
+
+    def lookback_bars(self) -> int:
+        """
+        Bars of history needed before the first bar every rule can be evaluated on
+        """
+        return max((window_bars(window) for window in self.windows), default=0) + 1
+
+    def _metric(self, panel: dict, kind: str, window: str, direction: str) -> pd.DataFrame:
+        close = panel["Close"]
+        if kind == "price":
+            return close
+        if kind == "volume":
+            volume = panel["Volume"]
+            bars = window_bars(window)
+            return volume / volume.rolling(bars, min_periods=bars).mean().shift(1)
+        if window == "open":
+            return (close / panel["Open"] - 1) * 100
+        if window == "intraday":
+            rise = (panel["High"] / panel["Open"] - 1) * 100
+            fall = (panel["Low"] / panel["Open"] - 1) * 100
+            return {"up": rise, "down": fall}.get(direction, np.maximum(rise, -fall))
+        # Compare against the close N bars back, skipping dates the symbol did not trade
+        return (close / close.ffill().shift(window_bars(window)) - 1) * 100
+
+    def evaluate(self, panel: dict) -> tuple:
+        """
+        Check every rule on every date of a panel
+        Returns: (ndarray, ndarray) - (dates x rules fire matrix, dates x rules metric values)
+        """
+        dates = panel["Close"].index
+        fires = np.zeros((len(dates), len(self.rules)), dtype=bool)
+        values = np.full((len(dates), len(self.rules)), np.nan)
+        symbols = panel["Close"].columns
+
+        for (kind, window, direction), positions in self._groups.items():
+            metric = self._metric(panel, kind, window, direction).to_numpy(dtype=np.float64)
+            # Rules on symbols missing from the panel read an all-NaN column
+            metric = np.hstack([metric, np.full((len(dates), 1), np.nan)])
+            codes = symbols.get_indexer([self.rules[i]['symbol'] for i in positions])
+            gathered = metric[:, np.where(codes >= 0, codes, metric.shape[1] - 1)]
+            thresholds = self.thresholds[positions]
+
+            previous = None
+            if kind == "price" and direction == "both":
+                previous = np.vstack([np.full((1, len(positions)), np.nan), gathered[:-1]])
+            fired = compare_metric(kind, direction, gathered, thresholds, previous)
+
+            fires[:, positions] = fired
+            values[:, positions] = gathered
+        return fires, values
+
+    def evaluate_scenarios(self, panel: dict, prices) -> np.ndarray:
+        """
+        Check every rule against hypothetical next closes, one column per scenario
+        prices: (symbols x scenarios) array of next closes, rows in panel["Close"] column order
+        Volume rules never fire, and "open" and "intraday" windows take the session to open at the last close
+        Returns: ndarray - (rules x scenarios) fire matrix
+        """
+        return self._scenario_metrics(panel, prices)[0]
+
+    def _scenario_metrics(self, panel: dict, prices) -> tuple:
+        # (rules x scenarios) fire matrix and the metric each rule compared
+        close = panel["Close"].ffill().to_numpy(dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        fires = np.zeros((len(self.rules), prices.shape[1]), dtype=bool)
+        values = np.full(fires.shape, np.nan)
+        if not self.rules or len(close) == 0:
+            return fires, values
+
+        # Rules on symbols missing from the panel read an all-NaN row
+        prices = np.vstack([prices, np.full((1, prices.shape[1]), np.nan)])
+        close = np.hstack([close, np.full((len(close), 1), np.nan)])
+        last = close[-1]
+        symbols = panel["Close"].columns
+
+        for (kind, window, direction), positions in self._groups.items():
+            if kind == "volume":
+                continue
+            codes = symbols.get_indexer([self.rules[i]['symbol'] for i in positions])
+            codes = np.where(codes >= 0, codes, close.shape[1] - 1)
+            gathered = prices[codes]
+            previous = None
+            if kind == "price":
+                if direction == "both":
+                    previous = np.broadcast_to(last[codes][:, None], gathered.shape)
+            else:
+                bars = window_bars(window)
+                reference = close[-bars] if 0 < bars <= len(close) else last if bars == 0 else np.full_like(last, np.nan)
+                # Rounded so that a shock landing exactly on a threshold fires it
+                gathered = np.round((gathered / reference[codes][:, None] - 1) * 100, 9)
+            thresholds = self.thresholds[positions][:, None]
+            fires[positions] = compare_metric(kind, direction, gathered, thresholds, previous)
+            values[positions] = gathered
+        return fires, values
+
+    def evaluate_entries(self, panel: dict, symbols, prices) -> pd.DataFrame:
+        """
+        Rules fired by hypothetical next closes of single symbols, e.g. simulated prices
+        Each (symbol, price) pair is its own scenario, so it only moves its own symbol's rules
+        Returns: DataFrame with the pair's position and one row per triggered rule
+        """
+        symbols = np.asarray(symbols, dtype=object)
+        columns = panel["Close"].columns
+        rows = columns.get_indexer(symbols)
+        known = np.flatnonzero(rows >= 0)
+        scenario_prices = np.full((len(columns), len(symbols)), np.nan)
+        scenario_prices[rows[known], known] = np.asarray(prices, dtype=np.float64)[known]
+
+        fires, values = self._scenario_metrics(panel, scenario_prices)
+        order, positions = np.nonzero(fires)
+        by_position = np.argsort(positions, kind="stable")
+        order, positions = order[by_position], positions[by_position]
+        return pd.DataFrame({
+            "position": positions,
+            "symbol": [self.rules[i]['symbol'] for i in order],
+            "description": [describe_rule(self.rules[i]) for i in order],
+            "value": values[order, positions],
+            "threshold": self.thresholds[order],
+            "rule_id": [self.rules[i].get('id') for i in order],
+            "rule_order": order,
+        }, columns=["position"] + HISTORY_TRIGGER_COLUMNS)
+
+    def evaluate_latest(self, panel: dict) -> pd.DataFrame:
+        """
+        Rules firing on the panel's latest date
+        Returns: DataFrame with one row per triggered rule
+        """
+        if not self.rules or panel["Close"].empty:
+            return pd.DataFrame(columns=HISTORY_TRIGGER_COLUMNS)
+
+        fires, values = self.evaluate(panel)
+        order = np.flatnonzero(fires[-1])
+        return pd.DataFrame({
+            "symbol": [self.rules[i]['symbol'] for i in order],
+            "description": [describe_rule(self.rules[i]) for i in order],
+            "value": values[-1, order],
+            "threshold": self.thresholds[order],
+            "rule_id": [self.rules[i].get('id') for i in order],
+            "rule_order": order,
+        }, columns=HISTORY_TRIGGER_COLUMNS)
+
+
+class IndicatorRuleSet:
+    """
+    Rules that compare a symbol's latest indicator value to a threshold,
+    e.g. ``{"symbol": "AAPL", "indicator": "rsi", "params": {"period": 14},
+    "operator": ">=", "value": 70}``. ``column`` picks the output column of
+    multi-column indicators and defaults to the indicator name.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = [rule for rule in rules if is_indicator_rule(rule)]
+        self._specs = [
+            (rule['indicator'], tuple(sorted(resolve_params(rule['indicator'], rule.get('params')).items())))
+            for rule in self.rules
+        ]
+
+    def __len__(self):
+        return len(self.rules)
+
+    def requirements(self) -> dict:
+        """
+        Indicators each symbol needs computed
+        Returns: dict of symbol -> list of (indicator, params tuple)
+        """
+        needed = {}
+        for rule, spec in zip(self.rules, self._specs):
+            specs = needed.setdefault(rule['symbol'], [])
+            if spec not in specs:
+                specs.append(spec)
+        return needed
+
+    def evaluate(self, latest_values: dict) -> pd.DataFrame:
+        """
+        Compare every rule against the latest indicator values
+        latest_values: dict of symbol -> dict of (indicator, params tuple) -> dict of column -> value
+        Returns: DataFrame with one row per triggered rule
+        """
+        if not self.rules:
+            return pd.DataFrame(columns=INDICATOR_TRIGGER_COLUMNS)
+
+        columns = [rule.get('column', rule['indicator']) for rule in self.rules]
+        values = np.array([
+            latest_values.get(rule['symbol'], {}).get(spec, {}).get(column, np.nan)
+            for rule, spec, column in zip(self.rules, self._specs, columns)
+        ], dtype=np.float64)
+        thresholds = np.array([float(rule['value']) for rule in self.rules], dtype=np.float64)
+        operators = np.array([rule['operator'] for rule in self.rules], dtype=object)
+
+        fired = np.zeros(len(self.rules), dtype=bool)
+        for operator, compare in INDICATOR_OPERATORS.items():
+            mask = operators == operator
+            fired[mask] = compare(values[mask], thresholds[mask])
+
+        order = np.flatnonzero(fired)
+        return pd.DataFrame({
+            "symbol": [self.rules[i]['symbol'] for i in order],
+            "indicator": [self.rules[i]['indicator'] for i in order],
+            "label": [indicator_label(self.rules[i]['indicator'], self.rules[i].get('params')) for i in order],
+            "column": [columns[i] for i in order],
+            "operator": operators[order],
+            "value": values[order],
+            "threshold": thresholds[order],
+            "rule_id": [self.rules[i].get('id') for i in order],
+            "rule_order": order,
+        }, columns=INDICATOR_TRIGGER_COLUMNS)
@@ -1,17 +1,35 @@
-import pytest
+import argparse
 import sys
 
+from suite_runner import SuiteRunner
+
 def main():
-    """Run the test suite"""
-    args = [
-        "-v",
-        "--html=test_report.html",
-        "--self-contained-html",
-        "tests"
-    ]
-    
-    exit_code = pytest.main(args)
-    sys.exit(exit_code)
+    """Run the test suite in parallel, reusing cached results of unchanged files"""
+    parser = argparse.ArgumentParser(description="Run the test suite")
+    parser.add_argument("--skip-integration", action="store_true", help="Skip tests that call live services")
+    parser.add_argument("--force", action="store_true", help="Rerun every file, ignoring cached results")
+    parser.add_argument("--workers", type=int, default=None, help="Number of pytest worker processes")
+    args = parser.parse_args()
+
+    job = SuiteRunner().start(
+        markexpr="not integration" if args.skip_integration else None,
+        use_cache=not args.force,
+        workers=args.workers,
+    )
+    seen = 0
+    running = True
+    while running:
+        running = job.wait(seen)
+        for result in job.results[seen:]:
+            print(f"{result['nodeid']} {result['status']}{' (cached)' if result['cached'] else ''}")
+        seen = len(job.results)
+
+    summary = job.summary()
+    if summary["error"]:
+        print(summary["error"])
+    print(f"{summary['passed']} passed, {summary['failed']} failed, {summary['skipped']} skipped "
+          f"in {summary['seconds']:.2f}s ({summary['cached_files']} of {summary['files']} files cached)")
+    sys.exit(0 if summary["status"] == "passed" else 1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,125 @@
+"""
+Rule stress tests over price scenarios
+
+A scenario is a hypothetical next close for every symbol: either a shock
+applied to every symbol from a grid such as -20%..+20%, or a Monte Carlo
+path drawn from the symbols' historical volatility and correlation. Moves
+are held as (symbols x scenarios) arrays and every rule is checked against
+all of them in one pass with HistoryRuleSet.evaluate_scenarios.
+"""
+import numpy as np
+import pandas as pd
+
+from rules import HistoryRuleSet, describe_rule, rule_kind
+
+DEFAULT_SHOCK_LOW = -20.0
+DEFAULT_SHOCK_HIGH = 20.0
+DEFAULT_SHOCK_STEP = 0.5
+DEFAULT_PATHS = 1000
+DEFAULT_HORIZON_DAYS = 1
+# Daily returns used to estimate volatility and correlation
+DEFAULT_VOLATILITY_LOOKBACK = 252
+DEFAULT_BUCKETS = 40
+# Rules that a one-bar price scenario can move; volume and indicator rules are left out
+SCENARIO_KINDS = ("percentage", "price")
+
+SUMMARY_COLUMNS = ["rule_id", "symbol", "rule", "scenarios", "fired", "fire_rate", "trigger_down", "trigger_up"]
+
+
+def shock_grid(low: float = DEFAULT_SHOCK_LOW, high: float = DEFAULT_SHOCK_HIGH, step: float = DEFAULT_SHOCK_STEP) -> np.ndarray:
+    """
+    Percentage shocks from low to high inclusive
+    """
+    return np.round(np.arange(low, high + step / 2, step), 10)
+
+
+def last_closes(panel: dict) -> np.ndarray:
+    """
+    Latest close per panel symbol, carrying forward over dates a symbol did not trade
+    """
+    close = panel["Close"].ffill()
+    return close.iloc[-1].to_numpy(dtype=np.float64) if len(close) else np.full(close.shape[1], np.nan)
+
+
+def grid_moves(symbol_count: int, shocks) -> np.ndarray:
+    """
+    The same shocks applied to every symbol
+    Returns: (symbols x shocks) array of percentage moves
+    """
+    shocks = np.asarray(shocks, dtype=np.float64)
+    return np.broadcast_to(shocks, (symbol_count, len(shocks)))
+
+
+def return_covariance(panel: dict, lookback: int = DEFAULT_VOLATILITY_LOOKBACK) -> np.ndarray:
+    """
+    Covariance of daily log returns over the last lookback bars
+    Symbols without enough history get zero variance, so their paths stay flat
+    Returns: (symbols x symbols) array
+    """
+    close = panel["Close"].ffill().tail(lookback + 1)
+    returns = np.log(close / close.shift(1)).iloc[1:]
+    return returns.cov(min_periods=2).fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def monte_carlo_moves(covariance, paths: int = DEFAULT_PATHS, horizon_days: int = DEFAULT_HORIZON_DAYS, seed: int = None) -> np.ndarray:
+    """
+    Correlated lognormal moves over horizon_days with no drift
+    Returns: (symbols x paths) array of percentage moves
+    """
+    covariance = np.asarray(covariance, dtype=np.float64)
+    # Eigen factorization tolerates the rank-deficient matrices that gaps in history produce
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+    draws = np.random.default_rng(seed).standard_normal((len(covariance), paths))
+    log_moves = factor @ draws * np.sqrt(horizon_days) - 0.5 * np.diag(covariance)[:, None] * horizon_days
+    return np.expm1(log_moves) * 100
+
+
+def run_scenarios(rules: list, panel: dict, moves) -> tuple:
+    """
+    Check every rule against every scenario
+    moves: (symbols x scenarios) percentage moves from the latest close, rows in panel["Close"] column order
+    Returns: (list, ndarray) - (rules that scenarios apply to, rules x scenarios fire matrix)
+    """
+    rule_set = HistoryRuleSet([rule for rule in rules if rule_kind(rule) in SCENARIO_KINDS])
+    prices = last_closes(panel)[:, None] * (1 + np.asarray(moves, dtype=np.float64) / 100)
+    return rule_set.rules, rule_set.evaluate_scenarios(panel, prices)
+
+
+def summarize(rules: list, fires: np.ndarray, shocks=None) -> pd.DataFrame:
+    """
+    One row per rule with how often it fired
+    With the shocks of a grid, trigger_down and trigger_up are the smallest fall and rise that fire a rule
+    Returns: DataFrame sorted by fire_rate, most often firing first
+    """
+    scenarios = fires.shape[1]
+    fired = fires.sum(axis=1)
+    summary = pd.DataFrame({
+        "rule_id": [rule.get('id') for rule in rules],
+        "symbol": [rule['symbol'] for rule in rules],
+        "rule": [describe_rule(rule) for rule in rules],
+        "scenarios": scenarios,
+        "fired": fired,
+        "fire_rate": fired / scenarios if scenarios else 0.0,
+        "trigger_down": np.nan,
+        "trigger_up": np.nan,
+    }, columns=SUMMARY_COLUMNS)
+    if shocks is not None and len(rules):
+        shocks = np.asarray(shocks, dtype=np.float64)
+        for column, side, sign in (("trigger_down", shocks < 0, -1), ("trigger_up", shocks > 0, 1)):
+            # Smallest move on this side that fires the rule
+            magnitude = np.where(fires & side, np.abs(shocks), np.inf).min(axis=1)
+            summary[column] = np.where(np.isfinite(magnitude), sign * magnitude, np.nan)
+    return summary.sort_values("fire_rate", ascending=False, kind="stable")
+
+
+def bucket_paths(fires: np.ndarray, moves, buckets: int = DEFAULT_BUCKETS) -> tuple:
+    """
+    Group Monte Carlo paths by their average move across symbols, from the worst to the best
+    Returns: (ndarray, ndarray) - (rules x buckets fire rates, average move of each bucket)
+    """
+    market = np.nanmean(np.asarray(moves, dtype=np.float64), axis=0)
+    order = np.argsort(market, kind="stable")
+    groups = [group for group in np.array_split(order, min(buckets, len(order))) if len(group)]
+    rates = np.column_stack([fires[:, group].mean(axis=1) for group in groups]) if groups else np.zeros((len(fires), 0))
+    return rates, np.array([market[group].mean() for group in groups])
@@ -0,0 +1,101 @@
+"""
+Key-metrics screener over a universe of symbols
+
+Fundamentals for every symbol are gathered into one typed table (a row
+per symbol, numeric columns kept as floats), so the universe can be
+filtered and sorted as numbers. Values are only formatted for display.
+"""
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from fundamentals import KEY_METRIC_FIELDS
+
+# The key metrics plus the latest price, to place it within its 52-week range
+SCREENER_FIELDS = KEY_METRIC_FIELDS + ("currentPrice",)
+# Column names that hold symbols in an uploaded CSV, most preferred first
+UNIVERSE_HEADERS = ("symbol", "ticker")
+
+# Yahoo info field -> (column, dtype)
+SCREENER_COLUMNS = {
+    "longName": ("name", "string"),
+    "currentPrice": ("price", "float64"),
+    "marketCap": ("market_cap", "float64"),
+    "trailingPE": ("pe_ratio", "float64"),
+    "dividendYield": ("dividend_yield", "float64"),
+    "fiftyTwoWeekLow": ("low_52w", "float64"),
+    "fiftyTwoWeekHigh": ("high_52w", "float64"),
+    "volume": ("volume", "float64"),
+    "averageVolume": ("avg_volume", "float64"),
+}
+
+
+def parse_universe(text: str) -> list:
+    """
+    Symbols from an uploaded list: a CSV with a Symbol or Ticker column, or symbols separated by commas, spaces or lines
+    Returns: list of unique upper-case symbols in file order
+    """
+    text = text.lstrip()
+    header = next(csv.reader([text.split("\n", 1)[0]]), [])
+    # Only a cell that is exactly a header name marks a header row, so "Symbol Name" does not
+    if any(cell.strip().lower() in UNIVERSE_HEADERS for cell in header):
+        frame = pd.read_csv(io.StringIO(text), dtype=str)
+        columns = {str(column).strip().lower(): column for column in reversed(frame.columns)}
+        column = next((columns[name] for name in UNIVERSE_HEADERS if name in columns), frame.columns[0])
+        tokens = frame[column].dropna()
+    else:
+        tokens = text.replace(",", " ").split()
+    # Yahoo writes share classes with a dash, e.g. BRK.B is BRK-B
+    return list(dict.fromkeys(token.strip().upper().replace(".", "-") for token in tokens if token.strip()))
+
+
+def metrics_frame(fundamentals: dict) -> pd.DataFrame:
+    """
+    Typed key-metrics table
+    fundamentals: dict of symbol -> info dict
+    Returns: DataFrame indexed by symbol, missing values as NaN
+    """
+    frame = pd.DataFrame.from_dict(fundamentals, orient="index", columns=list(SCREENER_COLUMNS))
+    frame = frame.rename(columns={field: column for field, (column, _) in SCREENER_COLUMNS.items()})
+    # Yahoo sends "Infinity" or text for some fields; anything non-numeric becomes NaN
+    frame = frame.astype({column: "object" for column, _ in SCREENER_COLUMNS.values()})
+    for column, dtype in SCREENER_COLUMNS.values():
+        if dtype == "float64":
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").replace([np.inf, -np.inf], np.nan)
+    frame = frame.astype({column: dtype for column, dtype in SCREENER_COLUMNS.values()})
+    frame.index.name = "symbol"
+
+    # Same percentage scale as get_key_metrics
+    frame["dividend_yield"] *= 100
+    width = frame["high_52w"] - frame["low_52w"]
+    # 0 at the 52-week low, 100 at the high
+    frame["range_position"] = ((frame["price"] - frame["low_52w"]) / width.where(width > 0) * 100).clip(0, 100)
+    frame["below_high_pct"] = (1 - frame["price"] / frame["high_52w"]) * 100
+    return frame
+
+
+def _between(values: pd.Series, bounds) -> pd.Series:
+    low, high = bounds
+    mask = values.notna()
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+def screen(frame: pd.DataFrame, pe_ratio=None, market_cap=None, dividend_yield=None, range_position=None,
+           sort_by: str = "market_cap", ascending: bool = False) -> pd.DataFrame:
+    """
+    Rows within every given (low, high) bound, either end None for unbounded
+    A symbol missing a filtered metric is left out
+    Returns: filtered DataFrame sorted by sort_by, missing values last
+    """
+    mask = pd.Series(True, index=frame.index)
+    for column, bounds in (("pe_ratio", pe_ratio), ("market_cap", market_cap),
+                           ("dividend_yield", dividend_yield), ("range_position", range_position)):
+        if bounds is not None:
+            mask &= _between(frame[column], bounds)
+    return frame[mask].sort_values(sort_by, ascending=ascending, na_position="last", kind="stable")
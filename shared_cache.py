@@ -0,0 +1,304 @@
+"""
+Process-wide cache shared by every browser session
+
+Fresh entries are served directly. Expired entries are still served at
+once while a single background refresh replaces them (stale-while-
+revalidate), so no user waits on a popular ticker's TTL running out. A miss
+that several sessions hit together runs the loader once. Failed loads are
+remembered for a short failure TTL, so a bad ticker is not refetched on
+every rerun. Entries are held to a memory budget with LRU eviction.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from datetime import time as clock_time
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from tracing import cache_miss
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("SHARED_CACHE_MB", "256")) * 1024 * 1024)
+DEFAULT_TTL_SECONDS = 3600
+# Beyond this age an entry is too old to serve while refreshing; the caller waits for a reload
+DEFAULT_MAX_STALE_SECONDS = 7 * 24 * 3600
+# How long a failed load is served as None, or a failed refresh waits before retrying
+DEFAULT_FAILURE_TTL_SECONDS = float(os.getenv("SHARED_CACHE_FAILURE_TTL", "60"))
+DEFAULT_REFRESH_WORKERS = 2
+# Request counts kept for popular(); trimmed to the most requested keys past this size
+MAX_TRACKED_KEYS = 5000
+
+# Pre-warm shortly before the US market opens
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+DEFAULT_PREWARM_TIME = clock_time(9, 15)
+
+
+def estimate_bytes(value) -> int:
+    """
+    Rough in-memory size of a cached value
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def next_prewarm_time(now: datetime, at: clock_time = DEFAULT_PREWARM_TIME, tz=MARKET_TIMEZONE) -> datetime:
+    """
+    The next weekday at the given market-local time strictly after now
+    """
+    local = now.astimezone(tz)
+    candidate = local.replace(hour=at.hour, minute=at.minute, second=0, microsecond=0)
+    if candidate <= local:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+class _Entry:
+    __slots__ = ("value", "loaded_at", "ttl_seconds", "max_stale_seconds", "loader", "size", "failed_at")
+
+    def __init__(self, value, loaded_at, ttl_seconds, max_stale_seconds, loader, size):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.loader = loader
+        self.size = size
+        # When the last background refresh failed, if it did
+        self.failed_at = None
+
+
+class SharedCache:
+    """
+    Stale-while-revalidate cache with single-flight loads and an LRU memory budget.
+
+    Values are shared, not copied: callers must not modify what they get
+    back. Loaders return None on failure. A failed load is cached as None
+    for failure_ttl_seconds; a failed refresh keeps serving the stale
+    value and is not retried until failure_ttl_seconds have passed.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, refresh_workers: int = DEFAULT_REFRESH_WORKERS, size=estimate_bytes,
+                 failure_ttl_seconds: float = DEFAULT_FAILURE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.size = size
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._requests = Counter()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Separate from the fetch pool, since loaders themselves wait on fetch futures
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="refresh")
+        self._counters = Counter()
+
+    def get(self, key, loader, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS):
+        """
+        Return the cached value for key, calling loader() on a miss
+        An expired entry is returned as is and refreshed in the background
+        """
+        with self._lock:
+            entry = self._lookup(key, loader, ttl_seconds, max_stale_seconds)
+            if entry is not None:
+                return entry.value
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+            else:
+                self._counters["joined"] += 1
+
+        cache_miss()
+        if owner:
+            self._load(key, loader, ttl_seconds, max_stale_seconds, future)
+        return future.result()
+
+    def _lookup(self, key, loader, ttl_seconds, max_stale_seconds):
+        """
+        Caller holds the lock; counts the request and returns the servable entry, if any
+        An expired entry starts a background refresh with loader
+        """
+        self._track(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            age = now - entry.loaded_at
+            if age < entry.max_stale_seconds:
+                self._entries.move_to_end(key)
+                if entry.value is None:
+                    self._counters["failure_hits"] += 1
+                elif age < entry.ttl_seconds:
+                    self._counters["hits"] += 1
+                else:
+                    self._counters["stale_hits"] += 1
+                    if entry.failed_at is None or now - entry.failed_at >= self.failure_ttl_seconds:
+                        self._start_refresh(key, loader, ttl_seconds, max_stale_seconds)
+                return entry
+        self._counters["misses"] += 1
+        return None
+
+    def refresh(self, key, loader=None, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS) -> bool:
+        """
+        Reload key in the background, e.g. to pre-warm it; loader defaults to the cached entry's
+        Returns: True if a refresh was started or is already running
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if loader is None:
+                if entry is None:
+                    return False
+                loader, ttl_seconds, max_stale_seconds = entry.loader, entry.ttl_seconds, entry.max_stale_seconds
+            self._start_refresh(key, loader, ttl_seconds, max_stale_seconds)
+        return True
+
+    def _start_refresh(self, key, loader, ttl_seconds, max_stale_seconds):
+        # Caller holds the lock; at most one load per key runs at a time
+        if key in self._loading:
+            return
+        future = self._loading[key] = Future()
+        self._counters["refreshes"] += 1
+        self._executor.submit(self._load, key, loader, ttl_seconds, max_stale_seconds, future)
+
+    def get_many(self, keys: list, load_many, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS) -> list:
+        """
+        Values for many keys, loading every miss with a single load_many(missing_keys) call
+        load_many returns a dict of key -> value; keys it leaves out count as failed loads
+        Returns: list of values in the order of keys
+        """
+        def loader_for(key):
+            return lambda: load_many([key]).get(key)
+
+        values, owned, joined = {}, {}, {}
+        with self._lock:
+            for key in keys:
+                if key in values or key in owned or key in joined:
+                    continue
+                entry = self._lookup(key, loader_for(key), ttl_seconds, max_stale_seconds)
+                if entry is not None:
+                    values[key] = entry.value
+                elif key in self._loading:
+                    self._counters["joined"] += 1
+                    joined[key] = self._loading[key]
+                else:
+                    owned[key] = self._loading[key] = Future()
+
+        if owned or joined:
+            cache_miss()
+        if owned:
+            try:
+                loaded = load_many(list(owned))
+            except Exception as e:
+                print(f"Error: Failed to load {len(owned)} keys - {str(e)}")
+                loaded = {}
+            for key, future in owned.items():
+                self._finish(key, loaded.get(key), loader_for(key), ttl_seconds, max_stale_seconds, future)
+                values[key] = loaded.get(key)
+        for key, future in joined.items():
+            values[key] = future.result()
+        return [values[key] for key in keys]
+
+    def _load(self, key, loader, ttl_seconds, max_stale_seconds, future):
+        try:
+            value = loader()
+        except Exception as e:
+            print(f"Error: Failed to load {key} - {str(e)}")
+            value = None
+        self._finish(key, value, loader, ttl_seconds, max_stale_seconds, future)
+
+    def _finish(self, key, value, loader, ttl_seconds, max_stale_seconds, future):
+        with self._lock:
+            now = time.monotonic()
+            previous = self._entries.get(key)
+            if value is not None:
+                self._store(key, _Entry(value, now, ttl_seconds, max_stale_seconds, loader, self.size(value)))
+            else:
+                self._counters["load_errors"] += 1
+                if previous is not None and previous.value is not None:
+                    # Keep serving the stale value, retrying only after the failure TTL
+                    previous.failed_at = now
+                else:
+                    ttl = self.failure_ttl_seconds
+                    self._store(key, _Entry(None, now, ttl, ttl, loader, self.size(None)))
+            del self._loading[key]
+        future.set_result(value)
+
+    def _store(self, key, entry: _Entry):
+        # Caller holds the lock
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._counters["evictions"] += 1
+
+    def _track(self, key):
+        # Caller holds the lock
+        self._requests[key] += 1
+        if len(self._requests) > MAX_TRACKED_KEYS:
+            self._requests = Counter(dict(self._requests.most_common(MAX_TRACKED_KEYS // 2)))
+
+    def popular(self, count: int) -> list:
+        """
+        The most requested keys, most requested first
+        """
+        with self._lock:
+            return [key for key, _ in self._requests.most_common(count)]
+
+    def stats(self) -> dict:
+        """
+        Returns: dict of hits, stale_hits, failure_hits, misses, joined, refreshes, load_errors, evictions,
+        entries and bytes
+        """
+        with self._lock:
+            stats = {name: self._counters[name] for name in
+                     ("hits", "stale_hits", "failure_hits", "misses", "joined", "refreshes", "load_errors", "evictions")}
+            stats.update(entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class Prewarmer:
+    """
+    Background thread that runs warm() once at start and again before every market open
+    """
+
+    def __init__(self, warm, at: clock_time = DEFAULT_PREWARM_TIME, tz=MARKET_TIMEZONE):
+        self.warm = warm
+        self.at = at
+        self.tz = tz
+        self._thread = threading.Thread(target=self._run, name="prewarm", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"Error: Cache pre-warm failed - {str(e)}")
+            now = datetime.now(self.tz)
+            time.sleep(max(0.0, (next_prewarm_time(now, self.at, self.tz) - now).total_seconds()))
@@ -0,0 +1,237 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from charting import DEFAULT_MAX_POINTS, OHLC_AGGREGATION, TRADING_SESSION, choose_resample_rule, resample_ohlc
+from history_store import PERIOD_OFFSETS
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+
+# Per interval: bar length, window fetched per request, and how far back Yahoo serves it
+INTERVAL_SETTINGS = {
+    "1m": {"bar": pd.Timedelta(minutes=1), "window": pd.Timedelta(days=7), "max_lookback": pd.Timedelta(days=29)},
+    "5m": {"bar": pd.Timedelta(minutes=5), "window": pd.Timedelta(days=14), "max_lookback": pd.Timedelta(days=59)},
+    "15m": {"bar": pd.Timedelta(minutes=15), "window": pd.Timedelta(days=30), "max_lookback": pd.Timedelta(days=59)},
+    "30m": {"bar": pd.Timedelta(minutes=30), "window": pd.Timedelta(days=59), "max_lookback": pd.Timedelta(days=59)},
+    "1h": {"bar": pd.Timedelta(hours=1), "window": pd.Timedelta(days=120), "max_lookback": pd.Timedelta(days=729)},
+    "1d": {"bar": pd.Timedelta(days=1), "window": pd.Timedelta(days=365), "max_lookback": None},
+}
+
+
+def period_span(period: str) -> pd.Timedelta:
+    """
+    Calendar length of a period string as of now
+    """
+    now = pd.Timestamp.now(tz="UTC")
+    return now - (now - PERIOD_OFFSETS[period])
+
+
+def periods_for_interval(interval: str, periods=tuple(PERIOD_OFFSETS)) -> list:
+    """
+    Periods whose start still falls inside the lookback Yahoo allows for an interval
+    """
+    max_lookback = INTERVAL_SETTINGS[interval]["max_lookback"]
+    if max_lookback is None:
+        return list(periods)
+    return [period for period in periods if period_span(period) <= max_lookback]
+
+
+def compact_ohlcv(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep only OHLCV columns, with float32 prices and the narrowest safe volume type
+    """
+    columns = [column for column in PRICE_COLUMNS + ["Volume"] if column in chunk.columns]
+    compact = chunk[columns].astype({column: np.float32 for column in PRICE_COLUMNS if column in columns})
+    if "Volume" in compact.columns:
+        volume = compact["Volume"].fillna(0)
+        dtype = np.uint32 if volume.max() <= np.iinfo(np.uint32).max else np.int64
+        compact["Volume"] = volume.astype(dtype)
+    return compact
+
+
+def iter_history_chunks(fetch, symbol: str, period: str, interval: str = "1d"):
+    """
+    Yield compact bars for a period window by window, oldest first
+
+    fetch is called as fetch(symbol, start=..., end=..., interval=...) with an
+    exclusive end, so at most one window of bars is in memory at a time.
+    """
+    max_lookback = INTERVAL_SETTINGS[interval]["max_lookback"]
+    now = pd.Timestamp.now(tz="UTC")
+    start = now - PERIOD_OFFSETS[period]
+    if max_lookback is not None:
+        start = max(start, now - max_lookback)
+    yield from iter_window_chunks(fetch, symbol, start, now, interval)
+
+
+def iter_window_chunks(fetch, symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str = "1d"):
+    """
+    Yield compact bars between start and an exclusive end, one fetch window at a time
+    """
+    window = INTERVAL_SETTINGS[interval]["window"]
+    while start < end:
+        stop = min(start + window, end)
+        chunk = fetch(symbol, start=start, end=stop, interval=interval)
+        if chunk is not None and not chunk.empty:
+            yield compact_ohlcv(chunk)
+        start = stop
+
+
+def consume(chunks, *consumers):
+    """
+    Feed every chunk to each consumer in a single pass over the stream
+    """
+    for chunk in chunks:
+        for consumer in consumers:
+            consumer.add(chunk)
+    return consumers
+
+
+class OhlcResampler:
+    """
+    Buckets a stream of bars for charting, holding only the buckets
+    """
+
+    def __init__(self, rule=None):
+        self.rule = rule
+        self._bars = None
+
+    def add(self, chunk: pd.DataFrame):
+        bars = resample_ohlc(chunk, self.rule) if self.rule is not None else chunk
+        if self._bars is None:
+            self._bars = bars
+            return
+        # A bucket can straddle two chunks, so merge partial buckets with the same label
+        combined = pd.concat([self._bars, bars])
+        aggregation = {column: how for column, how in OHLC_AGGREGATION.items() if column in combined.columns}
+        self._bars = combined.groupby(level=0, sort=True).agg(aggregation)
+
+    def result(self) -> pd.DataFrame:
+        return self._bars if self._bars is not None else pd.DataFrame(columns=list(OHLC_AGGREGATION))
+
+
+class StreamSummary:
+    """
+    Running price metrics over a stream of bars
+    """
+
+    def __init__(self):
+        self.bars = 0
+        self.first_open = None
+        self.last_close = None
+        self.high = -np.inf
+        self.low = np.inf
+        self.volume = 0
+        self.start = None
+        self.end = None
+
+    def add(self, chunk: pd.DataFrame):
+        if chunk.empty:
+            return
+        if self.first_open is None:
+            self.first_open = float(chunk["Open"].iloc[0])
+            self.start = chunk.index[0]
+        self.bars += len(chunk)
+        self.last_close = float(chunk["Close"].iloc[-1])
+        self.high = max(self.high, float(chunk["High"].max()))
+        self.low = min(self.low, float(chunk["Low"].min()))
+        self.volume += int(chunk["Volume"].sum())
+        self.end = chunk.index[-1]
+
+    def result(self) -> dict:
+        change_pct = None
+        if self.first_open:
+            change_pct = (self.last_close / self.first_open - 1) * 100
+        return {
+            "bars": self.bars,
+            "first_open": self.first_open,
+            "last_close": self.last_close,
+            "high": self.high if self.bars else None,
+            "low": self.low if self.bars else None,
+            "volume": self.volume,
+            "change_pct": change_pct,
+            "start": self.start,
+            "end": self.end,
+        }
+
+
+class RuleTriggerScan:
+    """
+    Finds when each rule first fired over a stream of bars
+
+    Moves are measured from reference_price, or from the first bar's open
+    when no reference is given.
+    """
+
+    def __init__(self, symbol: str, rule_set, reference_price: float = None):
+        self.symbol = symbol
+        self.rule_set = rule_set
+        self.reference_price = reference_price
+        self._first = {}
+
+    def add(self, chunk: pd.DataFrame):
+        if chunk.empty:
+            return
+        if self.reference_price is None:
+            self.reference_price = float(chunk["Open"].iloc[0])
+        pct = (chunk["Close"].to_numpy(dtype=np.float64) / self.reference_price - 1) * 100
+        triggered = self.rule_set.evaluate(np.full(len(chunk), self.symbol, dtype=object), pct)
+        # Rows are ordered by bar, so the first row per rule is its earliest trigger
+        first_in_chunk = triggered.drop_duplicates("rule_order")
+        for trigger in first_in_chunk.itertuples(index=False):
+            if trigger.rule_order not in self._first:
+                self._first[trigger.rule_order] = {
+                    "rule_id": trigger.rule_id,
+                    "threshold": trigger.threshold,
+                    "first_triggered_at": chunk.index[trigger.position],
+                    "price_change_pct": trigger.price_change_pct,
+                }
+
+    def result(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self._first.values()), columns=["rule_id", "threshold", "first_triggered_at", "price_change_pct"])
+
+
+def bucket_rule(start: pd.Timestamp, end: pd.Timestamp, interval: str, max_points: int = DEFAULT_MAX_POINTS) -> tuple:
+    """
+    Chart bucket for bars of an interval between start and end
+    Returns: (rule, str) - (resample rule, bucket label), or (None, None) when native bars fit
+    """
+    span = end - start
+    bar_length = INTERVAL_SETTINGS[interval]["bar"]
+    # end is exclusive, so a window ending at midnight does not count the next session
+    sessions = int(np.busday_count(start.date(), (end - pd.Timedelta(microseconds=1)).date())) + 1
+
+    if bar_length < pd.Timedelta(days=1):
+        expected_bars = sessions * math.ceil(TRADING_SESSION / bar_length)
+    else:
+        expected_bars = span / bar_length
+    if expected_bars <= max_points:
+        return None, None
+    return choose_resample_rule(span, max_points, bar_length=bar_length, sessions=sessions)
+
+
+def stream_overview(chunks, period: str, interval: str, max_points: int = DEFAULT_MAX_POINTS) -> tuple:
+    """
+    Reduce a stream to chart-ready bars and summary metrics in one pass
+    Returns: (DataFrame, dict, str) - (bars to plot, summary, bucket label or None)
+    """
+    now = pd.Timestamp.now(tz="UTC")
+    span = period_span(period)
+    max_lookback = INTERVAL_SETTINGS[interval]["max_lookback"]
+    if max_lookback is not None:
+        span = min(span, max_lookback)
+    rule, label = bucket_rule(now - span, now, interval, max_points)
+
+    resampler, summary = consume(chunks, OhlcResampler(rule), StreamSummary())
+    return resampler.result(), summary.result(), label
+
+
+def stream_window(chunks, start: pd.Timestamp, end: pd.Timestamp, interval: str, max_points: int = DEFAULT_MAX_POINTS) -> tuple:
+    """
+    Reduce a stream covering start to end to chart-ready bars, bucketed only as far as the window needs
+    Returns: (DataFrame, str) - (bars to plot, bucket label or None)
+    """
+    rule, label = bucket_rule(start, end, interval, max_points)
+    (resampler,) = consume(chunks, OhlcResampler(rule))
+    return resampler.result(), label
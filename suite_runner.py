@@ -0,0 +1,429 @@
+"""
+Parallel, cached pytest runs for the test dashboard
+
+A run splits the test files across worker processes, each running pytest
+on its share, and reports every test as soon as a worker prints it. A
+test file whose own source and the project modules it imports are
+unchanged since it last passed is not run again; its cached results are
+reported instead. Tests marked integration talk to live services, so their
+results are never reused. Per-test durations are kept across runs, to show which
+tests dominate runtime and to balance files across workers.
+"""
+import ast
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_TESTS_DIR = PROJECT_ROOT / "tests"
+DEFAULT_RUNS_DIR = os.getenv("TEST_RUNS_DIR", str(PROJECT_ROOT / ".test_runs"))
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+# Durations kept per test; older runs are dropped
+HISTORY_RUNS_PER_TEST = 20
+# Finished jobs kept in memory for the dashboard
+MAX_FINISHED_JOBS = 10
+# Assumed duration of a test file that has never run, for balancing workers
+DEFAULT_FILE_SECONDS = 1.0
+
+# "tests/test_rules.py::test_x PASSED   [ 50%]" in pytest -v output
+RESULT_LINE = re.compile(r"^(\S+\.py::.+?) (PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\b")
+# "0.52s call     tests/test_rules.py::test_x" in the --durations report
+DURATION_LINE = re.compile(r"^([\d.]+)s (setup|call|teardown)\s+(\S+\.py::.+)$")
+# Outcomes that let a file's results be reused
+CACHEABLE_STATUSES = {"PASSED", "SKIPPED", "XFAIL"}
+# Marker of tests whose results depend on live services; a file that ran one is never cached
+UNCACHEABLE_MARKER = "integration"
+
+
+def _hash_file(path: Path) -> str:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return ""
+
+
+def _imported_modules(path: Path) -> frozenset:
+    try:
+        stat = path.stat()
+    except OSError:
+        return frozenset()
+    # Parsed once per file version, since every test file walks the same project modules
+    return _parse_imports(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=1024)
+def _parse_imports(path: str, mtime_ns: int, size: int) -> frozenset:
+    # Top-level names of every module the file imports
+    try:
+        tree = ast.parse(Path(path).read_text(), filename=path)
+    except (OSError, SyntaxError):
+        return frozenset()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+    return frozenset(names)
+
+
+def project_dependencies(path, root=PROJECT_ROOT) -> list:
+    """
+    Project modules a file imports, directly or through other project modules
+    Returns: sorted list of module paths
+    """
+    root = Path(root)
+    modules = {module.stem: module for module in root.glob("*.py")}
+    seen, pending = set(), [Path(path)]
+    while pending:
+        for name in _imported_modules(pending.pop()):
+            if name in modules and name not in seen:
+                seen.add(name)
+                pending.append(modules[name])
+    return sorted(modules[name] for name in seen)
+
+
+def file_fingerprint(path, args: tuple = (), root=PROJECT_ROOT) -> str:
+    """
+    Hash of a test file, the project modules it depends on, the pytest config, the locked
+    dependencies, the Python version and the run's arguments
+    """
+    path = Path(path)
+    digest = hashlib.sha256(json.dumps([sys.version, *args]).encode())
+    sources = [path, *project_dependencies(path, root), Path(root) / "pytest.ini", Path(root) / "uv.lock",
+               path.parent / "conftest.py"]
+    for source in sources:
+        digest.update(f"{source.name}:{_hash_file(source)}".encode())
+    return digest.hexdigest()
+
+
+def docstring_summaries(path) -> dict:
+    """
+    First docstring line of each test function in a file
+    Returns: dict of test name -> description
+    """
+    try:
+        tree = ast.parse(Path(path).read_text())
+    except (OSError, SyntaxError):
+        return {}
+    return {
+        node.name: (ast.get_docstring(node) or "").split("\n")[0]
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test")
+    }
+
+
+def _has_marker(node, marker: str) -> bool:
+    # pytest.mark.<marker>, with or without arguments
+    if isinstance(node, ast.Call):
+        node = node.func
+    return (isinstance(node, ast.Attribute) and node.attr == marker
+            and isinstance(node.value, ast.Attribute) and node.value.attr == "mark")
+
+
+def marked_tests(path, marker: str = UNCACHEABLE_MARKER) -> set:
+    """
+    Names of the test functions in a file that carry a marker, on the function, its class or pytestmark
+    """
+    try:
+        tree = ast.parse(Path(path).read_text())
+    except (OSError, SyntaxError):
+        return set()
+
+    def marked(decorators) -> bool:
+        return any(_has_marker(decorator, marker) for decorator in decorators)
+
+    module_marks = []
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "pytestmark" for target in node.targets):
+            module_marks = node.value.elts if isinstance(node.value, (ast.List, ast.Tuple)) else [node.value]
+    names = set()
+    scopes = [(tree, marked(module_marks))]
+    while scopes:
+        scope, scope_marked = scopes.pop()
+        for node in scope.body:
+            if isinstance(node, ast.ClassDef):
+                scopes.append((node, scope_marked or marked(node.decorator_list)))
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+                if scope_marked or marked(node.decorator_list):
+                    names.add(node.name)
+    return names
+
+
+def _read_json(path: Path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def _write_json(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class ResultCache:
+    """
+    Results of test files that passed, keyed on their fingerprint
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def get(self, test_file: str, fingerprint: str):
+        """
+        Returns: list of cached result dicts, or None if the file changed or did not pass last time
+        """
+        with self._lock:
+            entry = _read_json(self.path, {}).get(test_file)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+        return entry["results"]
+
+    def put(self, test_file: str, fingerprint: str, results: list):
+        """
+        Store a file's results if every test passed or was skipped and none was an
+        integration test; otherwise forget the file
+        """
+        with self._lock:
+            entries = _read_json(self.path, {})
+            if results and all(result["status"] in CACHEABLE_STATUSES and not result.get("integration")
+                               for result in results):
+                entries[test_file] = {"fingerprint": fingerprint, "results": results}
+            else:
+                entries.pop(test_file, None)
+            _write_json(self.path, entries)
+
+
+class DurationHistory:
+    """
+    The last few durations of every test, newest last
+    """
+
+    def __init__(self, path, runs_per_test: int = HISTORY_RUNS_PER_TEST):
+        self.path = Path(path)
+        self.runs_per_test = runs_per_test
+        self._lock = threading.Lock()
+
+    def record(self, results: list):
+        with self._lock:
+            history = _read_json(self.path, {})
+            for result in results:
+                if result.get("duration") is None:
+                    continue
+                durations = history.setdefault(result["nodeid"], [])
+                durations.append(round(result["duration"], 4))
+                del durations[:-self.runs_per_test]
+            _write_json(self.path, history)
+
+    def summary(self) -> list:
+        """
+        Per-test duration statistics, slowest on average first
+        Returns: list of dicts with nodeid, runs, mean_seconds, last_seconds and max_seconds
+        """
+        with self._lock:
+            history = _read_json(self.path, {})
+        rows = [
+            {"nodeid": nodeid, "runs": len(durations), "mean_seconds": sum(durations) / len(durations),
+             "last_seconds": durations[-1], "max_seconds": max(durations)}
+            for nodeid, durations in history.items() if durations
+        ]
+        return sorted(rows, key=lambda row: row["mean_seconds"], reverse=True)
+
+    def file_seconds(self) -> dict:
+        """
+        Expected run time of each test file, from its tests' mean durations
+        """
+        seconds = {}
+        for row in self.summary():
+            test_file = row["nodeid"].split("::")[0]
+            seconds[test_file] = seconds.get(test_file, 0.0) + row["mean_seconds"]
+        return seconds
+
+
+def balance(files: list, seconds: dict, workers: int) -> list:
+    """
+    Split files across workers, longest first onto the least loaded worker
+    Returns: list of file lists, one per worker that has work
+    """
+    loads = [[0.0, []] for _ in range(max(1, min(workers, len(files))))]
+    for test_file in sorted(files, key=lambda f: seconds.get(f, DEFAULT_FILE_SECONDS), reverse=True):
+        least = min(loads, key=lambda load: load[0])
+        least[0] += seconds.get(test_file, DEFAULT_FILE_SECONDS)
+        least[1].append(test_file)
+    return [share for _, share in loads if share]
+
+
+class SuiteJob:
+    """
+    One background run of the suite; events are appended as tests finish
+    """
+
+    def __init__(self, files: list, args: tuple, workers: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.files = files
+        self.args = args
+        self.workers = workers
+        self.status = "running"
+        self.started_at = time.time()
+        self.finished_at = None
+        self.results = []
+        self.cached_files = []
+        self.files_done = 0
+        self.errors = []
+        self._changed = threading.Condition()
+
+    def add_results(self, results: list, files_done: int = 0):
+        with self._changed:
+            self.results.extend(results)
+            self.files_done += files_done
+            self._changed.notify_all()
+
+    def finish(self):
+        with self._changed:
+            self.status = "failed" if self.errors or any(r["status"] in ("FAILED", "ERROR") for r in self.results) else "passed"
+            self.finished_at = time.time()
+            self._changed.notify_all()
+
+    def wait(self, seen: int, timeout: float = None) -> bool:
+        """
+        Block until there are more than seen results or the job finishes
+        Returns: True if the job is still running
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.results) > seen or self.status != "running", timeout)
+            return self.status == "running"
+
+    def summary(self) -> dict:
+        with self._changed:
+            statuses = [result["status"] for result in self.results]
+            return {
+                "id": self.id,
+                "status": self.status,
+                "workers": self.workers,
+                "files": len(self.files),
+                "files_done": self.files_done,
+                "cached_files": len(self.cached_files),
+                "total": len(statuses),
+                "passed": statuses.count("PASSED"),
+                "failed": statuses.count("FAILED") + statuses.count("ERROR"),
+                "skipped": statuses.count("SKIPPED") + statuses.count("XFAIL"),
+                "seconds": (self.finished_at or time.time()) - self.started_at,
+                "error": "\n\n".join(self.errors) or None,
+            }
+
+
+class SuiteRunner:
+    """
+    Starts background test jobs, sharing the result cache and duration history between them
+    """
+
+    def __init__(self, tests_dir=DEFAULT_TESTS_DIR, runs_dir=DEFAULT_RUNS_DIR, workers: int = DEFAULT_WORKERS,
+                 root=PROJECT_ROOT):
+        self.tests_dir = Path(tests_dir)
+        self.root = Path(root)
+        self.workers = workers
+        self.cache = ResultCache(Path(runs_dir) / "result_cache.json")
+        self.history = DurationHistory(Path(runs_dir) / "durations.json")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def _relative(self, path: Path) -> str:
+        return path.resolve().relative_to(self.root).as_posix()
+
+    def start(self, markexpr: str = None, use_cache: bool = True, workers: int = None) -> SuiteJob:
+        """
+        Run the suite in the background
+        markexpr: pytest -m expression, e.g. "not integration"
+        Returns: the started SuiteJob
+        """
+        files = sorted(self._relative(path) for path in self.tests_dir.glob("test_*.py"))
+        args = ("-m", markexpr) if markexpr else ()
+        job = SuiteJob(files, args, workers or self.workers)
+        with self._lock:
+            finished = [job_id for job_id, old in self.jobs.items() if old.status != "running"]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS + 1)]:
+                del self.jobs[job_id]
+            self.jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job, use_cache), name=f"test-job-{job.id}", daemon=True).start()
+        return job
+
+    def _run(self, job: SuiteJob, use_cache: bool):
+        try:
+            fingerprints = {test_file: file_fingerprint(self.root / test_file, job.args, self.root) for test_file in job.files}
+            pending = []
+            for test_file in job.files:
+                cached = self.cache.get(test_file, fingerprints[test_file]) if use_cache else None
+                if cached is None:
+                    pending.append(test_file)
+                else:
+                    job.cached_files.append(test_file)
+                    job.add_results([dict(result, cached=True) for result in cached], files_done=1)
+
+            shares = balance(pending, self.history.file_seconds(), job.workers)
+            threads = [threading.Thread(target=self._run_worker, args=(job, share, fingerprints)) for share in shares]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        except Exception as e:
+            job.errors.append(f"Error executing tests: {str(e)}")
+        job.finish()
+
+    def _run_worker(self, job: SuiteJob, files: list, fingerprints: dict):
+        # The dashboard reads results from the output, so the HTML report and pytest's cache are turned off
+        command = [sys.executable, "-m", "pytest", "-v", "-o", "addopts=", "-p", "no:cacheprovider",
+                   "--durations=0", "--durations-min=0", *job.args, *files]
+        process = subprocess.Popen(command, cwd=self.root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, bufsize=1)
+        descriptions = {test_file: docstring_summaries(self.root / test_file) for test_file in files}
+        integration = {test_file: marked_tests(self.root / test_file) for test_file in files}
+        results, durations, output = {}, {}, []
+        for line in process.stdout:
+            output.append(line)
+            line = line.rstrip()
+            match = RESULT_LINE.match(line)
+            if match:
+                nodeid, status = match.groups()
+                test_file, _, name = nodeid.partition("::")
+                function = name.split("[")[0].split("::")[-1]
+                result = {
+                    "nodeid": nodeid, "file": test_file, "name": name, "status": status, "duration": None,
+                    "description": descriptions.get(test_file, {}).get(function, ""),
+                    "integration": function in integration.get(test_file, ()),
+                    "cached": False,
+                }
+                # An error in teardown reports the same test a second time
+                if nodeid not in results or status == "ERROR":
+                    results[nodeid] = result
+                    job.add_results([result])
+                continue
+            match = DURATION_LINE.match(line)
+            if match:
+                seconds, _, nodeid = match.groups()
+                durations[nodeid] = durations.get(nodeid, 0.0) + float(seconds)
+        returncode = process.wait()
+
+        for nodeid, result in results.items():
+            result["duration"] = durations.get(nodeid)
+        self.history.record(list(results.values()))
+        for test_file in files:
+            self.cache.put(test_file, fingerprints[test_file],
+                           [result for result in results.values() if result["file"] == test_file])
+        # 0: all passed, 1: some tests failed, 5: nothing collected; anything else is a crash or usage error
+        if returncode not in (0, 1, 5):
+            job.errors.append("".join(output[-50:]))
+        job.add_results([], files_done=len(files))
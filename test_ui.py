@@ -1,8 +1,13 @@
-from flask import Flask, render_template, jsonify
-import subprocess
+from flask import Flask, Response, render_template, jsonify, request
 import json
 
+from suite_runner import SuiteRunner
+
 app = Flask(__name__)
+runner = SuiteRunner()
+
+# Seconds between keep-alive comments on an idle progress stream
+STREAM_KEEPALIVE_SECONDS = 15
 
 @app.route('/')
 def test_dashboard():
@@ -11,82 +16,51 @@ def test_dashboard():
 
 @app.route('/run_tests', methods=['POST'])
 def run_tests():
-    """Execute pytest and return results"""
+    """Start a background test run and return its job id"""
+    options = request.get_json(silent=True) or {}
     try:
-        # Run pytest with JSON output
-        result = subprocess.run(
-            ['python3', 'run_tests.py'],
-            capture_output=True,
-            text=True
+        job = runner.start(
+            markexpr="not integration" if options.get('skip_integration') else None,
+            use_cache=not options.get('force'),
+            workers=int(options['workers']) if options.get('workers') else None,
         )
-        
-        # Parse the output
-        output_lines = result.stdout.split('\n')
-        test_results = []
-        current_test = None
-        
-        for line in output_lines:
-            if '::test_' in line:
-                # Extract test information
-                parts = line.split('::')
-                if len(parts) >= 2:
-                    test_name = parts[1].split()[0]
-                    status = 'PASSED' if 'PASSED' in line else 'FAILED'
-                    if '[' in line and ']' in line:
-                        duration = line[line.find('[')+1:line.find(']')]
-                    else:
-                        duration = 'N/A'
-                    
-                    # Get test description from docstring
-                    description = ""
-                    try:
-                        with open('tests/test_stock_notifications.py', 'r') as f:
-                            test_content = f.read()
-                            test_lines = test_content.split('\n')
-                            for i, content in enumerate(test_lines):
-                                if f'def {test_name}' in content:
-                                    # Look for docstring in next lines
-                                    if i + 1 < len(test_lines) and '"""' in test_lines[i + 1]:
-                                        description = test_lines[i + 1].split('"""')[1].strip()
-                    except Exception as e:
-                        print(f"Error reading test description: {e}")
-                    
-                    test_results.append({
-                        "name": test_name,
-                        "status": status,
-                        "duration": duration,
-                        "description": description
-                    })
-        
-        # Process any errors
-        error_message = None
-        if result.stderr:
-            error_lines = result.stderr.split('\n')
-            error_message = '\n'.join(line for line in error_lines if line.strip())
-
-        return jsonify({
-            'success': result.returncode == 0,
-            'results': test_results,
-            'error': error_message,
-            'summary': {
-                'total': len(test_results),
-                'passed': sum(1 for test in test_results if test['status'] == 'PASSED'),
-                'failed': sum(1 for test in test_results if test['status'] == 'FAILED')
-            }
-        })
-        
     except Exception as e:
-        import traceback
-        return jsonify({
-            'success': False,
-            'results': [],
-            'error': f"Error executing tests: {str(e)}\n{traceback.format_exc()}",
-            'summary': {
-                'total': 0,
-                'passed': 0,
-                'failed': 0
-            }
-        })
+        return jsonify({'success': False, 'error': f"Error starting tests: {str(e)}"}), 500
+    return jsonify({'success': True, 'job': job.summary()}), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Current summary and every result of a test run"""
+    job = runner.jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown job {job_id}"}), 404
+    return jsonify({'job': job.summary(), 'results': list(job.results)})
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream results as server-sent events while the run progresses, then a final summary"""
+    job = runner.jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f"Unknown job {job_id}"}), 404
+
+    def events():
+        seen = 0
+        running = True
+        while running:
+            running = job.wait(seen, timeout=STREAM_KEEPALIVE_SECONDS)
+            results = job.results[seen:]
+            seen += len(results)
+            for result in results:
+                yield f"event: result\ndata: {json.dumps(result)}\n\n"
+            yield f"event: progress\ndata: {json.dumps(job.summary())}\n\n"
+        yield f"event: done\ndata: {json.dumps(job.summary())}\n\n"
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/durations')
+def durations():
+    """Duration history per test, slowest on average first"""
+    return jsonify({'tests': runner.history.summary()})
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=3000)
+    app.run(host='0.0.0.0', port=3000, threaded=True)
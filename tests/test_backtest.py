@@ -0,0 +1,51 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import time
+
+import numpy as np
+
+from backtest import run_backtest
+from providers import LocalProvider
+from rules import build_panel
+
+
+def test_backtest_counts_fires_and_alerts():
+    """Test fire counts match a direct scan and alerts count only rising edges"""
+    hist = LocalProvider().history("AAPL", period="5y")
+    daily = (hist["Close"] / hist["Close"].shift(1) - 1) * 100
+    rules = [
+        {"id": "up", "symbol": "AAPL", "percentage": 2.0},
+        {"id": "down", "symbol": "AAPL", "percentage": -2.0},
+    ]
+
+    results = run_backtest(rules, build_panel({"AAPL": hist})).set_index("rule_id")
+
+    assert results.loc["up", "fired_bars"] == (daily >= 2.0).sum()
+    assert results.loc["down", "fired_bars"] == (daily <= -2.0).sum()
+    up = (daily >= 2.0).to_numpy()
+    assert results.loc["up", "alerts"] == (up & ~np.concatenate([[False], up[:-1]])).sum()
+
+
+def test_backtest_many_rules_over_years_is_fast():
+    """Test thousands of rules over ten years of bars backtest in seconds"""
+    provider = LocalProvider()
+    symbols = [f"SYM{i:03d}" for i in range(100)]
+    panel = build_panel({symbol: provider.history(symbol, period="10y") for symbol in symbols})
+    rng = np.random.default_rng(0)
+    rules = [
+        {"id": str(i), "symbol": symbols[i % 100], "percentage": float(rng.uniform(-8, 8)),
+         "window": ["1d", "5d", "open", "intraday"][i % 4]}
+        for i in range(5000)
+    ]
+
+    started = time.perf_counter()
+    results = run_backtest(rules, panel)
+
+    assert len(results) == 5000
+    assert time.perf_counter() - started < 10
@@ -0,0 +1,37 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from charting import build_candlestick_figure, downsample_ohlc
+from providers import LocalProvider
+
+
+def test_long_periods_are_bucketed_with_ohlc_preserved():
+    """Test five years of daily bars become weekly candles that keep extremes"""
+    hist = LocalProvider().history("AAPL", period="5y")
+
+    bars, label = downsample_ohlc(hist, max_points=300)
+
+    assert label == "weekly"
+    assert len(bars) <= 300
+    assert bars["High"].max() == hist["High"].max()
+    assert bars["Low"].min() == hist["Low"].min()
+    assert bars["Close"].iloc[-1] == hist["Close"].iloc[-1]
+    assert bars["Volume"].sum() == hist["Volume"].sum()
+
+
+def test_figure_size_flat_across_periods():
+    """Test the plotted candle count stays bounded whatever the period"""
+    provider = LocalProvider()
+    short = provider.history("AAPL", period="6mo")
+    points = {
+        period: len(build_candlestick_figure(provider.history("AAPL", period=period), "AAPL", max_points=300).data[0].x)
+        for period in ("6mo", "1y", "2y", "5y", "max")
+    }
+
+    assert points["6mo"] == len(short)
+    assert max(points.values()) <= 300
@@ -0,0 +1,59 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from comparison import aligned_closes, normalized_performance, performance_table, relative_strength, return_correlation
+
+
+def _history(closes, start="2024-01-01", tz=None):
+    index = pd.date_range(start, periods=len(closes), freq="B", tz=tz)
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 1000.0}, index=index)
+
+
+def test_aligned_closes_share_session_dates_and_rebase():
+    """Test symbols from different timezones and start dates line up as float32 and rebase to 100"""
+    closes = aligned_closes({
+        "AAPL": _history([100, 110, 121], tz="America/New_York"),
+        "SAP": _history([50, 55], start="2024-01-02", tz="Europe/Berlin"),
+        "NONE": pd.DataFrame(),
+    })
+    assert list(closes.columns) == ["AAPL", "SAP"]
+    assert (closes.dtypes == np.float32).all()
+    assert len(closes) == 3
+    assert np.isnan(closes["SAP"].iloc[0])
+
+    normalized = normalized_performance(closes)
+    np.testing.assert_allclose(normalized["AAPL"], [100, 110, 121], rtol=1e-6)
+    np.testing.assert_allclose(normalized["SAP"].iloc[1:], [100, 110], rtol=1e-6)
+
+
+def test_performance_table_ranks_relative_strength_against_benchmark():
+    """Test trailing returns, excess return over the benchmark, correlation and the relative strength line"""
+    days = 70
+    closes = aligned_closes({
+        "SPY": _history(np.linspace(100, 110, days)),
+        "FAST": _history(np.linspace(100, 150, days)),
+        "SLOW": _history(np.linspace(100, 90, days)),
+    })
+    table = performance_table(closes, "SPY")
+
+    assert list(table.index) == ["FAST", "SPY", "SLOW"]
+    fast_3m = (150 / closes["FAST"].iloc[-64] - 1) * 100
+    assert np.isclose(table.loc["FAST", "return_3M"], fast_3m, rtol=1e-5)
+    assert np.isclose(table.loc["FAST", "vs_SPY"], fast_3m - table.loc["SPY", "return_3M"], rtol=1e-5)
+    assert np.isnan(table.loc["FAST", "return_6M"])
+    assert table.loc["FAST", "rs_rank"] == 100
+    assert table.loc["SLOW", "max_drawdown"] < 0
+
+    assert relative_strength(closes, "FAST")["SPY"].iloc[-1] < 100
+    corr = return_correlation(closes)
+    assert corr.shape == (3, 3)
+    np.testing.assert_allclose(np.diag(corr), 1.0)
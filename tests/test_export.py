@@ -0,0 +1,55 @@
+import pytest
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import io
+
+import pandas as pd
+import pyarrow.ipc as ipc
+
+from export import EXPORT_FORMATS, export_bytes, iter_frame_chunks, with_symbol
+from providers import LocalProvider
+from streaming import compact_ohlcv
+
+
+def _read(data: bytes, fmt: str) -> pd.DataFrame:
+    if fmt == "csv":
+        return pd.read_csv(io.BytesIO(data))
+    if fmt == "csv.gz":
+        return pd.read_csv(io.BytesIO(data), compression="gzip")
+    if fmt == "parquet":
+        return pd.read_parquet(io.BytesIO(data))
+    return ipc.open_file(io.BytesIO(data)).read_pandas()
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+def test_chunked_export_round_trips(fmt):
+    """Test every format writes all chunks with one header and one schema"""
+    hist = LocalProvider().history("AAPL", period="1y")
+    chunks = [compact_ohlcv(chunk) for chunk in iter_frame_chunks(hist, chunk_rows=40)]
+
+    exported = _read(export_bytes(with_symbol(chunks, "AAPL"), fmt), fmt)
+
+    assert len(exported) == len(hist)
+    assert set(exported["Symbol"]) == {"AAPL"}
+    assert abs(exported["Close"].to_numpy() - hist["Close"].to_numpy()).max() < 1e-3
+
+
+def test_multi_symbol_export_concatenates_streams():
+    """Test several symbols stream into a single export"""
+    provider = LocalProvider()
+    def all_chunks():
+        for symbol in ["AAPL", "MSFT"]:
+            yield from with_symbol(iter_frame_chunks(provider.history(symbol, period="1mo"), chunk_rows=5), symbol)
+
+    exported = _read(export_bytes(all_chunks(), "parquet"), "parquet")
+
+    assert exported.groupby("Symbol").size().to_dict() == {
+        "AAPL": len(provider.history("AAPL", period="1mo")),
+        "MSFT": len(provider.history("MSFT", period="1mo")),
+    }
@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import threading
+import time
+
+from fetcher import FetchEngine, RateLimiter
+
+
+def test_fetch_many_keeps_order_and_reports_errors():
+    """Test results come back in request order with per-symbol errors"""
+    def fetch(symbol):
+        if symbol == "BAD":
+            raise ValueError("unknown symbol")
+        if symbol == "EMPTY":
+            return None
+        time.sleep(0.05 if symbol == "SLOW" else 0)
+        return symbol.lower()
+
+    results = FetchEngine(max_workers=4).fetch_many(fetch, ["SLOW", "BAD", "FAST", "EMPTY"])
+
+    assert [r.symbol for r in results] == ["SLOW", "BAD", "FAST", "EMPTY"]
+    assert [r.value for r in results] == ["slow", None, "fast", None]
+    assert results[1].error == "ValueError: unknown symbol"
+    assert results[3].error == "No data returned"
+
+
+def test_identical_requests_share_one_call():
+    """Test concurrent requests for the same symbol are merged"""
+    calls = []
+    release = threading.Event()
+    def fetch(symbol, period):
+        calls.append(symbol)
+        release.wait(1)
+        return period
+
+    engine = FetchEngine(max_workers=4)
+    futures = [engine.submit(fetch, "AAPL", "1y") for _ in range(5)]
+    release.set()
+
+    assert [f.result() for f in futures] == ["1y"] * 5
+    assert calls == ["AAPL"]
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_fetches_run_concurrently_up_to_worker_count(workers):
+    """Test a batch keeps every worker busy at once, and never more"""
+    lock = threading.Lock()
+    full = threading.Event()
+    active = 0
+    peak = 0
+    def fetch(symbol):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+            if active == workers:
+                full.set()
+        # Hold each call until all workers are in one, so the peak does not depend on timing
+        full.wait(5)
+        with lock:
+            active -= 1
+        return symbol
+
+    symbols = [f"S{i}" for i in range(16)]
+    results = FetchEngine(max_workers=workers, requests_per_second=1000).fetch_many(fetch, symbols)
+
+    assert [r.value for r in results] == symbols
+    assert peak == workers
+
+
+def test_rate_limiter_caps_request_rate():
+    """Test the token bucket spaces requests beyond the burst"""
+    limiter = RateLimiter(rate=50, burst=1)
+    started = time.perf_counter()
+    for _ in range(11):
+        limiter.acquire()
+
+    assert time.perf_counter() - started >= 0.18
+
+
+def test_only_network_fetches_take_rate_limit_tokens(mocker):
+    """Test jobs served locally are not throttled while network fetches are"""
+    acquire = mocker.spy(RateLimiter, "acquire")
+    engine = FetchEngine(max_workers=4, requests_per_second=1000)
+    def cached(symbol):
+        return symbol
+    def download(symbol):
+        engine.throttle()
+        return symbol
+
+    engine.fetch_many(cached, [f"S{i}" for i in range(60)])
+    assert acquire.call_count == 0
+
+    engine.fetch_many(download, [f"S{i}" for i in range(30)])
+    assert acquire.call_count == 30
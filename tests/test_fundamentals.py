@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import json
+
+from fundamentals import FundamentalsCache
+
+FULL_INFO = {
+    "longName": "Apple Inc.",
+    "marketCap": 3.0e12,
+    "trailingPE": 30.5,
+    "longBusinessSummary": "A very long description " * 100,
+}
+
+
+def test_fundamentals_cached_on_disk_with_requested_fields(tmp_path):
+    """Test fundamentals keep only requested fields and are reused from disk"""
+    calls = []
+    def fetch(symbol):
+        calls.append(symbol)
+        return FULL_INFO
+
+    first = FundamentalsCache(tmp_path, fetch=fetch).get("aapl", ("longName", "marketCap"))
+    second = FundamentalsCache(tmp_path, fetch=fetch).get("AAPL", ("marketCap",))
+
+    assert calls == ["AAPL"]
+    assert first == {"longName": "Apple Inc.", "marketCap": 3.0e12}
+    assert second == {"marketCap": 3.0e12}
+    with open(tmp_path / "AAPL.json") as f:
+        assert "longBusinessSummary" not in json.load(f)["data"]
+    # peek reads only what is already cached and fresh, and never fetches
+    assert FundamentalsCache(tmp_path).peek("aapl", ("marketCap",)) == {"marketCap": 3.0e12}
+    assert FundamentalsCache(tmp_path).peek("AAPL", ("marketCap", "trailingPE")) is None
+    assert FundamentalsCache(tmp_path, ttl_seconds=0).peek("AAPL", ("marketCap",)) is None
+    assert calls == ["AAPL"]
+
+
+def test_stale_fundamentals_served_when_refresh_fails(tmp_path):
+    """Test an expired entry is still returned if the refresh fails"""
+    FundamentalsCache(tmp_path, fetch=lambda symbol: FULL_INFO).get("AAPL", ("trailingPE",))
+
+    expired = FundamentalsCache(tmp_path, fetch=lambda symbol: None, ttl_seconds=0)
+
+    assert expired.get("AAPL", ("trailingPE",)) == {"trailingPE": 30.5}
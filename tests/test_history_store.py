@@ -0,0 +1,76 @@
+import pytest
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pandas as pd
+
+from history_store import PERIOD_OFFSETS, HistoryStore, period_for_bars
+
+
+class FakeFetch:
+    """Serve bars from a fixed daily frame and record every call"""
+
+    def __init__(self, days=800):
+        end = pd.Timestamp.now(tz="America/New_York").normalize()
+        index = pd.date_range(end=end, periods=days, freq="D")
+        self.frame = pd.DataFrame({"Close": range(days)}, index=index, dtype=float)
+        self.calls = []
+
+    def __call__(self, symbol, period=None, start=None):
+        self.calls.append((period, start))
+        if start is not None:
+            return self.frame[self.frame.index >= pd.Timestamp(start, tz=self.frame.index.tz)]
+        cutoff = pd.Timestamp.now(tz="UTC") - PERIOD_OFFSETS[period]
+        return self.frame[self.frame.index >= cutoff]
+
+
+def test_period_switch_served_from_disk(tmp_path):
+    """Test shorter periods are sliced from the stored history without a fetch"""
+    fetch = FakeFetch()
+    store = HistoryStore(tmp_path, fetch=fetch)
+
+    year = store.get_history("AAPL", "1y")
+    month = HistoryStore(tmp_path, fetch=fetch).get_history("AAPL", "1mo")
+
+    assert len(fetch.calls) == 1
+    assert (tmp_path / "AAPL.parquet").exists()
+    assert month.index[-1] == year.index[-1]
+    assert len(month) < len(year)
+
+
+def test_stale_store_fetches_only_tail(tmp_path):
+    """Test a stale store requests bars from the last stored bar onward"""
+    fetch = FakeFetch()
+    HistoryStore(tmp_path, fetch=fetch).get_history("AAPL", "1y")
+
+    stale_store = HistoryStore(tmp_path, fetch=fetch, refresh_seconds=0)
+    hist = stale_store.get_history("AAPL", "1y")
+
+    assert fetch.calls[-1][0] is None
+    assert fetch.calls[-1][1] == hist.index[-1].strftime("%Y-%m-%d")
+    assert not hist.index.duplicated().any()
+
+
+def test_failed_tail_fetch_leaves_store_due_for_refresh(tmp_path):
+    """Test a failed top-up serves stored bars without marking them fresh"""
+    fetch = FakeFetch()
+    HistoryStore(tmp_path, fetch=fetch).get_history("AAPL", "1y")
+    refreshed_at = HistoryStore(tmp_path)._read_manifest()["AAPL"]["refreshed_at"]
+
+    def failing(symbol, period=None, start=None):
+        raise ConnectionError("offline")
+    hist = HistoryStore(tmp_path, fetch=failing, refresh_seconds=0).get_history("AAPL", "1y")
+
+    assert not hist.empty
+    assert HistoryStore(tmp_path)._read_manifest()["AAPL"]["refreshed_at"] == refreshed_at
+
+
+@pytest.mark.parametrize("bars, period", [(1, "1mo"), (21, "3mo"), (252, "1y"), (300, "2y"), (100000, "max")])
+def test_period_for_bars_covers_weekends_and_holidays(bars, period):
+    """Test the chosen period is the shortest one whose span holds the requested daily bars"""
+    assert period_for_bars(bars) == period
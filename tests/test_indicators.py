@@ -0,0 +1,91 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from charting import build_candlestick_figure
+from indicators import IndicatorCache, compute_indicator
+from providers import LocalProvider
+from rules import IndicatorRuleSet, RuleSet
+
+
+def test_indicator_values():
+    """Test indicators against hand-computed values"""
+    close = pd.Series([10.0, 11.0, 12.0, 11.0, 13.0], index=pd.date_range("2024-01-01", periods=5))
+    hist = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 100})
+
+    assert compute_indicator(hist, "sma", {"window": 3})["sma"].iloc[-1] == 12.0
+    assert compute_indicator(hist, "drawdown")["drawdown"].iloc[3] == (11 / 12 - 1) * 100
+    bands = compute_indicator(hist, "bollinger", {"window": 3})
+    assert np.isclose(bands["bb_upper"].iloc[-1] - bands["bb_mid"].iloc[-1], 2 * close.iloc[-3:].std())
+    # Only gains so far, so RSI is pinned at 100
+    assert compute_indicator(hist.iloc[:3], "rsi", {"period": 2})["rsi"].iloc[-1] == 100.0
+
+
+def test_cache_updates_tail_to_match_full_recompute():
+    """Test new bars extend a cached indicator without drifting from a full recompute"""
+    hist = LocalProvider().history("AAPL", period="2y")
+    cache = IndicatorCache()
+
+    for name in ["sma", "bollinger", "ema", "rsi", "drawdown"]:
+        cache.get("AAPL", "2y", hist.iloc[:-5], name)
+        updated = cache.get("AAPL", "2y", hist, name)
+        expected = compute_indicator(hist, name)
+        pd.testing.assert_frame_equal(updated, expected, atol=1e-6)
+
+
+def test_cache_recomputes_when_last_bar_is_revised_in_place():
+    """Test a live bar revised without a new timestamp updates the cached indicator"""
+    hist = LocalProvider().history("AAPL", period="1y")
+    cache = IndicatorCache()
+    cache.get("AAPL", "1y", hist, "sma")
+
+    revised = hist.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] *= 1.5
+    updated = cache.get("AAPL", "1y", revised, "sma")
+
+    pd.testing.assert_frame_equal(updated, compute_indicator(revised, "sma"), atol=1e-6)
+    assert updated["sma"].iloc[-1] != compute_indicator(hist, "sma")["sma"].iloc[-1]
+
+
+def test_indicator_rules_evaluated_apart_from_percentage_rules():
+    """Test indicator rules fire on latest values and are ignored by RuleSet"""
+    rules = [
+        {"id": "pct", "symbol": "AAPL", "percentage": 5.0},
+        {"id": "overbought", "symbol": "AAPL", "indicator": "rsi", "operator": ">=", "value": 70},
+        {"id": "oversold", "symbol": "AAPL", "indicator": "rsi", "operator": "<=", "value": 30},
+        {"id": "deep", "symbol": "MSFT", "indicator": "drawdown", "operator": "<=", "value": -20},
+    ]
+    indicator_rules = IndicatorRuleSet(rules)
+
+    assert len(RuleSet(rules)) == 1
+    assert indicator_rules.requirements() == {"AAPL": [("rsi", (("period", 14),))], "MSFT": [("drawdown", ())]}
+
+    triggered = indicator_rules.evaluate({
+        "AAPL": {("rsi", (("period", 14),)): {"rsi": 75.0}},
+        "MSFT": {("drawdown", ()): {"drawdown": -10.0}},
+    })
+    assert list(triggered["rule_id"]) == ["overbought"]
+    assert triggered["value"].iloc[0] == 75.0
+
+
+def test_figure_overlays_and_panels():
+    """Test overlays share the candle axis and oscillators get their own panel"""
+    hist = LocalProvider().history("AAPL", period="5y")
+    indicators = {
+        "sma": ("SMA", compute_indicator(hist, "sma")),
+        "rsi": ("RSI", compute_indicator(hist, "rsi")),
+    }
+
+    fig = build_candlestick_figure(hist, "AAPL", max_points=300, indicators=indicators)
+
+    candles, sma_line, rsi_line = fig.data
+    assert len(sma_line.x) == len(candles.x) <= 300
+    assert sma_line.yaxis == candles.yaxis
+    assert rsi_line.yaxis != candles.yaxis
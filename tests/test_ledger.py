@@ -0,0 +1,79 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from ledger import NotificationLedger, group_by_alerts
+
+AAPL = {"symbol": "AAPL", "price_change_pct": 6.0, "threshold": 5.0, "rule_id": "a"}
+MSFT = {"symbol": "MSFT", "price_change_pct": -4.0, "threshold": -3.0, "rule_id": "m"}
+
+
+def test_rising_only_passes_rules_that_start_firing():
+    """Test a rule alerts once while it stays true and again after it resets"""
+    ledger = NotificationLedger(path=None)
+
+    assert ledger.rising([AAPL, MSFT], {"AAPL", "MSFT"}) == [AAPL, MSFT]
+    assert ledger.rising([AAPL, MSFT], {"AAPL", "MSFT"}) == []
+    # MSFT was not checked this time, so it keeps firing state; AAPL stopped firing
+    assert ledger.rising([], {"AAPL"}) == []
+    assert ledger.rising([AAPL, MSFT], {"AAPL", "MSFT"}) == [AAPL]
+
+
+def test_cooldown_is_per_rule_and_recipient(tmp_path):
+    """Test cooldowns hold back repeats per recipient and survive a restart"""
+    path = tmp_path / "ledger.json"
+    ledger = NotificationLedger(path=path, cooldown_seconds=600)
+
+    first = ledger.due(["a@example.com"], [AAPL], now=1000)
+    reopened = NotificationLedger(path=path, cooldown_seconds=600)
+    second = reopened.due(["a@example.com", "b@example.com"], [AAPL, MSFT], now=1300)
+    later = reopened.due(["a@example.com"], [AAPL], now=1700)
+
+    assert first == {"a@example.com": [AAPL]}
+    assert second == {"a@example.com": [MSFT], "b@example.com": [AAPL, MSFT]}
+    assert later == {"a@example.com": [AAPL]}
+    assert group_by_alerts(second) == [(["a@example.com"], [MSFT]), (["b@example.com"], [AAPL, MSFT])]
+
+
+def test_processes_sharing_a_ledger_keep_each_others_state(tmp_path):
+    """Test two ledgers on one file, like the app and the monitor, merge rather than overwrite"""
+    path = tmp_path / "ledger.json"
+    app = NotificationLedger(path=path, cooldown_seconds=600)
+    monitor = NotificationLedger(path=path, cooldown_seconds=600)
+
+    assert app.due(["a@example.com"], [AAPL], now=1000) == {"a@example.com": [AAPL]}
+    assert monitor.rising([MSFT], {"MSFT"}, scope="moves") == [MSFT]
+    # The monitor's write kept the app's cooldown, and the app's next write keeps the monitor's firing state
+    assert monitor.due(["a@example.com"], [AAPL], now=1100) == {}
+    app.rising([AAPL], {"AAPL"}, scope="simulation")
+    assert monitor.rising([MSFT], {"MSFT"}, scope="moves") == []
+
+
+def test_simulation_send_does_not_hold_back_monitor_alert(tmp_path):
+    """Test cooldowns are per scope, so a what-if email does not suppress the monitor's real alert"""
+    path = tmp_path / "ledger.json"
+    app = NotificationLedger(path=path, cooldown_seconds=600)
+    monitor = NotificationLedger(path=path, cooldown_seconds=600)
+
+    assert app.due(["a@example.com"], [AAPL], now=1000, scope="simulation") == {"a@example.com": [AAPL]}
+    assert monitor.due(["a@example.com"], [AAPL], now=1100, scope="monitor") == {"a@example.com": [AAPL]}
+    assert app.due(["a@example.com"], [AAPL], now=1200, scope="simulation") == {}
+
+    monitor.release("a@example.com", [AAPL], scope="monitor")
+    assert app.due(["a@example.com"], [AAPL], now=1300, scope="simulation") == {}
+
+
+def test_release_retries_undelivered_alerts():
+    """Test a failed send neither starts the cooldown nor leaves the rule marked as already alerted"""
+    ledger = NotificationLedger(path=None, cooldown_seconds=600)
+    assert ledger.rising([AAPL], {"AAPL"}) == [AAPL]
+    assert ledger.due(["a@example.com", "b@example.com"], [AAPL], now=1000) == {"a@example.com": [AAPL], "b@example.com": [AAPL]}
+
+    ledger.release("b@example.com", [AAPL])
+
+    assert ledger.rising([AAPL], {"AAPL"}) == [AAPL]
+    assert ledger.due(["a@example.com", "b@example.com"], [AAPL], now=1100) == {"b@example.com": [AAPL]}
@@ -0,0 +1,100 @@
+import pytest
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import smtplib
+
+from mailer import MailQueue, SmtpMailer
+
+SETTINGS = {
+    "server": "smtp.test.com",
+    "port": 587,
+    "sender": "alerts@example.com",
+    "password": "password123",
+}
+
+TRIGGERED = [{'symbol': 'AAPL', 'price_change_pct': 5.5, 'threshold': 5.0}]
+
+
+@pytest.mark.mock
+@pytest.mark.parametrize("recipients", [1, 10, 200])
+def test_connection_count_constant_across_recipients(mocker, recipients):
+    """Test one SMTP connection is reused for every recipient"""
+    mock_smtp = mocker.patch('smtplib.SMTP')
+    email_list = [f"user{i}@example.com" for i in range(recipients)]
+
+    with SmtpMailer(SETTINGS) as mailer:
+        sent = mailer.send_alerts(email_list, TRIGGERED)
+
+    assert sent == recipients
+    assert mock_smtp.call_count == 1
+    assert mock_smtp.return_value.login.call_count == 1
+    assert mock_smtp.return_value.send_message.call_count == recipients
+
+
+@pytest.mark.mock
+def test_reconnects_after_disconnect(mocker):
+    """Test a dropped connection is reopened and the message retried"""
+    mock_smtp = mocker.patch('smtplib.SMTP')
+    mock_smtp.return_value.send_message.side_effect = [smtplib.SMTPServerDisconnected("gone"), {}]
+    mocker.patch('time.sleep')
+
+    mailer = SmtpMailer(SETTINGS)
+    assert mailer.send_alerts(["a@example.com"], TRIGGERED) == 1
+    assert mailer.connections_opened == 2
+
+
+@pytest.mark.mock
+def test_failed_login_closes_connection(mocker):
+    """Test a connection that fails to authenticate is closed, not leaked"""
+    mock_smtp = mocker.patch('smtplib.SMTP')
+    mock_smtp.return_value.login.side_effect = smtplib.SMTPAuthenticationError(535, b"bad credentials")
+
+    mailer = SmtpMailer(SETTINGS)
+    assert mailer.send_alerts(["a@example.com"], TRIGGERED) == 0
+    assert mock_smtp.return_value.close.call_count == 1
+    assert mailer.connections_opened == 0
+
+@pytest.mark.mock
+def test_mail_queue_sends_in_background(mocker):
+    """Test queued alerts are delivered by the background worker"""
+    mock_smtp = mocker.patch('smtplib.SMTP')
+    mail_queue = MailQueue(settings_loader=lambda: SETTINGS)
+
+    mail_queue.submit(["a@example.com", "b@example.com"], TRIGGERED)
+    mail_queue.submit(["c@example.com"], TRIGGERED)
+    mail_queue.join()
+
+    assert mock_smtp.return_value.send_message.call_count == 3
+
+    # Without SMTP settings nothing is delivered, and every recipient is reported back
+    failed = []
+    unconfigured = MailQueue(settings_loader=lambda: None, on_failure=lambda recipient, alerts: failed.append(recipient))
+    unconfigured.submit(["a@example.com", "b@example.com"], TRIGGERED)
+    unconfigured.join()
+    assert sorted(failed) == ["a@example.com", "b@example.com"]
+
+
+@pytest.mark.mock
+def test_mail_queue_coalesces_digest(mocker):
+    """Test alerts queued within the digest window go out as one message per recipient"""
+    mock_smtp = mocker.patch('smtplib.SMTP')
+    mail_queue = MailQueue(settings_loader=lambda: SETTINGS, digest_seconds=0.2)
+    msft = {'symbol': 'MSFT', 'price_change_pct': -4.0, 'threshold': -3.0}
+
+    mail_queue.submit(["a@example.com", "b@example.com"], TRIGGERED)
+    mail_queue.submit(["a@example.com"], [msft])
+    mail_queue.submit(["a@example.com"], TRIGGERED)
+    mail_queue.join()
+
+    messages = [call.args[0] for call in mock_smtp.return_value.send_message.call_args_list]
+    assert sorted((m["To"], m["Subject"]) for m in messages) == [
+        ("a@example.com", "Stock Price Alert: AAPL, MSFT"),
+        ("b@example.com", "Stock Price Alert: AAPL"),
+    ]
+    assert mail_queue.messages_sent == 2
@@ -0,0 +1,75 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import json
+
+import pandas as pd
+
+from monitor import AlertMonitor
+from rules import build_panel
+
+
+def test_monitor_notifies_only_new_triggers(tmp_path):
+    """Test the monitor batches symbols and emails each trigger once"""
+    config_path = tmp_path / "monitor_config.json"
+    config_path.write_text(json.dumps({
+        "rules": [
+            {"id": "1", "symbol": "AAPL", "percentage": 2.0},
+            {"id": "2", "symbol": "MSFT", "percentage": 5.0},
+            {"id": "3", "symbol": "TSLA", "percentage": -1.0},
+        ],
+        "email_list": ["test@example.com"]
+    }))
+    moves = {"AAPL": 3.0, "MSFT": 1.0, "TSLA": -0.5}
+    batches, sent = [], []
+
+    def fetch_moves(symbols):
+        batches.append(list(symbols))
+        return pd.DataFrame({"price_change_pct": [moves[s] for s in symbols]}, index=symbols)
+
+    monitor = AlertMonitor(str(config_path), batch_size=2, fetch_moves=fetch_moves,
+                           notify=lambda emails, stocks: sent.append(stocks))
+
+    first = monitor.run_cycle()
+    second = monitor.run_cycle()
+    moves["TSLA"] = -1.5
+    third = monitor.run_cycle()
+
+    assert sorted(batches[:2]) == [["AAPL", "MSFT"], ["TSLA"]]
+    assert (first["new_triggers"], second["new_triggers"], third["new_triggers"]) == (1, 0, 1)
+    assert [stocks[0]["symbol"] for stocks in sent] == ["AAPL", "TSLA"]
+    assert first["symbols_priced"] == 3
+
+
+def test_monitor_evaluates_history_rules_on_latest_bar(tmp_path):
+    """Test windowed and price-level rules are checked against stored history"""
+    config_path = tmp_path / "monitor_config.json"
+    config_path.write_text(json.dumps({
+        "rules": [
+            {"id": "week", "symbol": "AAPL", "percentage": -5.0, "window": "5d"},
+            {"id": "level", "symbol": "AAPL", "price": 150.0, "direction": "up"},
+        ],
+        "email_list": ["test@example.com"]
+    }))
+    index = pd.date_range("2024-01-01", periods=6, freq="B")
+    close = [160.0, 158.0, 155.0, 153.0, 152.0, 151.0]
+    hist = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 100}, index=index)
+    sent = []
+    periods = []
+
+    monitor = AlertMonitor(str(config_path), fetch_moves=lambda symbols: None,
+                           notify=lambda emails, stocks: sent.append(stocks),
+                           fetch_panel=lambda symbols, period: periods.append(period) or build_panel({"AAPL": hist}))
+    stats = monitor.run_cycle()
+
+    assert stats["rules"] == 2 and stats["triggered"] == 2
+    # A 5-bar window needs a month of history, not the full year
+    assert periods == ["1mo"]
+    assert sorted(stock["description"] for stock in sent[0]) == [
+        "Percentage: -5.0% (down, 5 days)", "Price at or above $150.00"
+    ]
@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pandas as pd
+
+from benchmarks import find_regressions
+from history_store import HistoryStore
+from providers import LocalProvider, YahooProvider, provider_store_dir
+
+
+def test_local_provider_is_deterministic():
+    """Test synthetic history is identical across provider instances"""
+    first = LocalProvider().history("AAPL", period="1y")
+    second = LocalProvider().history("aapl", period="1y")
+
+    pd.testing.assert_frame_equal(first, second)
+    assert {"Open", "High", "Low", "Close", "Volume"} <= set(first.columns)
+    assert (first["High"] >= first["Low"]).all()
+    assert LocalProvider().info("AAPL")["longName"] == "AAPL (synthetic)"
+
+
+def test_local_provider_replays_recordings(tmp_path):
+    """Test recorded OHLCV is served through the history store offline"""
+    index = pd.date_range(end=pd.Timestamp.now(tz="America/New_York").normalize(), periods=3, freq="D")
+    recorded = pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": [1.0, 1.5, 1.25], "Volume": 10}, index=index)
+    recorded.to_parquet(tmp_path / "ZZZ.parquet")
+
+    store = HistoryStore(tmp_path / "store", fetch=LocalProvider(tmp_path).history)
+    hist = store.get_history("ZZZ", "1mo")
+
+    assert list(hist["Close"]) == [1.0, 1.5, 1.25]
+
+
+def test_find_regressions_flags_slower_cases():
+    """Test benchmark comparison reports only cases beyond the tolerance"""
+    baseline = {"fast": {"median": 1.0}, "slow": {"median": 1.0}}
+    current = {"fast": {"median": 1.1}, "slow": {"median": 2.0}, "new": {"median": 5.0}}
+
+    assert find_regressions(current, baseline, tolerance=0.25) == [("slow", 1.0, 2.0)]
+
+
+def test_providers_keep_stored_data_apart(tmp_path):
+    """Test each provider gets its own store, and switching providers drops data cached from the old one"""
+    import utils
+
+    assert provider_store_dir(LocalProvider(), tmp_path) != provider_store_dir(YahooProvider(), tmp_path)
+    original = utils.provider
+    try:
+        utils.set_provider(LocalProvider())
+        utils.shared_cache.get(("history", "AAPL", "1y"), lambda: "local bars")
+        utils.set_provider(YahooProvider())
+        assert utils.history_store.root.name == "yahoo"
+        assert utils.fundamentals_cache.root.parent.name == "yahoo"
+        assert utils.shared_cache.stats()["entries"] == 0
+    finally:
+        utils.set_provider(original)
@@ -0,0 +1,96 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import io
+
+from repository import Repository
+
+
+def test_rules_persist_in_order_with_paging(tmp_path):
+    """Test rules survive reopening, keep insertion order and page by offset"""
+    path = tmp_path / "app.db"
+    repository = Repository(path, batch_rows=100)
+    written = repository.add_rules(
+        {"id": str(i), "symbol": "aapl" if i % 2 else "msft", "percentage": float(i % 10 + 1)} for i in range(2500)
+    )
+
+    reopened = Repository(path)
+    page = reopened.list_rules(limit=20, offset=40)
+
+    assert written == 2500
+    assert reopened.count_rules() == 2500
+    assert reopened.count_rules("AAPL") == 1250
+    assert [rule["id"] for rule in page] == [str(i) for i in range(40, 60)]
+    assert reopened.delete_rules(["0", "1", "missing"]) == 2
+    assert reopened.list_rules(limit=1)[0]["id"] == "2"
+
+
+def test_rule_csv_round_trip(tmp_path):
+    """Test every rule kind survives export and re-import, and bad rows are skipped"""
+    source = io.StringIO(
+        "id,symbol,percentage,direction,window,price,volume_multiple,indicator,params,operator,value\n"
+        "p,aapl,-3,,5d,,,,,,\n"
+        "l,msft,,up,,400,,,,,\n"
+        "v,tsla,,,20d,,3,,,,\n"
+        "r,nvda,,,,,,rsi,\"{\"\"period\"\": 14}\",>=,70\n"
+        "bad,goog,,sideways,,,,,,,\n"
+    )
+    repository = Repository(tmp_path / "a.db")
+
+    assert repository.import_rules_csv(source) == 4
+    exported = io.StringIO()
+    repository.export_rules_csv(exported)
+    exported.seek(0)
+    copy = Repository(tmp_path / "b.db")
+    copy.import_rules_csv(exported)
+
+    assert copy.list_rules() == repository.list_rules()
+    assert repository.list_rules("NVDA")[0]["params"] == {"period": 14}
+    assert repository.list_rules("AAPL")[0] == {"id": "p", "symbol": "AAPL", "percentage": -3.0, "window": "5d"}
+
+
+def test_emails_deduplicated_and_searchable(tmp_path):
+    """Test recipients are unique regardless of case and invalid addresses are dropped"""
+    repository = Repository(tmp_path / "app.db")
+    added = repository.import_emails_csv(io.StringIO("email\na@example.com\nA@Example.com\nnot-an-email\nb@test.org\n"))
+
+    assert added == 2
+    assert repository.list_emails(search="test") == ["b@test.org"]
+    assert repository.count_emails() == 2
+
+
+def test_search_by_symbol_prefix_and_edit_entries(tmp_path):
+    """Test rules and simulation entries filter by symbol prefix, and entries can be edited in place"""
+    repository = Repository(tmp_path / "app.db")
+    repository.add_rules([{"symbol": symbol, "percentage": 5.0} for symbol in ["AAPL", "AMD", "MSFT"]])
+    repository.add_simulation_entries([{"symbol": "AAPL", "price": 100.0}, {"symbol": "MSFT", "price": 200.0}])
+    first, second = repository.list_simulation_entries()
+
+    changed = repository.update_simulation_entries([{"id": first["id"], "symbol": None, "price": 150.0}, {"id": second["id"], "symbol": "nvda"}])
+
+    assert repository.count_rules(search="a") == 2
+    assert [rule["symbol"] for rule in repository.list_rules(search="ms")] == ["MSFT"]
+    assert changed == 2
+    assert repository.list_simulation_entries() == [
+        {"id": first["id"], "symbol": "AAPL", "price": 150.0},
+        {"id": second["id"], "symbol": "NVDA", "price": 200.0},
+    ]
+    assert repository.count_simulation_entries("nv") == 1
+
+
+def test_search_treats_wildcards_literally(tmp_path):
+    """Test _ and % in search text match themselves, and entry symbols are normalised like rule symbols"""
+    repository = Repository(tmp_path / "app.db")
+    repository.add_rules([{"symbol": symbol, "percentage": 5.0} for symbol in ["BRK_B", "BRKXB"]])
+    repository.add_simulation_entries([{"symbol": " brk_b ", "price": 400.0}, {"symbol": "BRKXB", "price": 1.0}])
+    repository.add_emails(["a_b@example.com", "axb@example.com", "c%d@example.com"])
+
+    assert [rule['symbol'] for rule in repository.list_rules(search="brk_")] == ["BRK_B"]
+    assert [entry['symbol'] for entry in repository.list_simulation_entries(search="BRK_")] == ["BRK_B"]
+    assert repository.list_emails(search="a_b") == ["a_b@example.com"]
+    assert repository.count_emails(search="%") == 1
@@ -0,0 +1,119 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from rules import HistoryRuleSet, RuleSet, build_panel
+
+
+def test_ruleset_returns_every_triggered_rule():
+    """Test batched evaluation reports all matching rules per input"""
+    rules = [
+        {"id": "a", "symbol": "AAPL", "percentage": 5.0},
+        {"id": "b", "symbol": "AAPL", "percentage": 2.0},
+        {"id": "c", "symbol": "GOOGL", "percentage": -3.0},
+    ]
+    triggered = RuleSet(rules).evaluate(
+        ["AAPL", "GOOGL", "MSFT", "AAPL"],
+        [6.0, 1.0, 50.0, float("nan")]
+    )
+
+    assert list(triggered["position"]) == [0, 0]
+    assert list(triggered["rule_id"]) == ["b", "a"]
+    assert list(triggered["threshold"]) == [2.0, 5.0]
+
+
+def test_ruleset_matches_linear_scan():
+    """Test batched evaluation agrees with a brute-force scan"""
+    rng = np.random.default_rng(42)
+    symbols = [f"S{i}" for i in range(50)]
+    rules = [
+        {"id": str(i), "symbol": rng.choice(symbols), "percentage": round(rng.uniform(-10, 10), 1)}
+        for i in range(2000)
+    ]
+    moves = rng.uniform(-12, 12, size=300).round(1)
+    move_symbols = rng.choice(symbols + ["UNKNOWN"], size=300)
+
+    triggered = RuleSet(rules).evaluate(move_symbols, moves)
+
+    expected = sorted(
+        (pos, rule["id"])
+        for pos, (sym, pct) in enumerate(zip(move_symbols, moves))
+        for rule in rules
+        if rule["symbol"] == sym and (
+            pct >= rule["percentage"] if rule["percentage"] > 0
+            else pct <= rule["percentage"] if rule["percentage"] < 0
+            else True
+        )
+    )
+    assert sorted(zip(triggered["position"], triggered["rule_id"])) == expected
+
+
+def test_direction_follows_threshold_sign():
+    """Test a -3% rule no longer fires on a +3% move unless it asks for both directions"""
+    rules = [
+        {"id": "down", "symbol": "GOOGL", "percentage": -3.0},
+        {"id": "either", "symbol": "GOOGL", "percentage": 3.0, "direction": "both"},
+    ]
+
+    triggered = RuleSet(rules).evaluate(["GOOGL", "GOOGL"], [3.5, -3.5])
+
+    assert list(zip(triggered["position"], triggered["rule_id"])) == [(0, "either"), (1, "down"), (1, "either")]
+
+
+def test_history_rules_over_panel():
+    """Test windowed, price-level and volume rules against hand-built bars"""
+    index = pd.date_range("2024-01-01", periods=6, freq="B", tz="America/New_York")
+    close = [100.0, 101.0, 99.0, 95.0, 97.0, 104.0]
+    hist = pd.DataFrame({
+        "Open": [100.0, 100.0, 101.0, 98.0, 95.0, 97.0],
+        "High": [101.0, 102.0, 101.0, 98.0, 98.0, 105.0],
+        "Low": [99.0, 99.0, 98.0, 94.0, 90.0, 97.0],
+        "Close": close,
+        "Volume": [100, 100, 100, 100, 100, 400],
+    }, index=index)
+    rules = [
+        {"id": "fall_3d", "symbol": "AAPL", "percentage": -4.0, "window": "3d"},
+        {"id": "dip_intraday", "symbol": "AAPL", "percentage": -5.0, "window": "intraday"},
+        {"id": "cross_100", "symbol": "AAPL", "price": 100.0},
+        {"id": "volume_spike", "symbol": "AAPL", "volume_multiple": 3.0, "window": "3d"},
+        {"id": "unknown", "symbol": "MSFT", "price": 1.0, "direction": "up"},
+    ]
+
+    fires, _ = HistoryRuleSet(rules).evaluate(build_panel({"AAPL": hist}))
+
+    fired_on = {rule["id"]: list(np.flatnonzero(fires[:, i])) for i, rule in enumerate(rules)}
+    assert fired_on == {
+        "fall_3d": [3],           # 95 vs 100 three bars earlier
+        "dip_intraday": [4],      # low of 90 against an open of 95
+        "cross_100": [2, 5],      # falls through 100, then climbs back
+        "volume_spike": [5],
+        "unknown": [],
+    }
+
+
+
+def test_simulated_prices_only_move_their_own_symbols_rules():
+    """Test each simulated entry is checked as its own symbol's next close"""
+    index = pd.date_range("2024-01-01", periods=4, freq="B", tz="America/New_York")
+    def bars(close):
+        return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 100}, index=index)
+    aapl, msft = bars([100.0, 102.0, 104.0, 105.0]), bars([200.0] * 4)
+    rules = [
+        {"id": "aapl_level", "symbol": "AAPL", "price": 110.0, "direction": "up"},
+        {"id": "aapl_fall_3d", "symbol": "AAPL", "percentage": -5.0, "window": "3d"},
+        {"id": "msft_level", "symbol": "MSFT", "price": 190.0, "direction": "down"},
+    ]
+
+    triggered = HistoryRuleSet(rules).evaluate_entries(
+        build_panel({"AAPL": aapl, "MSFT": msft}), ["AAPL", "MSFT", "AAPL", "NOPE"], [111.0, 210.0, 96.0, 1.0]
+    )
+
+    assert list(zip(triggered["position"], triggered["rule_id"])) == [(0, "aapl_level"), (2, "aapl_fall_3d")]
+    assert triggered["value"].round(2).tolist() == [111.0, -5.88]  # 96 vs 102 three bars earlier
@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from rules import build_panel
+from scenarios import bucket_paths, grid_moves, monte_carlo_moves, run_scenarios, shock_grid, summarize
+
+
+def _history(closes):
+    index = pd.date_range("2024-01-01", periods=len(closes), freq="B")
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 1000.0}, index=index)
+
+
+def test_shock_grid_fires_rules_like_a_next_bar():
+    """Test every rule is checked against every shock with the same semantics as live evaluation"""
+    panel = build_panel({"AAPL": _history([100, 100, 100, 100, 100, 100]), "MSFT": _history([50, 50, 50, 50, 50, 40])})
+    rules = [
+        {"id": "up", "symbol": "AAPL", "percentage": 5.0},
+        {"id": "both", "symbol": "AAPL", "percentage": 10.0, "direction": "both"},
+        {"id": "cross", "symbol": "AAPL", "price": 96.0},
+        {"id": "week", "symbol": "MSFT", "percentage": -10.0, "window": "5d"},
+        {"id": "volume", "symbol": "AAPL", "volume_multiple": 2.0},
+    ]
+    shocks = shock_grid(-10, 10, 5)
+
+    applied, fires = run_scenarios(rules, panel, grid_moves(2, shocks))
+    summary = summarize(applied, fires, shocks).set_index("rule_id")
+
+    assert list(shocks) == [-10, -5, 0, 5, 10]
+    assert [rule["id"] for rule in applied] == ["up", "both", "cross", "week"]
+    assert fires.tolist() == [
+        [False, False, False, True, True],
+        [True, False, False, False, True],
+        [True, True, False, False, False],
+        # MSFT closed at 40 against 50 five bars back, so only a rise of more than 12.5% undoes the fall
+        [True, True, True, True, True],
+    ]
+    assert summary.loc["up", "trigger_up"] == 5.0
+    assert np.isnan(summary.loc["up", "trigger_down"])
+    assert summary.loc["cross", "trigger_down"] == -5.0
+
+
+def test_monte_carlo_moves_follow_volatility_and_correlation():
+    """Test simulated moves are reproducible and carry the given volatility and correlation"""
+    daily = 0.02
+    # Two correlated symbols and one without history
+    covariance = np.zeros((3, 3))
+    covariance[:2, :2] = daily ** 2 * np.array([[1.0, 0.9], [0.9, 1.0]])
+
+    moves = monte_carlo_moves(covariance, paths=20000, seed=7)
+    rates, bucket_moves = bucket_paths(moves[:1] >= 2.0, moves, buckets=4)
+
+    assert moves.shape == (3, 20000)
+    assert np.array_equal(moves, monte_carlo_moves(covariance, paths=20000, seed=7))
+    assert abs(moves[0].std() - 2.0) < 0.1
+    assert np.corrcoef(moves[0], moves[1])[0, 1] > 0.85
+    assert not moves[2].any()
+    assert np.all(np.diff(bucket_moves) > 0)
+    assert rates[0, 0] < rates[0, -1]
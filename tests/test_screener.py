@@ -0,0 +1,54 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+
+from screener import metrics_frame, parse_universe, screen
+
+FUNDAMENTALS = {
+    "AAPL": {"longName": "Apple Inc.", "currentPrice": 190.0, "marketCap": 3.0e12, "trailingPE": 30.0,
+             "dividendYield": 0.005, "fiftyTwoWeekLow": 160.0, "fiftyTwoWeekHigh": 200.0},
+    "KO": {"longName": "Coca-Cola", "currentPrice": 60.0, "marketCap": 2.6e11, "trailingPE": 24.0,
+           "dividendYield": 0.031, "fiftyTwoWeekLow": 55.0, "fiftyTwoWeekHigh": 65.0},
+    "XOM": {"longName": "Exxon Mobil", "currentPrice": 100.0, "marketCap": 4.0e11, "trailingPE": 12.0,
+            "dividendYield": 0.035, "fiftyTwoWeekLow": 95.0, "fiftyTwoWeekHigh": 120.0},
+    "NEW": {"longName": "Newly Listed", "currentPrice": 10.0, "marketCap": 1.0e9, "trailingPE": "Infinity"},
+}
+
+
+def test_metrics_frame_keeps_numbers_typed():
+    """Test fundamentals become numeric columns, with unusable values as NaN and derived 52-week columns"""
+    frame = metrics_frame(FUNDAMENTALS)
+
+    assert frame.loc["AAPL", "market_cap"] == 3.0e12
+    assert frame["pe_ratio"].dtype == np.float64
+    assert np.isnan(frame.loc["NEW", "pe_ratio"])
+    assert np.isnan(frame.loc["NEW", "range_position"])
+    assert np.isclose(frame.loc["KO", "dividend_yield"], 3.1)
+    assert np.isclose(frame.loc["AAPL", "range_position"], 75.0)
+    assert np.isclose(frame.loc["XOM", "below_high_pct"], 100 / 6)
+
+
+def test_screen_filters_and_sorts_by_metrics():
+    """Test bounds combine, leave out symbols missing a filtered metric and sort numerically"""
+    frame = metrics_frame(FUNDAMENTALS)
+
+    assert list(screen(frame)) == list(frame.columns)
+    assert list(screen(frame).index) == ["AAPL", "XOM", "KO", "NEW"]
+    assert list(screen(frame, pe_ratio=(None, 25), sort_by="pe_ratio", ascending=True).index) == ["XOM", "KO"]
+    assert list(screen(frame, dividend_yield=(3, None), range_position=(0, 30)).index) == ["XOM"]
+    assert list(screen(frame, market_cap=(1e11, 1e12)).index) == ["XOM", "KO"]
+
+
+def test_parse_universe_reads_lists_and_csv():
+    """Test symbol lists are read from plain text or a CSV with a Symbol column"""
+    assert parse_universe("aapl, msft\nSPY aapl") == ["AAPL", "MSFT", "SPY"]
+    assert parse_universe("Symbol,Security\nMMM,3M\nBRK.B,Berkshire Hathaway\n") == ["MMM", "BRK-B"]
+    assert parse_universe("Symbol\nAAPL\nmsft\n") == ["AAPL", "MSFT"]
+    assert parse_universe("Ticker,Symbol Name\nKO,Coca-Cola\n") == ["KO"]
+    assert parse_universe("AAPL,MSFT\nSPY") == ["AAPL", "MSFT", "SPY"]
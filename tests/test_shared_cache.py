@@ -0,0 +1,114 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import threading
+import time
+from datetime import datetime
+
+from shared_cache import MARKET_TIMEZONE, SharedCache, next_prewarm_time
+
+
+def test_concurrent_misses_load_once_and_stale_entries_refresh_in_background():
+    """Test a miss shared by several threads runs one load, and an expired entry is served while it refreshes"""
+    cache = SharedCache(max_bytes=10_000)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return f"v{len(calls)}"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("AAPL", loader, ttl_seconds=0.05))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    time.sleep(0.1)
+    stale = cache.get("AAPL", loader, ttl_seconds=0.05)
+    for _ in range(50):
+        if cache.stats()["refreshes"] and not cache._loading:
+            break
+        time.sleep(0.01)
+    refreshed = cache.get("AAPL", loader, ttl_seconds=0.05)
+    stats = cache.stats()
+
+    assert results == ["v1"] * 5
+    assert stale == "v1"
+    assert refreshed == "v2"
+    assert len(calls) == 2
+    assert (stats["misses"], stats["joined"], stats["stale_hits"], stats["refreshes"]) == (5, 4, 1, 1)
+
+
+def test_memory_budget_evicts_least_recently_used():
+    """Test entries beyond the byte budget evict the least recently used one"""
+    cache = SharedCache(max_bytes=100, size=lambda value: 40)
+    for key in ["a", "b"]:
+        cache.get(key, lambda key=key: key)
+    cache.get("a", lambda: "reloaded")
+    cache.get("c", lambda: "c")
+
+    assert cache.get("a", lambda: "reloaded") == "a"
+    assert cache.get("b", lambda: "reloaded") == "reloaded"
+    assert cache.stats()["evictions"] == 2
+    assert cache.popular(1) == ["a"]
+
+
+def test_next_prewarm_time_skips_weekends():
+    """Test pre-warming is scheduled for the next weekday before the open"""
+    friday_noon = datetime(2024, 3, 8, 12, 0, tzinfo=MARKET_TIMEZONE)
+    monday_early = datetime(2024, 3, 11, 6, 0, tzinfo=MARKET_TIMEZONE)
+
+    assert next_prewarm_time(friday_noon) == datetime(2024, 3, 11, 9, 15, tzinfo=MARKET_TIMEZONE)
+    assert next_prewarm_time(monday_early) == datetime(2024, 3, 11, 9, 15, tzinfo=MARKET_TIMEZONE)
+
+
+def test_get_many_loads_only_missing_keys_in_one_call():
+    """Test a batch lookup serves cached keys and loads every miss with a single call"""
+    cache = SharedCache(max_bytes=10_000, failure_ttl_seconds=0.05)
+    cache.get("a", lambda: "cached a")
+    batches = []
+
+    def load_many(keys):
+        batches.append(list(keys))
+        return {key: f"loaded {key}" for key in keys if key != "bad"}
+
+    assert cache.get_many(["a", "b", "c", "b", "bad"], load_many) == ["cached a", "loaded b", "loaded c", "loaded b", None]
+    assert batches == [["b", "c", "bad"]]
+    # Failed keys are remembered for the failure TTL, then only they are requested again
+    assert cache.get_many(["b", "bad"], load_many) == ["loaded b", None]
+    assert len(batches) == 1
+    time.sleep(0.06)
+    assert cache.get_many(["b", "bad"], load_many) == ["loaded b", None]
+    assert batches[-1] == ["bad"]
+
+
+def test_failed_loads_are_not_retried_on_every_request():
+    """Test a failing key is loaded once per failure TTL, and a failed refresh keeps the stale value without retrying"""
+    cache = SharedCache(max_bytes=10_000, failure_ttl_seconds=60)
+    calls = []
+    def failing():
+        calls.append(1)
+        return None
+
+    assert [cache.get("BAD", failing) for _ in range(3)] == [None, None, None]
+    assert len(calls) == 1 and cache.stats()["failure_hits"] == 2
+
+    cache.get("AAPL", lambda: "v1", ttl_seconds=0.01)
+    time.sleep(0.02)
+    for _ in range(3):
+        assert cache.get("AAPL", failing, ttl_seconds=0.01) == "v1"
+        for _ in range(50):
+            if not cache._loading:
+                break
+            time.sleep(0.01)
+    assert len(calls) == 2 and cache.stats()["refreshes"] == 1
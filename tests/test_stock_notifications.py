@@ -7,7 +7,9 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from utils import check_stock_rule, get_stock_data, send_email_notification
+import pandas as pd
+
+from utils import check_stock_rule, get_daily_moves, get_price_chart, get_stock_data, get_latest_prices, history_version, send_email_notification
 
 def test_check_stock_rule_triggers():
     """Test stock rule triggering logic"""
@@ -26,6 +28,30 @@ def test_check_stock_rule_triggers():
     assert triggered == False
     assert threshold is None
 
+def test_history_version_changes_when_latest_bar_is_revised():
+    """Test a live update to today's bar gives a new cache key even though the dates are unchanged"""
+    index = pd.date_range("2024-01-01", periods=3, freq="B", tz="America/New_York")
+    hist = pd.DataFrame({"Close": [100.0, 101.0, 102.0], "Volume": [10, 20, 30]}, index=index)
+    revised = hist.copy()
+    revised.iloc[-1] = [103.5, 45]
+
+    assert history_version(hist) == history_version(hist.copy())
+    assert history_version(hist) != history_version(revised)
+
+def test_bucketed_chart_indicators_align_and_are_labelled():
+    """Test indicators on pre-bucketed intraday bars line up with the plotted range and say they are per bucket"""
+    index = pd.date_range("2024-01-01 09:00", periods=70, freq="1h", tz="America/New_York")
+    close = pd.Series(range(100, 170), index=index, dtype=float)
+    hist = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 10}, index=index)
+    range_start = index[-1].date()
+
+    fig = get_price_chart("TEST", "5d", "5m", range_start, range_start, ("sma",), "hourly", history_version(hist), hist)
+
+    sma = next(trace for trace in fig.data if trace.name.startswith("SMA"))
+    expected = close.rolling(20).mean()[index.date == range_start]
+    assert sma.name == "SMA per hourly candle"
+    assert list(sma.y) == list(expected)
+
 @pytest.mark.integration
 def test_stock_data_fetching():
     """Test stock data fetching functionality"""
@@ -34,6 +60,32 @@ def test_stock_data_fetching():
     assert info is not None
     assert 'Close' in hist.columns
 
+@pytest.mark.mock
+def test_latest_prices_single_bulk_request(mocker):
+    """Test batched quotes dedupe symbols and use one download"""
+    columns = pd.MultiIndex.from_product([["Close"], ["MSFT", "TSLA"]])
+    frame = pd.DataFrame([[300.0, 200.0], [310.0, None]], columns=columns)
+    mock_download = mocker.patch('yfinance.download', return_value=frame)
+
+    prices = get_latest_prices(["tsla", "MSFT", "TSLA", "NOPE"])
+
+    mock_download.assert_called_once()
+    assert mock_download.call_args.args[0] == ["MSFT", "NOPE", "TSLA"]
+    assert prices["MSFT"] == 310.0
+    assert prices["TSLA"] == 200.0
+    assert pd.isna(prices["NOPE"])
+
+@pytest.mark.mock
+def test_daily_moves_missing_latest_bar_is_nan(mocker):
+    """Test a symbol without today's bar has no move instead of a carried-forward 0%"""
+    frame = pd.DataFrame({"MSFT": [300.0, 306.0], "TSLA": [200.0, None]})
+    mocker.patch('utils.download_recent_closes', return_value=frame)
+
+    moves = get_daily_moves(["MSFT", "TSLA"])
+
+    assert moves.loc["MSFT", "price_change_pct"] == pytest.approx(2.0)
+    assert pd.isna(moves.loc["TSLA", "price_change_pct"])
+
 @pytest.mark.mock
 def test_email_notification(mocker):
     """Test email notification with mocked SMTP"""
@@ -0,0 +1,94 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from charting import resample_ohlc
+from providers import LocalProvider
+from rules import RuleSet
+from streaming import (
+    OhlcResampler,
+    RuleTriggerScan,
+    StreamSummary,
+    consume,
+    iter_history_chunks,
+    iter_window_chunks,
+    periods_for_interval,
+    stream_overview,
+    stream_window,
+)
+
+
+def test_chunks_are_windowed_and_compact():
+    """Test intraday history arrives in bounded windows with compact dtypes"""
+    calls = []
+    provider = LocalProvider()
+    def fetch(symbol, start=None, end=None, interval="1d"):
+        calls.append((start, end))
+        return provider.history(symbol, start=start, end=end, interval=interval)
+
+    chunks = list(iter_history_chunks(fetch, "AAPL", "1mo", "1m"))
+
+    assert len(calls) >= 4
+    assert all(end - start <= pd.Timedelta(days=7) for start, end in calls)
+    assert chunks[0]["Close"].dtype == np.float32
+    assert chunks[0]["Volume"].dtype == np.uint32
+    combined = pd.concat(chunks)
+    assert combined.index.is_monotonic_increasing and not combined.index.duplicated().any()
+
+
+def test_stream_consumers_match_full_frame():
+    """Test streamed resampling and summary equal the in-memory results"""
+    full = LocalProvider().history("MSFT", period="2y")
+    chunks = [full.iloc[i:i + 50] for i in range(0, len(full), 50)]
+
+    resampler, summary = consume(chunks, OhlcResampler(pd.offsets.MonthEnd()), StreamSummary())
+
+    pd.testing.assert_frame_equal(resampler.result(), resample_ohlc(full, pd.offsets.MonthEnd()), check_freq=False)
+    assert summary.result()["high"] == full["High"].max()
+    assert summary.result()["bars"] == len(full)
+
+
+def test_rule_scan_reports_first_trigger_time():
+    """Test the stream scan records when each rule first fired"""
+    index = pd.date_range("2024-01-02 09:30", periods=6, freq="1min", tz="America/New_York")
+    bars = pd.DataFrame({"Open": 100.0, "Close": [100.0, 101.0, 102.5, 99.0, 96.0, 103.0]}, index=index)
+    rules = RuleSet([{"id": "up", "symbol": "AAPL", "percentage": 2.0}, {"id": "big", "symbol": "AAPL", "percentage": -4.0}])
+
+    (scan,) = consume([bars.iloc[:3], bars.iloc[3:]], RuleTriggerScan("AAPL", rules))
+
+    first = scan.result().set_index("rule_id")["first_triggered_at"]
+    assert first["up"] == index[2]
+    assert first["big"] == index[4]
+
+
+def test_narrow_window_streams_finer_candles():
+    """Test a narrowed range is fetched alone and charted finer than the whole period"""
+    provider = LocalProvider()
+    calls = []
+    def fetch(symbol, start=None, end=None, interval="1d"):
+        calls.append((start, end))
+        return provider.history(symbol, start=start, end=end, interval=interval)
+
+    _, _, period_label = stream_overview(iter_history_chunks(fetch, "AAPL", "5d", "5m"), "5d", "5m")
+    start = pd.Timestamp.now(tz="UTC").normalize() - pd.offsets.BDay(1)
+    end = start + pd.Timedelta(days=1)
+    calls.clear()
+    bars, window_label = stream_window(iter_window_chunks(fetch, "AAPL", start, end, "5m"), start, end, "5m")
+
+    assert calls == [(start, end)]
+    assert period_label is not None and window_label is None
+    assert not bars.empty and bars.index.min() >= start and bars.index.max() < end
+
+
+def test_intraday_periods_respect_lookback():
+    """Test only periods Yahoo serves for an interval are offered"""
+    assert "1mo" not in periods_for_interval("1m")
+    assert "1mo" in periods_for_interval("5m")
+    assert "5y" in periods_for_interval("1d")
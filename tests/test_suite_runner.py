@@ -0,0 +1,90 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from suite_runner import SuiteRunner, balance, file_fingerprint, marked_tests
+
+
+def _run(runner, **kwargs):
+    job = runner.start(**kwargs)
+    while job.wait(len(job.results), timeout=60):
+        pass
+    return job
+
+
+def test_runs_in_parallel_and_reuses_unchanged_passing_files(tmp_path):
+    """Test results stream with durations, passing files are cached until a module they import changes"""
+    (tmp_path / "helper.py").write_text("VALUE = 1\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_uses_helper.py").write_text(
+        "from helper import VALUE\n\n\ndef test_value():\n    \"\"\"Helper value is one\"\"\"\n    assert VALUE == 1\n"
+    )
+    (tmp_path / "tests" / "test_broken.py").write_text("def test_fails():\n    assert False\n\n\ndef test_ok():\n    pass\n")
+    runner = SuiteRunner(tmp_path / "tests", tmp_path / "runs", workers=2, root=tmp_path)
+
+    first = _run(runner)
+    statuses = {result["nodeid"]: result["status"] for result in first.results}
+    assert statuses == {
+        "tests/test_uses_helper.py::test_value": "PASSED",
+        "tests/test_broken.py::test_fails": "FAILED",
+        "tests/test_broken.py::test_ok": "PASSED",
+    }
+    assert first.summary()["status"] == "failed"
+    assert all(result["duration"] is not None for result in first.results)
+    assert [r["description"] for r in first.results if r["name"] == "test_value"] == ["Helper value is one"]
+
+    second = _run(runner)
+    assert second.cached_files == ["tests/test_uses_helper.py"]
+    assert [r["nodeid"] for r in second.results if r["cached"]] == ["tests/test_uses_helper.py::test_value"]
+    assert len(second.results) == 3
+
+    (tmp_path / "helper.py").write_text("VALUE = 2\n")
+    third = _run(runner)
+    assert third.cached_files == []
+    assert {r["nodeid"]: r["status"] for r in third.results}["tests/test_uses_helper.py::test_value"] == "FAILED"
+
+    history = {row["nodeid"]: row["runs"] for row in runner.history.summary()}
+    assert history["tests/test_broken.py::test_fails"] == 3
+    assert history["tests/test_uses_helper.py::test_value"] == 2
+
+
+def test_integration_tests_are_never_cached(tmp_path):
+    """Test a file that ran a live integration test is rerun every time, unless the run deselects it"""
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_live.py").write_text(
+        "import pytest\n\n\ndef test_offline():\n    pass\n\n\n"
+        "@pytest.mark.integration\ndef test_live():\n    pass\n"
+    )
+    (tmp_path / "pytest.ini").write_text("[pytest]\nmarkers =\n    integration: live services\n")
+    runner = SuiteRunner(tmp_path / "tests", tmp_path / "runs", workers=1, root=tmp_path)
+
+    assert marked_tests(tmp_path / "tests" / "test_live.py") == {"test_live"}
+    _run(runner)
+    assert _run(runner).cached_files == []
+    _run(runner, markexpr="not integration")
+    assert _run(runner, markexpr="not integration").cached_files == ["tests/test_live.py"]
+
+
+def test_fingerprint_covers_locked_dependencies(tmp_path):
+    """Test upgrading a locked dependency invalidates cached results"""
+    (tmp_path / "tests").mkdir()
+    test_file = tmp_path / "tests" / "test_a.py"
+    test_file.write_text("def test_a():\n    pass\n")
+    (tmp_path / "uv.lock").write_text('name = "pandas"\nversion = "2.1.3"\n')
+    before = file_fingerprint(test_file, root=tmp_path)
+
+    (tmp_path / "uv.lock").write_text('name = "pandas"\nversion = "2.2.0"\n')
+
+    assert file_fingerprint(test_file, root=tmp_path) != before
+
+
+def test_balance_puts_slowest_files_on_least_loaded_workers():
+    """Test files are spread longest first so worker loads stay even"""
+    seconds = {"a.py": 10.0, "b.py": 6.0, "c.py": 5.0, "d.py": 1.0}
+    assert balance(["d.py", "c.py", "b.py", "a.py"], seconds, 2) == [["a.py", "d.py"], ["b.py", "c.py"]]
+    assert balance(["a.py"], seconds, 4) == [["a.py"]]
+    assert balance([], seconds, 4) == []
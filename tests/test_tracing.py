@@ -0,0 +1,83 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import threading
+
+import pytest
+
+from tracing import Tracer
+
+
+def test_spans_record_durations_cache_results_and_bytes():
+    """Test traced calls count hits and misses, sizes and errors per span name"""
+    tracer = Tracer()
+    cache = {}
+
+    @tracer.traced("lookup", cache=True, size=len)
+    def lookup(key):
+        if key not in cache:
+            tracer.cache_miss()
+            cache[key] = key * 3
+        return cache[key]
+
+    lookup("ab")
+    lookup("ab")
+    with pytest.raises(ZeroDivisionError):
+        with tracer.span("divide"):
+            1 / 0
+
+    stats = {row["span"]: row for row in tracer.stats()}
+
+    assert stats["lookup"]["calls"] == 2
+    assert (stats["lookup"]["cache_hits"], stats["lookup"]["cache_misses"]) == (1, 1)
+    assert stats["lookup"]["bytes"] == 12
+    assert stats["divide"]["errors"] == 1
+    assert stats["divide"]["cache_hits"] == stats["divide"]["cache_misses"] == 0
+    assert [event["span"] for event in tracer.recent()] == ["divide", "lookup", "lookup"]
+
+
+def test_prometheus_text(tmp_path):
+    """Test totals render in the Prometheus exposition format and are written atomically"""
+    tracer = Tracer()
+    with tracer.span("export", cache=True) as current:
+        current.bytes = 2048
+    path = tmp_path / "metrics" / "stock_app.prom"
+
+    tracer.write_prometheus(path)
+    text = path.read_text()
+
+    assert "# TYPE stock_app_span_seconds summary" in text
+    assert 'stock_app_span_seconds_count{span="export"} 1' in text
+    assert 'stock_app_cache_requests_total{span="export",result="hit"} 1' in text
+    assert 'stock_app_span_bytes_total{span="export"} 2048' in text
+    assert [p.name for p in path.parent.iterdir()] == ["stock_app.prom"]
+
+
+def test_concurrent_prometheus_writers_do_not_collide(tmp_path):
+    """Test overlapping writers each finish and leave one complete file behind"""
+    tracer = Tracer()
+    with tracer.span("export"):
+        pass
+    path = tmp_path / "stock_app.prom"
+    errors = []
+    def write():
+        try:
+            for _ in range(50):
+                tracer.write_prometheus(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert path.read_text() == tracer.prometheus_text()
+    assert [p.name for p in tmp_path.iterdir()] == ["stock_app.prom"]
@@ -0,0 +1,213 @@
+"""
+Lightweight tracing for the app's hot paths
+
+Wrap a function with @traced("name"), or a block with `with span("name")`,
+to record how long it took, whether it was served from cache and how many
+bytes it produced. Totals are kept per span name in this process and can be
+shown in the app or exported as Prometheus text, e.g. for the node exporter
+textfile collector via STOCK_METRICS_FILE.
+"""
+import functools
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+METRICS_PREFIX = "stock_app"
+DEFAULT_RECENT_SPANS = 200
+DEFAULT_METRICS_PATH = os.getenv("STOCK_METRICS_FILE")
+
+
+class Span:
+    """
+    One timed call; code inside the span may set cache_hit and bytes
+    """
+    __slots__ = ("name", "cache_hit", "bytes")
+
+    def __init__(self, name: str, cache_hit: bool = None):
+        self.name = name
+        self.cache_hit = cache_hit
+        self.bytes = None
+
+
+class Tracer:
+    """
+    Per-name call counts, durations, errors, cache hits/misses and bytes.
+
+    Spans nest per thread, so cache_miss() inside a cached function body
+    marks the span that wrapped the cached call. Recording takes one lock
+    and a few additions, cheap enough to leave on in production.
+    """
+
+    def __init__(self, recent: int = DEFAULT_RECENT_SPANS):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}
+        self._recent = deque(maxlen=recent)
+        self._gauges = {}
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, cache: bool = False):
+        """
+        Time a block; with cache=True it counts as a hit unless cache_miss() is called inside it
+        """
+        current = Span(name, cache_hit=True if cache else None)
+        stack = self._stack()
+        stack.append(current)
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield current
+        except Exception:
+            failed = True
+            raise
+        finally:
+            stack.pop()
+            self._record(current, time.perf_counter() - started, failed)
+
+    def traced(self, name: str = None, cache: bool = False, size=None):
+        """
+        Decorator form of span; size(result) gives the byte count of a result
+        Put it above st.cache_data so cache hits are timed too
+        """
+        def decorate(fn):
+            span_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, cache=cache) as current:
+                    result = fn(*args, **kwargs)
+                    if size is not None and result is not None:
+                        current.bytes = size(result)
+                    return result
+            return wrapper
+        return decorate
+
+    def cache_miss(self):
+        """
+        Mark the innermost cache-tracking span as a miss; call it from the body of a cached function
+        """
+        for current in reversed(self._stack()):
+            if current.cache_hit is not None:
+                current.cache_hit = False
+                return
+
+    def _record(self, current: Span, seconds: float, failed: bool):
+        with self._lock:
+            stats = self._stats.get(current.name)
+            if stats is None:
+                stats = self._stats[current.name] = {
+                    "span": current.name, "calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                    "last_seconds": 0.0, "cache_hits": 0, "cache_misses": 0, "bytes": 0,
+                }
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["last_seconds"] = seconds
+            if current.cache_hit is not None:
+                stats["cache_hits" if current.cache_hit else "cache_misses"] += 1
+            if current.bytes is not None:
+                stats["bytes"] += int(current.bytes)
+            self._recent.append({
+                "time": time.time(), "span": current.name, "seconds": seconds, "cache_hit": current.cache_hit,
+                "bytes": current.bytes, "error": failed,
+            })
+
+    def stats(self) -> list:
+        """
+        Totals per span name, slowest in total first
+        Returns: list of dicts with calls, errors, total/mean/max/last seconds, cache hits/misses and bytes
+        """
+        with self._lock:
+            rows = [dict(stats) for stats in self._stats.values()]
+        for row in rows:
+            row["mean_seconds"] = row["total_seconds"] / row["calls"]
+        return sorted(rows, key=lambda row: row["total_seconds"], reverse=True)
+
+    def recent(self) -> list:
+        """
+        The most recent spans, newest first
+        """
+        with self._lock:
+            return list(reversed(self._recent))
+
+    def register_gauges(self, name: str, read):
+        """
+        Export the numbers in read()'s dict as {prefix}_{name}_{key} alongside the span totals
+        """
+        self._gauges[name] = read
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._recent.clear()
+
+    def prometheus_text(self, prefix: str = METRICS_PREFIX) -> str:
+        """
+        Render the totals in the Prometheus text exposition format
+        """
+        rows = self.stats()
+        lines = []
+
+        def family(metric, metric_type, help_text, samples):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {metric_type}")
+            lines.extend(f"{prefix}_{name}{labels} {value}" for name, labels, value in samples)
+
+        family("span_seconds", "summary", "Time spent in traced spans", [
+            sample for row in rows for sample in (
+                ("span_seconds_sum", f'{{span="{row["span"]}"}}', repr(row["total_seconds"])),
+                ("span_seconds_count", f'{{span="{row["span"]}"}}', row["calls"]),
+            )
+        ])
+        family("span_seconds_max", "gauge", "Slowest call of each span", [
+            ("span_seconds_max", f'{{span="{row["span"]}"}}', repr(row["max_seconds"])) for row in rows
+        ])
+        family("span_errors_total", "counter", "Spans that raised an exception", [
+            ("span_errors_total", f'{{span="{row["span"]}"}}', row["errors"]) for row in rows
+        ])
+        family("cache_requests_total", "counter", "Cache lookups by result", [
+            sample for row in rows if row["cache_hits"] or row["cache_misses"] for sample in (
+                ("cache_requests_total", f'{{span="{row["span"]}",result="hit"}}', row["cache_hits"]),
+                ("cache_requests_total", f'{{span="{row["span"]}",result="miss"}}', row["cache_misses"]),
+            )
+        ])
+        family("span_bytes_total", "counter", "Bytes produced by spans that report a size", [
+            ("span_bytes_total", f'{{span="{row["span"]}"}}', row["bytes"]) for row in rows if row["bytes"]
+        ])
+        for name, read in list(self._gauges.items()):
+            for key, value in read().items():
+                family(f"{name}_{key}", "gauge", f"{key} of {name}", [(f"{name}_{key}", "", value)])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Write the Prometheus text atomically, so a collector never reads a partial file
+        Each writer gets its own temp file, so sessions and processes can write at the same time
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as tmp:
+            tmp.write(self.prometheus_text())
+        try:
+            # Temp files are private to the owner; the collector may run as another user
+            os.chmod(tmp.name, 0o644)
+            os.replace(tmp.name, path)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+cache_miss = tracer.cache_miss
@@ -1,20 +1,421 @@
-import yfinance as yf
+import functools
+import math
+import os
 import pandas as pd
 from datetime import datetime, timedelta
 import streamlit as st
+from history_store import HistoryStore
+from fundamentals import KEY_METRIC_FIELDS, FundamentalsCache
+from rules import build_panel, is_snapshot_rule, rule_direction
+from indicators import INDICATORS, IndicatorCache
+from mailer import MailQueue, SmtpMailer, load_smtp_settings
+from ledger import NotificationLedger
+from repository import Repository
+from fetcher import FetchEngine
+from providers import provider_from_env, provider_store_dir
+from charting import DEFAULT_MAX_POINTS, build_candlestick_figure
+from streaming import iter_history_chunks, iter_window_chunks, stream_overview, stream_window
+from export import export_bytes, iter_frame_chunks
+from tracing import cache_miss, traced, tracer
+from shared_cache import Prewarmer, SharedCache
+from comparison import aligned_closes
+from screener import SCREENER_FIELDS, metrics_frame, parse_universe
 
-@st.cache_data(ttl=3600)  # Cache data for 1 hour
-def get_stock_data(symbol: str, period: str = "1y"):
+def _frame_bytes(frame) -> int:
+    # In-memory size of a fetched frame, for the tracing byte counts
+    return int(frame.memory_usage().sum())
+
+@traced("provider.history", size=_frame_bytes)
+def _fetch_history(symbol: str, period: str = None, start: str = None):
+    """
+    Download price history, either for a period or from a start date
+    """
+    fetch_engine.throttle()
+    return provider.history(symbol, period=period, start=start)
+
+@traced("provider.info")
+def _fetch_info(symbol: str):
+    """
+    Download the fundamentals blob
+    """
+    fetch_engine.throttle()
+    return provider.info(symbol)
+
+@traced("provider.history_window", size=_frame_bytes)
+def _fetch_history_window(symbol: str, start=None, end=None, interval: str = "1d"):
+    """
+    Download bars between start and an exclusive end at any interval
+    """
+    fetch_engine.throttle()
+    return provider.history(symbol, start=start, end=end, interval=interval)
+
+# Alerts queued within this many seconds of each other go out as one digest per recipient
+ALERT_DIGEST_SECONDS = float(os.getenv("ALERT_DIGEST_SECONDS", "60"))
+notification_ledger = NotificationLedger()
+# Ledger scope of the app's alerts, so its cooldowns stay apart from the monitor's
+APP_ALERT_SCOPE = "simulation"
+# Undelivered alerts are released from the ledger, so the next check retries them
+mail_queue = MailQueue(digest_seconds=ALERT_DIGEST_SECONDS,
+                       on_failure=functools.partial(notification_ledger.release, scope=APP_ALERT_SCOPE))
+fetch_engine = FetchEngine()
+
+# Enough daily bars to warm up long windows such as a 200-day SMA
+INDICATOR_RULE_PERIOD = "2y"
+
+# History and fundamentals shared by every session, served stale while one background refresh runs
+shared_cache = SharedCache()
+tracer.register_gauges("shared_cache", shared_cache.stats)
+
+def set_provider(new_provider):
+    """
+    Swap the market-data provider used by every fetch in this module
+    History and fundamentals move to the provider's own store, and everything cached from the old one is dropped
+    """
+    global provider, history_store, fundamentals_cache, indicator_cache
+    store_dir = provider_store_dir(new_provider)
+    provider = new_provider
+    history_store = HistoryStore(store_dir, fetch=_fetch_history)
+    fundamentals_cache = FundamentalsCache(os.path.join(store_dir, "fundamentals"), fetch=_fetch_info)
+    indicator_cache = IndicatorCache()
+    shared_cache.clear()
+    st.cache_data.clear()
+    get_price_chart.__wrapped__.clear()
+
+# Symbols most users look at, loaded before anyone asks; the period matches the chart's default
+PREWARM_SYMBOLS = [s.strip().upper() for s in os.getenv("PREWARM_SYMBOLS", "AAPL,MSFT,SPY").split(",") if s.strip()]
+PREWARM_PERIOD = "1y"
+PREWARM_POPULAR_COUNT = 20
+# Symbol list the screener starts from, one per line or a CSV with a Symbol column
+SCREENER_UNIVERSE_FILE = os.getenv("SCREENER_UNIVERSE_FILE")
+
+@st.cache_resource
+def get_repository() -> Repository:
+    """
+    Rules, recipients and simulation entries shared by every session
+    """
+    return Repository()
+
+def _load_price_history(symbol: str, period: str):
+    try:
+        return fetch_engine.submit(history_store.get_history, symbol, period).result()
+    except Exception as e:
+        return None
+
+def _load_fundamentals(symbol: str, fields: tuple):
+    try:
+        return fetch_engine.submit(fundamentals_cache.get, symbol, fields).result()
+    except Exception as e:
+        return None
+
+@traced("get_price_history", cache=True, size=_frame_bytes)
+def get_price_history(symbol: str, period: str = "1y"):
+    """
+    Fetch price history only, served from the shared cache and local store and topped up from Yahoo Finance
+    After an hour the cached frame is still returned at once while one background refresh updates it
+    """
+    return shared_cache.get(("history", symbol, period), lambda: _load_price_history(symbol, period), ttl_seconds=3600)
+
+@traced("get_fundamentals", cache=True)
+def get_fundamentals(symbol: str, fields: tuple = KEY_METRIC_FIELDS):
+    """
+    Fetch company fundamentals, limited to the requested fields
+    Fundamentals change slowly, so they are refreshed in the background after a day
+    """
+    return shared_cache.get(("fundamentals", symbol, fields), lambda: _load_fundamentals(symbol, fields), ttl_seconds=24 * 3600)
+
+def get_fundamentals_many(symbols, fields: tuple = KEY_METRIC_FIELDS) -> dict:
+    """
+    Fundamentals for many symbols through the shared cache
+    Fresh entries on disk are read directly; only the rest go through the rate-limited fetch pool together
+    Returns: dict of symbol -> fields dict, leaving out symbols that could not be loaded
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+
+    def load_many(keys):
+        loaded = {key: fundamentals_cache.peek(key[1], fields) for key in keys}
+        missing = [key for key, value in loaded.items() if value is None]
+        results = fetch_engine.fetch_many(fundamentals_cache.get, [key[1] for key in missing], fields)
+        loaded.update((key, result.value) for key, result in zip(missing, results) if result.error is None)
+        return loaded
+
+    infos = shared_cache.get_many([("fundamentals", s, fields) for s in symbols], load_many, ttl_seconds=24 * 3600)
+    return {symbol: info for symbol, info in zip(symbols, infos) if info is not None}
+
+@traced("get_screener_frame")
+def get_screener_frame(symbols) -> pd.DataFrame:
+    """
+    Typed key-metrics table for a universe of symbols
+    Returns: DataFrame indexed by symbol, without the symbols whose fundamentals could not be loaded
+    """
+    return metrics_frame(get_fundamentals_many(symbols, SCREENER_FIELDS))
+
+def load_screener_universe(path: str = SCREENER_UNIVERSE_FILE) -> list:
+    """
+    Symbols from the configured universe file, e.g. an S&P 500 list
+    Returns: list of symbols, or an empty list if no file is configured or it cannot be read
+    """
+    if not path:
+        return []
+    try:
+        with open(path) as f:
+            return parse_universe(f.read())
+    except OSError as e:
+        print(f"Warning: Could not read screener universe {path} - {str(e)}")
+        return []
+
+def prewarm_cache(popular_count: int = PREWARM_POPULAR_COUNT):
+    """
+    Refresh the configured and most requested entries in the background
+    """
+    for symbol in PREWARM_SYMBOLS:
+        shared_cache.refresh(("history", symbol, PREWARM_PERIOD), lambda symbol=symbol: _load_price_history(symbol, PREWARM_PERIOD))
+        shared_cache.refresh(("fundamentals", symbol, KEY_METRIC_FIELDS),
+                             lambda symbol=symbol: _load_fundamentals(symbol, KEY_METRIC_FIELDS), ttl_seconds=24 * 3600)
+    for key in shared_cache.popular(popular_count):
+        shared_cache.refresh(key)
+
+@st.cache_resource
+def start_prewarm() -> Prewarmer:
+    """
+    Pre-warm popular symbols once per process, at startup and again before each market open
+    """
+    return Prewarmer(prewarm_cache).start()
+
+def prefetch_fundamentals(symbol: str, fields: tuple = KEY_METRIC_FIELDS):
+    """
+    Start loading fundamentals in the background; a later get_fundamentals call joins this fetch
+    """
+    fetch_engine.submit(fundamentals_cache.get, symbol.upper(), fields)
+
+def get_price_histories(symbols, period: str = "1y") -> list:
+    """
+    Fetch price history for many symbols concurrently
+    Returns: list of FetchResult(symbol, value, error) in the order requested
+    """
+    return fetch_engine.fetch_many(history_store.get_history, [s.upper() for s in symbols], period)
+
+def get_history_panel(symbols, period: str = "1y") -> dict:
+    """
+    Daily history for many symbols aligned on one date index, for HistoryRuleSet
+    Symbols that could not be loaded are left out
+    Returns: dict of field -> DataFrame (dates x symbols)
+    """
+    results = get_price_histories(symbols, period)
+    return build_panel({result.symbol: result.value for result in results if result.error is None})
+
+def get_price_history_many(symbols, period: str = "1y") -> dict:
+    """
+    Price history for many symbols through the shared cache, fetching every miss together in one batch
+    Returns: dict of symbol -> DataFrame, leaving out symbols that could not be loaded
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+
+    def load_many(keys):
+        results = get_price_histories([key[1] for key in keys], period)
+        return {key: result.value for key, result in zip(keys, results) if result.error is None}
+
+    histories = shared_cache.get_many([("history", s, period) for s in symbols], load_many, ttl_seconds=3600)
+    return {symbol: hist for symbol, hist in zip(symbols, histories) if hist is not None}
+
+def _load_comparison_closes(symbols: tuple, period: str):
+    closes = aligned_closes(get_price_history_many(symbols, period))
+    # An empty frame is a failed load, so it is retried instead of cached
+    return closes if not closes.empty else None
+
+@traced("get_comparison_closes", cache=True, size=_frame_bytes)
+def get_comparison_closes(symbols: tuple, period: str = "1y") -> pd.DataFrame:
+    """
+    Closes for the compared symbols aligned into one float32 frame, shared across sessions
+    Returns: DataFrame (dates x symbols), without the symbols that could not be loaded
+    """
+    return shared_cache.get(("closes", symbols, period), lambda: _load_comparison_closes(symbols, period), ttl_seconds=3600)
+
+def stream_price_history(symbol: str, period: str, interval: str = "1d"):
+    """
+    Yield compact bars for a period window by window, so intraday history never loads all at once
+    """
+    return iter_history_chunks(_engine_history_window, symbol.upper(), period, interval)
+
+def _engine_history_window(symbol: str, start=None, end=None, interval: str = "1d"):
+    # Windows go through the fetch engine so they share its rate limit
+    return fetch_engine.submit(_fetch_history_window, symbol, start, end, interval).result()
+
+@traced("get_intraday_overview", cache=True)
+@st.cache_data(ttl=300)  # Intraday bars move quickly, cache for 5 minutes
+def get_intraday_overview(symbol: str, period: str, interval: str, max_points: int = DEFAULT_MAX_POINTS):
+    """
+    Stream intraday history once, keeping only the chart buckets and summary metrics
+    Returns: (DataFrame, dict, str) - (bars to plot, summary, bucket label), or (None, None, None) on failure
+    """
+    cache_miss()
+    try:
+        bars, summary, label = stream_overview(stream_price_history(symbol, period, interval), period, interval, max_points)
+    except Exception as e:
+        print(f"Error: Failed to stream {interval} history for {symbol} - {str(e)}")
+        return None, None, None
+    if summary["bars"] == 0:
+        return None, None, None
+    return bars, summary, label
+
+@traced("get_intraday_window", cache=True)
+@st.cache_data(ttl=300)  # Intraday bars move quickly, cache for 5 minutes
+def get_intraday_window(symbol: str, interval: str, start: pd.Timestamp, end: pd.Timestamp,
+                        max_points: int = DEFAULT_MAX_POINTS):
     """
-    Fetch stock data from Yahoo Finance
+    Stream only the bars between start and end at native resolution, bucketed as far as the window needs
+    Returns: (DataFrame, str) - (bars to plot, bucket label or None), or (None, None) on failure
     """
+    cache_miss()
+    end = min(end, pd.Timestamp.now(tz="UTC"))
     try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period=period)
-        info = stock.info
-        return hist, info
+        chunks = iter_window_chunks(_engine_history_window, symbol.upper(), start, end, interval)
+        bars, label = stream_window(chunks, start, end, interval, max_points)
     except Exception as e:
+        print(f"Error: Failed to stream {interval} history for {symbol} - {str(e)}")
+        return None, None
+    if bars.empty:
+        return None, None
+    return bars, label
+
+def history_version(hist: pd.DataFrame) -> str:
+    """
+    Cache key for a loaded history: changes when bars are added or the latest bar is revised during the session
+    """
+    return f"{hist.index[-1].isoformat()}:{len(hist)}:{tuple(hist.iloc[-1].tolist())}"
+
+@traced("build_export", cache=True, size=len)
+@st.cache_data(max_entries=8)  # Keyed on data_version, so entries never go stale
+def build_export(symbol: str, period: str, interval: str, fmt: str, data_version: str) -> bytes:
+    """
+    Serialize full-resolution history for download, chunk by chunk
+    data_version only keys the cache, so a refreshed history produces a new export
+    """
+    cache_miss()
+    if interval == "1d":
+        hist = get_price_history(symbol, period)
+        chunks = iter_frame_chunks(hist) if hist is not None else iter(())
+    else:
+        chunks = stream_price_history(symbol, period, interval)
+    return export_bytes(chunks, fmt)
+
+@traced("get_indicator")
+def get_indicator(symbol: str, period: str, hist: pd.DataFrame, name: str, params: dict = None) -> pd.DataFrame:
+    """
+    Indicator values for a price history, memoized per symbol, period, indicator and params
+    New bars only recompute the tail of a cached result
+    """
+    return indicator_cache.get(symbol, period, hist, name, params)
+
+@traced("get_price_chart", cache=True)
+@st.cache_resource(max_entries=32)  # Shared uncopied: st.plotly_chart only reads figures
+def get_price_chart(symbol: str, period: str, interval: str, range_start, range_end, indicator_names: tuple,
+                    bucket_label: str, data_version: str, _hist: pd.DataFrame):
+    """
+    Candlestick figure with indicators for the days range_start to range_end of a history
+    _hist is not hashed; data_version stands in for it in the cache key, so entries never go stale
+    Callers must not modify the returned figure
+    """
+    cache_miss()
+    tz = _hist.index.tz
+    bars = _hist[
+        (_hist.index >= pd.Timestamp(range_start, tz=tz)) &
+        (_hist.index < pd.Timestamp(range_end, tz=tz) + pd.Timedelta(days=1))
+    ]
+    # Indicators are computed on the full history so windows are warm at the range start;
+    # bars bucketed differently get their own cache entry
+    history_key = f"{period}:{interval}" + (f":{bucket_label}" if bucket_label else "")
+    indicators = {}
+    for name in indicator_names:
+        label = INDICATORS[name]["label"]
+        if bucket_label:
+            # Bars arrived already bucketed, so windows count buckets rather than native bars
+            label = f"{label} per {bucket_label} candle"
+        indicators[name] = (label, get_indicator(symbol, history_key, _hist, name).reindex(bars.index))
+    return build_candlestick_figure(bars, symbol, bucket_label=bucket_label, indicators=indicators)
+
+def get_latest_indicator_values(requirements: dict, period: str = INDICATOR_RULE_PERIOD) -> dict:
+    """
+    Latest indicator values for indicator rules
+    requirements: dict of symbol -> list of (indicator, params tuple), as from IndicatorRuleSet.requirements
+    Returns: dict of symbol -> dict of (indicator, params tuple) -> dict of column -> value
+    Symbols whose history could not be loaded are left out
+    """
+    latest = {}
+    for symbol, specs in requirements.items():
+        hist = get_price_history(symbol, period)
+        if hist is None or hist.empty:
+            continue
+        latest[symbol] = {
+            (name, params): get_indicator(symbol, period, hist, name, dict(params)).iloc[-1].to_dict()
+            for name, params in specs
+        }
+    return latest
+
+@traced("get_stock_data")
+def get_stock_data(symbol: str, period: str = "1y"):
+    """
+    Fetch price history together with fundamentals
+    Price-only callers should use get_price_history to skip the fundamentals lookup
+    """
+    hist = get_price_history(symbol, period)
+    if hist is None:
+        return None, None
+    info = get_fundamentals(symbol)
+    if info is None:
         return None, None
+    return hist, info
+
+def download_recent_closes(symbols, lookback: str = "5d") -> pd.DataFrame:
+    """
+    Download a short window of daily closes for several symbols in one request
+    Returns: DataFrame with one column per symbol, uncached
+    """
+    fetch_engine.throttle()
+    return provider.recent_closes(list(symbols), lookback)
+
+@traced("recent_closes", cache=True)
+@st.cache_data(ttl=60)  # Quotes go stale quickly, cache for 1 minute
+def _cached_recent_closes(symbols: tuple, lookback: str):
+    # One bulk request through the engine, shared by sessions asking for the same quotes
+    cache_miss()
+    return fetch_engine.submit(download_recent_closes, symbols, lookback).result()
+
+def get_latest_prices(symbols, lookback: str = "5d") -> pd.Series:
+    """
+    Fetch the latest close for many symbols with a single bulk request
+    Returns: pd.Series indexed by symbol, NaN where no price was available
+    """
+    unique_symbols = sorted({s.strip().upper() for s in symbols if s and s.strip()})
+    if not unique_symbols:
+        return pd.Series(dtype=float)
+
+    try:
+        closes = _cached_recent_closes(tuple(unique_symbols), lookback)
+        # Take the last available close per symbol, ignoring trailing gaps
+        latest = closes.ffill().iloc[-1] if not closes.empty else pd.Series(dtype=float)
+    except Exception as e:
+        print(f"Error: Bulk price download failed - {str(e)}")
+        latest = pd.Series(dtype=float)
+
+    return latest.reindex(unique_symbols).astype(float)
+
+def get_daily_moves(symbols, lookback: str = "5d") -> pd.DataFrame:
+    """
+    Compute the move of the latest close against the previous session's close
+    Returns: DataFrame indexed by symbol with price, previous_close and price_change_pct,
+    NaN for symbols without a bar in the latest session
+    """
+    unique_symbols = sorted({s.strip().upper() for s in symbols if s and s.strip()})
+    if not unique_symbols:
+        return pd.DataFrame(columns=["price", "previous_close", "price_change_pct"], dtype=float)
+    closes = download_recent_closes(unique_symbols, lookback).reindex(columns=unique_symbols)
+
+    # A missing latest bar is not carried forward, so it cannot show up as a 0% move
+    moves = pd.DataFrame(index=pd.Index(unique_symbols, name="symbol"))
+    moves["price"] = closes.iloc[-1] if len(closes) > 0 else float("nan")
+    moves["previous_close"] = closes.iloc[:-1].ffill().iloc[-1] if len(closes) > 1 else float("nan")
+    moves["price_change_pct"] = (moves["price"] / moves["previous_close"] - 1) * 100
+    return moves
 
 def format_number(number):
     """
@@ -34,6 +435,7 @@ def format_number(number):
         return f"{number/1e3:.2f}K"
     return f"{number:.2f}"
 
+@traced("get_key_metrics")
 def get_key_metrics(info):
     """
     Extract key metrics from stock info
@@ -50,104 +452,74 @@ def get_key_metrics(info):
     
     return {k: format_number(v) for k, v in metrics.items()}
 
+@traced("get_metrics_table", cache=True)
+@st.cache_data(ttl=24 * 3600)  # Follows the fundamentals cache
+def get_metrics_table(symbol: str):
+    """
+    Key metrics as a one-column table, or None when fundamentals are unavailable
+    """
+    cache_miss()
+    info = get_fundamentals(symbol)
+    if info is None:
+        return None
+    return pd.DataFrame.from_dict(get_key_metrics(info), orient='index', columns=['Value'])
+
+@traced("check_stock_rule")
 def check_stock_rule(symbol: str, price_change_pct: float, rules: list) -> tuple:
     """
     Check if a stock's price change triggers any rules
+    A plain scan for one move; compiling a RuleSet only pays off for batches, so use RuleSet.evaluate there
     Returns: (bool, float) - (whether rule was triggered, threshold that was triggered)
     """
-    matching_rules = [rule for rule in rules if rule['symbol'] == symbol]
-    if not matching_rules:
+    if not math.isfinite(price_change_pct):
         return False, None
-    
-    for rule in matching_rules:
-        if abs(price_change_pct) >= abs(rule['percentage']):
-            return True, rule['percentage']
-    
+    # Same matching as RuleSet: the move must reach the threshold's size in the rule's direction
+    magnitudes = {"up": price_change_pct, "down": -price_change_pct, "both": abs(price_change_pct)}
+    for rule in rules:
+        if rule['symbol'] == symbol and is_snapshot_rule(rule):
+            if magnitudes[rule_direction(rule)] >= abs(float(rule['percentage'])):
+                # The first matching rule in list order, as before
+                return True, float(rule['percentage'])
     return False, None
 
-def send_email_notification(email_list: list, triggered_stocks: list):
+@traced("send_email_notification")
+def send_email_notification(email_list: list, triggered_stocks: list, on_failure=None):
     """
-    Send email notification for triggered stock rules
+    Send email notification for triggered stock rules over one SMTP connection
+    on_failure(recipient, triggered_stocks) is called for every recipient not reached
     """
     if not email_list or not triggered_stocks:
         return
-    
-    import smtplib
-    import ssl
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-    import os
-
-    # Get email configuration from environment variables
-    smtp_server = os.getenv('SMTP_SERVER')
-    smtp_port_str = os.getenv('SMTP_PORT')
-    sender_email = os.getenv('EMAIL_USERNAME')
-    password = os.getenv('EMAIL_PASSWORD')
-
-    # Default port based on common SMTP servers
-    smtp_port = 587
-    if smtp_port_str:
-        try:
-            smtp_port = int(smtp_port_str)
-        except ValueError:
-            print(f"Warning: Invalid SMTP port value: {smtp_port_str}, using default port 587")
-    
-    print(f"Debug: Starting email notification process...")
-    print(f"Debug: Using SMTP settings - Server: {smtp_server}, Port: {smtp_port}, From: {sender_email}")
-
-    if not all([smtp_server, sender_email, password]):
-        print("Error: Email configuration is incomplete. Missing required settings:")
-        if not smtp_server: print("- SMTP_SERVER not set")
-        if not sender_email: print("- EMAIL_USERNAME not set")
-        if not password: print("- EMAIL_PASSWORD not set")
+
+    settings = load_smtp_settings()
+    if settings is None:
+        if on_failure is not None:
+            for recipient in email_list:
+                on_failure(recipient, triggered_stocks)
         return
 
-    symbols = ", ".join([stock['symbol'] for stock in triggered_stocks])
-    subject = f"Stock Price Alert: {symbols}"
-    
-    body = "The following stock rules were triggered due to price movements:\n\n"
-    for stock in triggered_stocks:
-        body += f"- {stock['symbol']}: {stock['price_change_pct']:+.2f}% (Threshold: {stock['threshold']:+.2f}%)\n"
-
-    for recipient in email_list:
-        try:
-            # Create message
-            message = MIMEMultipart()
-            message["From"] = sender_email
-            message["To"] = recipient
-            message["Subject"] = subject
-
-            # Add body to email
-            message.attach(MIMEText(body, "plain"))
-
-            # Create SMTP session and send email
-            print(f"Debug: Attempting to connect to SMTP server: {smtp_server}:{smtp_port}")
-            
-            context = ssl.create_default_context()
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.set_debuglevel(1)  # Enable debug output
-            print("Debug: Starting TLS connection...")
-            server.starttls(context=context)
-            
-            print("Debug: Attempting login...")
-            server.login(sender_email, password)
-            
-            print("Debug: Sending message...")
-            server.send_message(message)
-            print(f"Success: Email notification sent to {recipient}")
-            
-            server.quit()  # Properly close the connection
-                
-        except smtplib.SMTPAuthenticationError as e:
-            print(f"Error: SMTP Authentication failed. Please check your credentials.")
-            print(f"Debug: Authentication error details - {str(e)}")
-        except smtplib.SMTPConnectError as e:
-            print(f"Error: Failed to connect to SMTP server: {smtp_server}:{smtp_port}")
-            print(f"Debug: Connection error details - {str(e)}")
-        except smtplib.SMTPServerDisconnected as e:
-            print(f"Error: Server disconnected. This might be due to connection timeout or server issues.")
-            print(f"Debug: Disconnection details - {str(e)}")
-        except Exception as e:
-            print(f"Error: Failed to send email to {recipient}")
-            print(f"Debug: Error type: {type(e).__name__}")
-            print(f"Debug: Error details - {str(e)}")
+    with SmtpMailer(settings) as mailer:
+        sent = mailer.send_alerts(email_list, triggered_stocks, on_failure=on_failure)
+    print(f"Sent {sent}/{len(email_list)} alert emails")
+
+def queue_email_notification(email_list: list, triggered_stocks: list, checked_symbols=None,
+                             edge_triggered: bool = True) -> int:
+    """
+    Queue email notification on the background mail worker without blocking
+    Alerts already sent to a recipient within the cooldown are dropped, and with edge_triggered
+    only rules that were not firing at the previous check for checked_symbols are sent
+    Returns: number of recipients with alerts queued
+    """
+    if not email_list:
+        return 0
+    if edge_triggered:
+        if checked_symbols is None:
+            checked_symbols = {stock['symbol'] for stock in triggered_stocks}
+        triggered_stocks = notification_ledger.rising(triggered_stocks, checked_symbols, APP_ALERT_SCOPE)
+    batches = notification_ledger.due(email_list, triggered_stocks, scope=APP_ALERT_SCOPE)
+    if batches:
+        mail_queue.submit_batches(batches)
+    return len(batches)
+
+# Chosen once at import; stores and caches are built for it here, after every cached function exists
+set_provider(provider_from_env())